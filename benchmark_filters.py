@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark des 13 filtres de FilterPlugin
+Compare la chaîne ImageEnhance d'origine aux filtres compilés (LUT / matrice)
+et vérifie que le résultat reste identique à la tolérance près
+
+Usage: python3 benchmark_filters.py [mégapixels] [répétitions]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageChops, ImageEnhance, ImageFilter, ImageStat
+from plugin_manager import PluginConfig
+from photovinc_advanced_plugins import FilterPlugin, FILTER_RECIPES
+
+# Écart maximal toléré par canal (sur 255)
+TOLERANCE = 3
+
+
+def make_test_image(megapixels):
+    """Image synthétique 4:3 avec dégradés, aplats et bruit (comme une vraie photo)"""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    
+    radial = Image.radial_gradient('L').resize((width, height))
+    linear = Image.linear_gradient('L').resize((width, height))
+    img = Image.merge('RGB', (radial, linear, radial.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    noise = Image.effect_noise((width, height), 60).filter(ImageFilter.BoxBlur(1))
+    return Image.blend(img, Image.merge('RGB', (noise, noise, noise)), 0.3)
+
+
+def reference_filter(img, filter_name):
+    """Implémentation d'origine : une passe ImageEnhance par opération"""
+    enhancers = {
+        'brightness': ImageEnhance.Brightness,
+        'contrast': ImageEnhance.Contrast,
+        'color': ImageEnhance.Color
+    }
+    for op, factor in FILTER_RECIPES[filter_name]:
+        if op == 'color' and factor == 0:
+            img = img.convert('L').convert('RGB')
+        else:
+            img = enhancers[op](img).enhance(factor)
+    return img
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    megapixels = float(sys.argv[1]) if len(sys.argv) > 1 else 12
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    plugin = FilterPlugin(PluginConfig(name="filters"))
+    plugin.initialize()
+    
+    img = make_test_image(megapixels)
+    print(f"Image de test: {img.width}x{img.height} ({megapixels:g} MP), meilleur de {repeat}\n")
+    print(f"{'Filtre':<12}{'Origine':>10}{'Compilé':>10}{'Gain':>8}{'Écart max':>11}{'Écart moy':>11}")
+    
+    total_ref = total_new = 0
+    failures = []
+    for name in plugin.available_filters:
+        ref_time = best_time(lambda: reference_filter(img, name), repeat)
+        new_time = best_time(lambda: plugin._apply_filter_logic(img, name), repeat)
+        total_ref += ref_time
+        total_new += new_time
+        
+        diff = ImageChops.difference(reference_filter(img, name), plugin._apply_filter_logic(img, name))
+        max_diff = max(high for _, high in diff.getextrema())
+        mean_diff = sum(ImageStat.Stat(diff).mean) / 3
+        if max_diff > TOLERANCE:
+            failures.append(name)
+        
+        print(f"{name:<12}{ref_time * 1000:>8.0f}ms{new_time * 1000:>8.0f}ms"
+              f"{ref_time / new_time:>7.1f}x{max_diff:>11}{mean_diff:>11.2f}")
+    
+    print(f"\n{'Total':<12}{total_ref * 1000:>8.0f}ms{total_new * 1000:>8.0f}ms{total_ref / total_new:>7.1f}x")
+    
+    # Planche d'aperçu : réduction unique + filtres en parallèle
+    import tempfile
+    with tempfile.NamedTemporaryFile(suffix=".jpg") as capture:
+        img.save(capture.name, quality=90)
+        start = time.perf_counter()
+        grid = plugin.preview_grid(capture.name)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        plugin.preview_grid(capture.name)
+        cached = time.perf_counter() - start
+    print(f"\nPlanche d'aperçu {grid.width}x{grid.height} ({len(plugin.available_filters)} filtres, "
+          f"{plugin.preview_workers} workers): {first * 1000:.0f} ms, "
+          f"depuis le cache: {cached * 1000:.0f} ms (budget {plugin.preview_budget_ms} ms)")
+    plugin.shutdown()
+    
+    if failures:
+        print(f"\n✗ Écart supérieur à {TOLERANCE}: {', '.join(failures)}")
+        return 1
+    print(f"\n✓ Tous les filtres identiques à ±{TOLERANCE} près")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark des opérations sur toute la galerie (10 000 à 100 000 photos)
+Génère une galerie synthétique de la taille voulue et chronomètre chaque
+opération globale : affichage de la galerie, statistiques, taille d'export,
+ZIP, sauvegarde et vidage. Chaque exécution est ajoutée à un historique pour
+suivre les limites d'échelle d'une version à l'autre.
+
+Les photos de test sont petites (quelques Ko) : les temps liés au nombre de
+fichiers sont réalistes, ceux liés au volume (ZIP, sauvegarde) se lisent
+en Mo/s.
+
+Usage: python3 benchmark_gallery.py [--sizes 10000,100000] [--history fichier.jsonl]
+"""
+
+import sys
+import os
+import argparse
+import importlib.machinery
+import importlib.util
+import io
+import json
+import logging
+import math
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+from PIL import Image
+
+# Hors du dépôt : chaque exécution y ajoute une ligne (lu avant que HOME ne soit redirigé)
+DEFAULT_HISTORY = str(Path.home() / ".photovinc_benchmark_gallery.jsonl")
+STYLES = ["normal", "polaroid", "vintage", "stamp", "fete"]
+
+
+def load_usb_exporter():
+    """USBExporter vit dans un fichier au nom non importable directement"""
+    path = os.path.join(APP_DIR, "!!!!!usb_export.py!!!!")
+    loader = importlib.machinery.SourceFileLoader("usb_export", path)
+    spec = importlib.util.spec_from_loader("usb_export", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module.USBExporter
+
+
+def make_gallery(photo_dir, count, size):
+    """count photos nommées comme celles de l'application (photo_<style>_<date>_<n>.jpg)"""
+    photo_dir.mkdir(parents=True, exist_ok=True)
+    buffer = io.BytesIO()
+    Image.effect_noise(size, 40).convert('RGB').save(buffer, 'JPEG', quality=85)
+    data = buffer.getvalue()
+    
+    for i in range(count):
+        session, index = divmod(i, 4)
+        day, second = divmod(session, 86400)
+        name = f"photo_{STYLES[session % len(STYLES)]}_202601{day + 1:02d}_{second:06d}_{index + 1}.jpg"
+        with open(photo_dir / name, 'wb') as f:
+            f.write(data)
+    return len(data)
+
+
+def show_gallery_headless(photo_dir):
+    """Travail de show_gallery hors widgets : tri puis une miniature par photo"""
+    photos = sorted(photo_dir.glob("*.jpg"), reverse=True)
+    for photo_path in photos:
+        img = Image.open(photo_path)
+        img.thumbnail((180, 120), Image.Resampling.LANCZOS)
+    return len(photos)
+
+
+def show_gallery_tk(photo_dir):
+    """Vrai show_gallery (nécessite un écran) : jusqu'au premier affichage complet"""
+    import tkinter as tk
+    from integration_complete import build_gallery_window
+    
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        # Même tri et même fenêtre que photovincAppComplete.show_gallery
+        photos = sorted(photo_dir.glob("*.jpg"), reverse=True)
+        build_gallery_window(root, photos, on_download=lambda: None,
+                             on_montage=lambda: None, on_photo=lambda *args: None)
+        root.update()
+    finally:
+        root.destroy()
+
+
+def git_version():
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=APP_DIR,
+                                capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run_size(work_dir, count, photo_size, with_tk):
+    """Toutes les opérations sur une galerie de count photos ; durées en secondes"""
+    from gallery_download import GalleryDownloader
+    from print_counter_advanced import PrintCounterAdvanced
+    USBExporter = load_usb_exporter()
+    
+    photo_dir = work_dir / f"gallery_{count}"
+    start = time.perf_counter()
+    photo_bytes = make_gallery(photo_dir, count, photo_size)
+    generated = time.perf_counter() - start
+    
+    downloader = GalleryDownloader(photo_dir)
+    counter = PrintCounterAdvanced(photo_dir=photo_dir)
+    exporter = USBExporter(photo_dir)
+    
+    timings = {}
+    timings['show_gallery'] = timed(show_gallery_tk if with_tk else show_gallery_headless, photo_dir)
+    timings['get_gallery_stats'] = timed(downloader.get_gallery_stats)
+    timings['calculate_export_size'] = timed(exporter.calculate_export_size)
+    timings['create_zip_archive'] = timed(downloader.create_zip_archive, work_dir / f"gallery_{count}.zip")
+    (work_dir / f"gallery_{count}.zip").unlink(missing_ok=True)
+    timings['backup_gallery'] = timed(counter.backup_gallery, work_dir / f"backup_{count}")
+    shutil.rmtree(work_dir / f"backup_{count}", ignore_errors=True)
+    # En dernier : vide la galerie
+    timings['clear_gallery'] = timed(counter.clear_gallery)
+    
+    shutil.rmtree(photo_dir, ignore_errors=True)
+    return {
+        'photos': count,
+        'photo_bytes': photo_bytes,
+        'generation_seconds': round(generated, 2),
+        'seconds': {name: round(value, 4) for name, value in timings.items()}
+    }
+
+
+def scaling_exponents(results):
+    """Exposant k de t ∝ n^k entre la plus petite et la plus grande galerie (1 = linéaire)"""
+    if len(results) < 2:
+        return {}
+    small, large = results[0], results[-1]
+    ratio = math.log(large['photos'] / small['photos'])
+    exponents = {}
+    for name, value in large['seconds'].items():
+        base = small['seconds'].get(name)
+        if base and value:
+            exponents[name] = round(math.log(value / base) / ratio, 2)
+    return exponents
+
+
+def last_run(history_file):
+    if not os.path.exists(history_file):
+        return None
+    with open(history_file) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des opérations sur toute la galerie")
+    parser.add_argument('--sizes', default='10000,100000', help="tailles de galerie (photos)")
+    parser.add_argument('--photo-size', default='160x120', help="dimensions des photos de test")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="historique JSONL des exécutions")
+    parser.add_argument('--no-history', action='store_true', help="ne pas enregistrer cette exécution")
+    args = parser.parse_args()
+    sizes = sorted(int(n) for n in args.sizes.split(','))
+    photo_size = tuple(int(n) for n in args.photo_size.split('x'))
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_bench_gallery_"))
+    # Compteur, ZIP et caches vont dans le dossier de test, pas dans le vrai $HOME
+    os.environ['HOME'] = str(work_dir)
+    logging.getLogger().setLevel(logging.WARNING)
+    with_tk = bool(os.environ.get('DISPLAY'))
+    
+    print(f"Galeries de {', '.join(f'{n:,}' for n in sizes)} photos "
+          f"({photo_size[0]}x{photo_size[1]}), show_gallery {'avec Tk' if with_tk else 'sans écran'}\n")
+    results = []
+    try:
+        for count in sizes:
+            result = run_size(work_dir, count, photo_size, with_tk)
+            results.append(result)
+            print(f"{count:>8,} photos (générées en {result['generation_seconds']:.1f}s)")
+            for name, value in result['seconds'].items():
+                print(f"    {name:<24}{value:>9.3f}s{value / count * 1e6:>9.1f}µs/photo")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    exponents = scaling_exponents(results)
+    if exponents:
+        print(f"\nCroissance t ∝ n^k entre {sizes[0]:,} et {sizes[-1]:,} photos (1 = linéaire):")
+        for name, k in exponents.items():
+            flag = "  ⚠ plus que linéaire" if k > 1.2 else ""
+            print(f"    {name:<24}k = {k:.2f}{flag}")
+    
+    run = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'version': git_version(),
+        'show_gallery_tk': with_tk,
+        'photo_size': list(photo_size),
+        'results': results,
+        'scaling_exponents': exponents
+    }
+    
+    # Comparaison avec la dernière exécution enregistrée, taille par taille
+    previous = last_run(args.history)
+    if previous:
+        before = {r['photos']: r['seconds'] for r in previous.get('results', [])}
+        print(f"\nÉvolution depuis {previous.get('version') or '?'} ({previous.get('generated')}):")
+        for result in results:
+            reference = before.get(result['photos'])
+            if not reference:
+                continue
+            changes = [f"{name} {(value / reference[name] - 1) * 100:+.0f}%"
+                       for name, value in result['seconds'].items() if reference.get(name)]
+            print(f"    {result['photos']:>8,} photos: {', '.join(changes)}")
+    
+    if not args.no_history:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"\nExécution ajoutée à {args.history}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks des traitements d'image de photovinc
+Styles, montage, filtres, QR code, vignettes et ZIP sur des images
+synthétiques à la résolution de l'appareil ; temps et pic de mémoire (RSS)
+comparés à une référence enregistrée, échec en cas de régression
+
+Usage: python3 benchmark_images.py [--mp 12] [--repeat 3] [--only style_]
+                                   [--baseline fichier.json] [--save-baseline] [--check]
+
+La référence se mesure sur la borne (Raspberry Pi) avec --save-baseline.
+Avec --check (implicite si la variable CI est définie), une référence
+absente est une erreur au lieu d'un simple avertissement.
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from plugin_manager import PluginConfig
+from decorator_real import DecoratorPluginReal
+from photovinc_advanced_plugins import FilterPlugin
+from qr_code_plugin import QRCodePlugin
+from photo_web_server import get_thumbnail
+from gallery_download import GalleryDownloader
+from benchmark_filters import make_test_image
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(APP_DIR, "benchmark_images_baseline.json")
+
+STYLES = ["normal", "polaroid", "vintage", "stamp", "fete"]
+ZIP_PHOTOS = 8
+
+# Écarts ignorés (bruit de mesure) avant d'appliquer le seuil relatif
+MIN_TIME_DELTA = 0.005
+MIN_RSS_DELTA_MB = 5
+
+
+def prepare_inputs(work_dir, megapixels):
+    """Photos JPEG de test écrites une fois, relues par chaque benchmark"""
+    img = make_test_image(megapixels)
+    photos = []
+    for i in range(max(4, ZIP_PHOTOS)):
+        path = work_dir / "gallery" / f"photo_bench_{i + 1}.jpg"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Photos légèrement différentes : le ZIP ne compresse pas des doublons
+        img.rotate(i * 0.5).save(path, quality=90)
+        photos.append(path)
+    return {'photo': photos[0], 'photos': photos, 'size': img.size}
+
+
+def build_benchmarks(work_dir, inputs):
+    """Nom -> (préparation, opération) ; la préparation n'est pas chronométrée"""
+    out = work_dir / "out"
+    out.mkdir(exist_ok=True)
+    photo = str(inputs['photo'])
+    benchmarks = {}
+    
+    def decorator():
+        plugin = DecoratorPluginReal(PluginConfig(name="decorator"))
+        plugin.initialize()
+        return plugin
+    
+    for style in STYLES:
+        benchmarks[f"style_{style}"] = (
+            decorator, lambda p, s=style: p.apply_style(photo, s, str(out / f"style_{s}.jpg")))
+    
+    strip_inputs = [str(p) for p in inputs['photos'][:4]]
+    benchmarks["film_strip"] = (
+        decorator, lambda p: p.create_film_strip(strip_inputs, "polaroid", str(out / "strip.jpg")))
+    
+    def filters():
+        plugin = FilterPlugin(PluginConfig(name="filters"))
+        plugin.initialize()
+        return plugin
+    
+    for name in ["clarendon", "gingham", "juno", "lark", "ludwig", "valencia", "xpro2",
+                 "noir", "warm", "cool", "brighten", "contrast", "saturate"]:
+        benchmarks[f"filter_{name}"] = (
+            filters, lambda p, n=name: p.apply_filter(photo, n, str(out / f"filter_{n}.jpg")))
+    
+    def qrcode():
+        plugin = QRCodePlugin(PluginConfig(name="qrcode"))
+        plugin.initialize()
+        return plugin
+    
+    def generate_qr(plugin):
+        # Sans cache : on mesure le rendu, pas la lecture du cache
+        plugin.clear_cache()
+        return plugin.generate_qr_code("HTTP://192.168.1.100:8000/S/AB3DE", str(out / "qr.png"), size=400)
+    
+    benchmarks["qr_generate"] = (qrcode, generate_qr)
+    
+    def thumbnail(_):
+        shutil.rmtree(inputs['photo'].parent / ".cache", ignore_errors=True)
+        return get_thumbnail(inputs['photo'].parent, inputs['photo'].name) is not None
+    
+    benchmarks["thumbnail"] = (lambda: None, thumbnail)
+    
+    def zip_archive(downloader):
+        archive = downloader.create_zip_archive(out / "gallery.zip")
+        return archive is not None
+    
+    benchmarks["zip_archive"] = (
+        lambda: GalleryDownloader(inputs['photo'].parent), zip_archive)
+    return benchmarks
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_isolated(setup, operation, repeat, conn):
+    """Dans un processus neuf : le pic RSS mesuré est celui de l'opération seule"""
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        target = setup()
+        before = peak_rss_mb()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ok = operation(target)
+            times.append(time.perf_counter() - start)
+            if ok is False:
+                raise RuntimeError("l'opération a renvoyé False")
+        conn.send({'seconds': min(times), 'rss_mb': max(0.0, peak_rss_mb() - before)})
+    except Exception as e:
+        conn.send({'error': str(e)})
+    finally:
+        conn.close()
+
+
+def run_benchmark(setup, operation, repeat):
+    # fork : les closures n'ont pas à être sérialisées (Linux / Raspberry Pi OS)
+    context = multiprocessing.get_context('fork')
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_run_isolated, args=(setup, operation, repeat, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'error': f"processus terminé (code {process.exitcode})"}
+    process.join()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Liste des régressions au-delà du seuil relatif (et du bruit minimal)"""
+    regressions = []
+    for name, result in results.items():
+        ref = baseline.get(name)
+        if not ref or 'error' in result or 'error' in ref:
+            continue
+        for key, floor in (('seconds', MIN_TIME_DELTA), ('rss_mb', MIN_RSS_DELTA_MB)):
+            delta = result[key] - ref[key]
+            if delta > floor and result[key] > ref[key] * (1 + threshold):
+                regressions.append((name, key, ref[key], result[key]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des traitements d'image")
+    parser.add_argument('--mp', type=float, default=12, help="mégapixels des photos de test (12-24)")
+    parser.add_argument('--repeat', type=int, default=3, help="répétitions (meilleur temps retenu)")
+    parser.add_argument('--only', default='', help="préfixe des benchmarks à lancer (ex: style_)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="fichier de référence JSON")
+    parser.add_argument('--save-baseline', action='store_true', help="enregistre les résultats comme référence")
+    parser.add_argument('--threshold', type=float, default=0.2, help="régression tolérée (0.2 = +20%%)")
+    parser.add_argument('--check', action='store_true',
+                        help="échoue si la référence est absente (implicite en CI)")
+    args = parser.parse_args()
+    check = args.check or bool(os.environ.get('CI'))
+    
+    # Sans référence, la vérification ne prouverait rien : échec avant les mesures
+    if check and not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"✗ Pas de référence ({args.baseline}): la mesurer sur la borne avec --save-baseline")
+        return 2
+    
+    logging.getLogger().setLevel(logging.WARNING)
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_bench_images_"))
+    try:
+        inputs = prepare_inputs(work_dir, args.mp)
+        benchmarks = build_benchmarks(work_dir, inputs)
+        width, height = inputs['size']
+        print(f"Photos de test: {width}x{height} ({args.mp:g} MP), meilleur de {args.repeat}\n")
+        print(f"{'Benchmark':<20}{'Temps':>10}{'Pic RSS':>11}")
+        
+        results = {}
+        for name, (setup, operation) in benchmarks.items():
+            if not name.startswith(args.only):
+                continue
+            result = run_benchmark(setup, operation, args.repeat)
+            results[name] = result
+            if 'error' in result:
+                print(f"{name:<20}  ✗ {result['error']}")
+            else:
+                result['seconds'] = round(result['seconds'], 4)
+                result['rss_mb'] = round(result['rss_mb'], 1)
+                print(f"{name:<20}{result['seconds'] * 1000:>8.0f}ms{result['rss_mb']:>9.1f}MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    failed = [name for name, result in results.items() if 'error' in result]
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'generated': datetime.now().isoformat(timespec='seconds'),
+                'machine': platform.machine(),
+                'python': platform.python_version(),
+                'megapixels': args.mp,
+                'results': results
+            }, f, indent=2)
+        print(f"\nRéférence enregistrée dans {args.baseline}")
+        return 1 if failed else 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"\nPas de référence ({args.baseline}): lancer avec --save-baseline")
+        return 1 if failed else 0
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('megapixels') != args.mp:
+        print(f"\n⚠ Référence mesurée à {baseline.get('megapixels')} MP, comparaison indicative")
+    
+    regressions = compare(results, baseline.get('results', {}), args.threshold)
+    for name, key, before, after in regressions:
+        unit = 'ms' if key == 'seconds' else 'MB'
+        scale = 1000 if key == 'seconds' else 1
+        print(f"✗ {name}: {key} {before * scale:.1f}{unit} -> {after * scale:.1f}{unit} "
+              f"(+{(after / before - 1) * 100:.0f}%)")
+    
+    if failed:
+        print(f"\n✗ Benchmarks en erreur: {', '.join(failed)}")
+    if regressions:
+        print(f"\n✗ {len(regressions)} régression(s) au-delà de {args.threshold:.0%}")
+    if failed or regressions:
+        return 1
+    print(f"\n✓ Aucune régression au-delà de {args.threshold:.0%} (référence du {baseline.get('generated')})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout d'une session photo, sans écran ni invité
+Enchaîne capture x4, style, montage, QR code, impression et upload avec les
+plugins de démo et un WebDAV local, puis donne les percentiles de latence
+par étape et au total (JSON)
+
+Usage: python3 benchmark_session.py [sessions] [fichier.json]
+"""
+
+import sys
+import os
+import json
+import logging
+import math
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from plugin_manager import PluginManager, PluginConfig
+from demo_mode_plugin import DemoCameraPlugin, DemoPrinterPlugin
+from decorator_real import DecoratorPluginReal
+from qr_code_plugin import QRCodePlugin
+from nextcloud_plugin import NextCloudPlugin
+from session_pipeline import SessionPipeline, STAGES
+from share_tokens import ShareTokenStore
+from webdav_standin import WebDAVStandIn
+
+STYLES = ["normal", "polaroid", "vintage", "stamp", "fete"]
+PHOTOS_PER_SESSION = 4
+QR_SIZE = 400
+UPLOAD_TIMEOUT = 60
+
+# Étapes mesurées par le banc (en plus des traces du pipeline)
+PHASES = ('capture', 'ready', 'montage', 'qr', 'print', 'upload', 'total')
+
+
+def percentiles(values):
+    """p50/p90/p95/p99 (rang le plus proche), moyenne et max"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    
+    def rank(q):
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+    
+    return {
+        'count': len(ordered),
+        'mean': round(statistics.fmean(ordered), 4),
+        'p50': round(rank(0.50), 4),
+        'p90': round(rank(0.90), 4),
+        'p95': round(rank(0.95), 4),
+        'p99': round(rank(0.99), 4),
+        'max': round(ordered[-1], 4)
+    }
+
+
+def build_plugins(work_dir, standin):
+    """Plugins de démo + décorateur, QR code et NextCloud réels, config dans work_dir"""
+    manager = PluginManager(config_file=work_dir / "plugins.json")
+    manager.plugin_configs = {
+        "camera": PluginConfig(name="camera", priority=1, settings={"mode": "demo"}),
+        "printer": PluginConfig(name="printer", priority=2,
+                                settings={"printer_name": "DEMO_PRINTER", "mode": "demo"}),
+        "decorator": PluginConfig(name="decorator", priority=3),
+        "qrcode": PluginConfig(name="qrcode", priority=4,
+                               settings={"server_url": "http://127.0.0.1:8000"}),
+        "nextcloud": PluginConfig(name="nextcloud", priority=5, settings={
+            "server_url": standin.get_server_url(),
+            "username": "photovinc",
+            "password": "benchmark",
+            "remote_folder": "/photovinc",
+            "create_dated_folders": False,
+            "auto_upload": True,
+            "journal_file": str(work_dir / "journal.json"),
+            "state_file": str(work_dir / "state.json"),
+            # Pas de plugin WiFi ici : le WebDAV local est toujours joignable
+            "dependencies": []
+        })
+    }
+    manager.register_plugin("camera", DemoCameraPlugin)
+    manager.register_plugin("printer", DemoPrinterPlugin)
+    manager.register_plugin("decorator", DecoratorPluginReal)
+    manager.register_plugin("qrcode", QRCodePlugin)
+    manager.register_plugin("nextcloud", NextCloudPlugin)
+    
+    results = manager.initialize_all()
+    failed = [name for name, success in results.items() if not success]
+    if failed:
+        raise RuntimeError(f"Plugins non initialisés: {', '.join(failed)}")
+    return manager
+
+
+def wait_uploads(nextcloud, standin, photos, timeout=UPLOAD_TIMEOUT):
+    """Attend que toutes les photos soient arrivées sur le WebDAV local"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(standin.file_path(f"/photovinc/{Path(p).name}").exists() for p in photos) \
+                and not nextcloud.upload_journal.pending_count():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def run_session(pipeline, manager, tokens, standin, style, work_dir):
+    """Une session complète ; retourne les durées de chaque phase (secondes)"""
+    camera = manager.get_plugin("camera")
+    printer = manager.get_plugin("printer")
+    decorator = manager.get_plugin("decorator")
+    qr_plugin = manager.get_plugin("qrcode")
+    nextcloud = manager.get_plugin("nextcloud")
+    
+    timings = {}
+    start = time.perf_counter()
+    session = pipeline.new_session(style, decorator)
+    
+    # Capture : la photo n est stylisée pendant que la photo n+1 est prise
+    for i in range(PHOTOS_PER_SESSION):
+        temp_path = str(work_dir / f"capture_{i}.jpg")
+        if not pipeline.capture(session, camera, temp_path).result():
+            raise RuntimeError("Échec capture")
+        pipeline.ingest(session, temp_path)
+    timings['capture'] = time.perf_counter() - start
+    
+    pipeline.close(session)
+    photos = session.ready.result(timeout=UPLOAD_TIMEOUT)
+    timings['ready'] = time.perf_counter() - start
+    
+    phase = time.perf_counter()
+    montage_path = str(Path(pipeline.photo_dir) / f"montage_{style}_{session.id}.jpg")
+    if not decorator.create_film_strip(photos, style, montage_path):
+        raise RuntimeError("Échec montage")
+    timings['montage'] = time.perf_counter() - phase
+    
+    # QR code de l'album tel qu'affiché (pré-généré par on_session_ready)
+    phase = time.perf_counter()
+    url = tokens.short_url(qr_plugin.server_url, 'session', photos)
+    if qr_plugin.render_qr(url, size=QR_SIZE) is None:
+        raise RuntimeError("Échec QR code")
+    timings['qr'] = time.perf_counter() - phase
+    
+    phase = time.perf_counter()
+    if not pipeline.print(printer, montage_path, session).result(timeout=UPLOAD_TIMEOUT):
+        raise RuntimeError("Échec impression")
+    timings['print'] = time.perf_counter() - phase
+    
+    phase = time.perf_counter()
+    if not wait_uploads(nextcloud, standin, photos):
+        raise RuntimeError("Upload incomplet")
+    timings['upload'] = time.perf_counter() - phase
+    
+    timings['total'] = time.perf_counter() - start
+    pipeline.release(session)
+    return timings
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    output = sys.argv[2] if len(sys.argv) > 2 else None
+    
+    # Certains modules configurent le logging à l'import : on le remet au silence
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_bench_session_"))
+    photo_dir = work_dir / "photos"
+    photo_dir.mkdir()
+    standin = WebDAVStandIn(root=work_dir / "webdav")
+    standin.start()
+    
+    manager = pipeline = None
+    try:
+        manager = build_plugins(work_dir, standin)
+        qr_plugin = manager.get_plugin("qrcode")
+        qr_plugin.set_cache_dir(photo_dir / ".cache" / "qr")
+        tokens = ShareTokenStore(work_dir / "tokens.json")
+        
+        pipeline = SessionPipeline(manager, photo_dir, trace_file=work_dir / "traces.jsonl")
+        pipeline.on_session_ready = lambda session, photos: qr_plugin.prefetch_qr(
+            tokens.short_url(qr_plugin.server_url, 'session', photos), size=QR_SIZE)
+        pipeline.start()
+        
+        phases = {name: [] for name in PHASES}
+        for i in range(sessions):
+            style = STYLES[i % len(STYLES)]
+            timings = run_session(pipeline, manager, tokens, standin, style, work_dir)
+            for name, value in timings.items():
+                phases[name].append(value)
+            print(f"Session {i + 1}/{sessions} ({style}): {timings['total']:.2f}s", file=sys.stderr)
+        
+        # Traces du pipeline : temps de travail et d'attente par étape et par session
+        deadline = time.monotonic() + 5
+        while len(pipeline.traces) < sessions and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stages = {}
+        for stage in STAGES:
+            runs = [t['stages'][stage]['run_total'] for t in pipeline.traces if stage in t['stages']]
+            waits = [t['stages'][stage]['wait_total'] for t in pipeline.traces if stage in t['stages']]
+            if runs:
+                stages[stage] = {'run': percentiles(runs), 'wait': percentiles(waits)}
+        
+        report = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'sessions': sessions,
+            'photos_per_session': PHOTOS_PER_SESSION,
+            'styles': STYLES,
+            'phases_seconds': {name: percentiles(values) for name, values in phases.items()},
+            'pipeline_stages_seconds': stages
+        }
+    finally:
+        if pipeline:
+            pipeline.stop()
+        if manager:
+            manager.shutdown_all()
+        standin.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + "\n")
+        print(f"Rapport écrit dans {output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Profil du temps d'import au démarrage de photovinc
+Mesure (python -X importtime) le coût des imports de l'interface et signale
+les modules lourds chargés avant la première image
+
+Usage: python3 benchmark_startup.py [module] [répétitions]
+"""
+
+import sys
+import os
+import statistics
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules qui doivent être chargés à la demande, pas au démarrage
+HEAVY_MODULES = [
+    "requests", "qrcode", "cv2", "numpy",
+    "nextcloud_plugin", "nextcloud_ui", "wifi_config_ui",
+    "printer_detection", "print_counter_ui", "qr_code_plugin"
+]
+
+
+def import_profile(module):
+    """Un import à froid dans un nouvel interpréteur : {module: (propre, cumulé)} en µs"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = (int(own), int(cumulative), len(name) - len(name.lstrip()))
+    return profile
+
+
+def first_frame_time(module):
+    """Import + création de la fenêtre Tk jusqu'au premier affichage (nécessite un écran)"""
+    code = ("import time; start = time.perf_counter()\n"
+            f"import {module}, tkinter\n"
+            "root = tkinter.Tk(); root.update()\n"
+            "print(time.perf_counter() - start)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=APP_DIR,
+                            capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1]) if result.returncode == 0 else None
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else "integration_complete"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    
+    profiles = [import_profile(module) for _ in range(runs)]
+    totals = [p[module][1] for p in profiles]
+    last = profiles[-1]
+    
+    print(f"Import de {module}: médiane {statistics.median(totals) / 1000:.1f} ms "
+          f"(min {min(totals) / 1000:.1f}, max {max(totals) / 1000:.1f}) sur {runs} essais\n")
+    
+    # Imports directs du module (listés juste avant lui), du plus coûteux au moins coûteux
+    entries = list(last.items())
+    end = [name for name, _ in entries].index(module)
+    depth = last[module][2]
+    children = []
+    for name, (_, cumulative, level) in reversed(entries[:end]):
+        if level <= depth:
+            break
+        if level == depth + 2:
+            children.append((name, cumulative))
+    print(f"{'Import direct':<28}{'Cumulé':>10}")
+    for name, cumulative in sorted(children, key=lambda x: -x[1])[:12]:
+        print(f"{name:<28}{cumulative / 1000:>8.1f}ms")
+    
+    loaded = [name for name in HEAVY_MODULES if name in last]
+    print(f"\nModules lourds chargés au démarrage: {', '.join(loaded) or 'aucun'}")
+    
+    if os.environ.get('DISPLAY'):
+        frames = [first_frame_time(module) for _ in range(runs)]
+        frames = [f for f in frames if f is not None]
+        if frames:
+            print(f"Première image (import + fenêtre Tk): médiane {statistics.median(frames) * 1000:.0f} ms")
+    else:
+        print("Pas d'écran (DISPLAY): temps jusqu'à la première image non mesuré")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
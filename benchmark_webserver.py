@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Test de charge du serveur de partage (PhotoWebServer)
+Simule N téléphones d'invités qui scannent un QR code puis ouvrent l'album,
+les vignettes, les photos et parfois le ZIP de la galerie, dont des
+connexions lentes (3G) et des téléchargements abandonnés
+
+Le serveur tourne dans son propre processus, sur 127.0.0.1 : débit,
+percentiles de latence, taux d'erreur et mémoire (RSS) du serveur par palier
+
+Usage: python3 benchmark_webserver.py [--clients 5,10,20,50] [--duration 20]
+"""
+
+import sys
+import os
+import argparse
+import http.client
+import json
+import logging
+import math
+import multiprocessing
+import random
+import shutil
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageFilter
+from share_tokens import ShareTokenStore
+from gallery_download import GalleryDownloader
+
+HOST = '127.0.0.1'
+PHOTO_SIZE = (1600, 1200)   # photos stylisées (apply_style réduit à 1600x1200)
+PHOTOS_PER_SESSION = 4
+READ_CHUNK = 16 * 1024
+TIMEOUT = 30
+
+
+def percentiles(values):
+    """p50/p90/p95/p99 (rang le plus proche), moyenne et max"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    
+    def rank(q):
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+    
+    return {
+        'mean': round(statistics.fmean(ordered), 4),
+        'p50': round(rank(0.50), 4),
+        'p90': round(rank(0.90), 4),
+        'p95': round(rank(0.95), 4),
+        'p99': round(rank(0.99), 4),
+        'max': round(ordered[-1], 4)
+    }
+
+
+def prepare_gallery(photo_dir, tokens_file, sessions):
+    """Galerie synthétique : sessions de 4 photos, jetons de partage et un ZIP"""
+    noise = Image.effect_noise(PHOTO_SIZE, 50).filter(ImageFilter.BoxBlur(1))
+    base = Image.merge('RGB', (noise, Image.linear_gradient('L').resize(PHOTO_SIZE), noise))
+    
+    store = ShareTokenStore(tokens_file)
+    session_tokens, photos = [], []
+    for s in range(sessions):
+        names = []
+        for i in range(PHOTOS_PER_SESSION):
+            name = f"photo_polaroid_20260101_12{s:04d}_{i + 1}.jpg"
+            base.rotate((s * PHOTOS_PER_SESSION + i) % 7).save(photo_dir / name, quality=90)
+            names.append(name)
+        photos.extend(names)
+        session_tokens.append(store.get_or_create('session', names))
+    
+    # ZIP copié dans le dossier web, comme generate_download_qr
+    archive = GalleryDownloader(photo_dir).create_zip_archive(photo_dir / "photovinc_photos_bench.zip")
+    zip_token = store.get_or_create('zip', archive.name)
+    return {'sessions': session_tokens, 'photos': photos, 'zip': zip_token}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def _serve(photo_dir, tokens_file, port, ready, stop):
+    """Processus serveur : les journaux par requête sont coupés"""
+    logging.getLogger().setLevel(logging.WARNING)
+    from photo_web_server import PhotoWebServer
+    
+    server = PhotoWebServer(port=port, photo_directory=str(photo_dir),
+                            share_tokens_file=tokens_file, host=HOST)
+    if server.start():
+        ready.set()
+        stop.wait()
+        server.stop()
+
+
+def read_rss_mb(pid):
+    """RSS courant d'un processus (Linux, /proc)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class LoadStats:
+    """Résultats des requêtes d'un palier, par type"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.counts = {}
+        self.errors = {}
+        self.aborted = 0
+        self.cut = 0
+        self.bytes = 0
+    
+    def record(self, kind, latency=None, size=0, error=None):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            self.bytes += size
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            elif latency is not None:
+                self.latencies.setdefault(kind, []).append(latency)
+
+
+def fetch(port, path, kind, stats, deadline, rate=None, abort_after=None):
+    """GET complet ; rate (octets/s) simule un réseau lent, abort_after coupe la connexion
+
+    Un téléchargement encore en cours à la fin du palier est arrêté sans être compté.
+    """
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection(HOST, port, timeout=TIMEOUT)
+    received = 0
+    try:
+        conn.request('GET', path, headers={'User-Agent': 'photovinc-loadtest'})
+        response = conn.getresponse()
+        body_start = time.perf_counter()
+        while True:
+            if abort_after is not None and received >= abort_after:
+                # Invité qui quitte la page en plein téléchargement
+                with stats.lock:
+                    stats.aborted += 1
+                stats.record(kind, size=received)
+                return None
+            if time.monotonic() > deadline:
+                with stats.lock:
+                    stats.cut += 1
+                return None
+            chunk = response.read(READ_CHUNK)
+            if not chunk:
+                break
+            received += len(chunk)
+            if rate:
+                expected = received / rate - (time.perf_counter() - body_start)
+                if expected > 0:
+                    time.sleep(expected)
+        if response.status != 200:
+            stats.record(kind, size=received, error=f"HTTP {response.status}")
+            return None
+        latency = time.perf_counter() - start
+        stats.record(kind, latency, received)
+        return latency
+    except (OSError, http.client.HTTPException) as e:
+        stats.record(kind, size=received, error=type(e).__name__)
+        return None
+    finally:
+        conn.close()
+
+
+def guest(port, gallery, stats, deadline, rng, args):
+    """Un téléphone : scan du QR, album, vignettes, une ou deux photos, parfois le ZIP"""
+    slow = rng.random() < args.slow
+    rate = args.slow_rate * 1024 if slow else None
+    # Latences des téléphones lents à part : elles mesurent leur réseau, pas le serveur
+    suffix = '_slow' if slow else ''
+    while time.monotonic() < deadline:
+        index = rng.randrange(len(gallery['sessions']))
+        names = gallery['photos'][index * PHOTOS_PER_SESSION:(index + 1) * PHOTOS_PER_SESSION]
+        
+        fetch(port, f"/s/{gallery['sessions'][index]}", 'album' + suffix, stats, deadline, rate)
+        for name in names:
+            fetch(port, f"/thumb/{quote(name)}", 'thumb' + suffix, stats, deadline, rate)
+        for name in rng.sample(names, rng.randint(1, 2)):
+            abort = rng.randint(READ_CHUNK, 256 * 1024) if rng.random() < args.abort else None
+            fetch(port, f"/photo/{quote(name)}", 'photo' + suffix, stats, deadline, rate, abort)
+        if rng.random() < args.zip:
+            abort = rng.randint(READ_CHUNK, 1024 * 1024) if rng.random() < args.abort else None
+            fetch(port, f"/s/{gallery['zip']}", 'zip' + suffix, stats, deadline, rate, abort)
+        
+        # Temps de lecture de l'album avant le scan suivant
+        time.sleep(max(0, min(rng.uniform(0, args.think), deadline - time.monotonic())))
+
+
+def run_level(port, server_pid, gallery, clients, args):
+    stats = LoadStats()
+    deadline = time.monotonic() + args.duration
+    rss = []
+    sampling = threading.Event()
+    
+    def sample():
+        while not sampling.wait(0.1):
+            value = read_rss_mb(server_pid)
+            if value is not None:
+                rss.append(value)
+    
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    threads = [threading.Thread(target=guest, daemon=True,
+                                args=(port, gallery, stats, deadline, random.Random(args.seed + i), args))
+               for i in range(clients)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    sampling.set()
+    sampler.join()
+    
+    total = sum(stats.counts.values())
+    errors = sum(stats.errors.values())
+    return {
+        'clients': clients,
+        'seconds': round(elapsed, 2),
+        'requests': total,
+        'requests_per_second': round(total / elapsed, 1),
+        'megabytes_per_second': round(stats.bytes / elapsed / 1024**2, 2),
+        'error_rate': round(errors / total, 4) if total else None,
+        'errors': stats.errors,
+        'aborted': stats.aborted,
+        'cut_at_deadline': stats.cut,
+        'latency_seconds': {kind: percentiles(values) for kind, values in sorted(stats.latencies.items())},
+        'server_rss_mb': {'peak': round(max(rss), 1), 'end': round(rss[-1], 1)} if rss else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du serveur de partage photovinc")
+    parser.add_argument('--clients', default='5,10,20,50', help="paliers de téléphones simultanés")
+    parser.add_argument('--duration', type=float, default=20, help="durée de chaque palier (s)")
+    parser.add_argument('--sessions', type=int, default=25, help="sessions de 4 photos dans la galerie")
+    parser.add_argument('--slow', type=float, default=0.2, help="part de téléphones lents")
+    parser.add_argument('--slow-rate', type=float, default=256, help="débit d'un téléphone lent (Ko/s)")
+    parser.add_argument('--abort', type=float, default=0.1, help="part de téléchargements abandonnés")
+    parser.add_argument('--zip', type=float, default=0.05, help="probabilité de télécharger le ZIP")
+    parser.add_argument('--think', type=float, default=2.0, help="pause maximale entre deux scans (s)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.clients.split(',')]
+    
+    logging.getLogger().setLevel(logging.WARNING)
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_bench_web_"))
+    photo_dir = work_dir / "photos"
+    photo_dir.mkdir()
+    tokens_file = work_dir / "tokens.json"
+    
+    context = multiprocessing.get_context('fork')
+    ready, stop = context.Event(), context.Event()
+    server = None
+    report = None
+    try:
+        gallery = prepare_gallery(photo_dir, tokens_file, args.sessions)
+        port = free_port()
+        server = context.Process(target=_serve, args=(photo_dir, tokens_file, port, ready, stop))
+        server.start()
+        if not ready.wait(10):
+            print("✗ Le serveur n'a pas démarré")
+            return 1
+        
+        print(f"Serveur sur http://{HOST}:{port} ({len(gallery['photos'])} photos, "
+              f"RSS au repos {read_rss_mb(server.pid) or 0:.0f} MB)\n")
+        print(f"{'Clients':>8}{'Req/s':>8}{'MB/s':>8}{'Erreurs':>9}{'Album p95':>11}"
+              f"{'Photo p95':>11}{'RSS max':>9}")
+        
+        results = []
+        for clients in levels:
+            result = run_level(port, server.pid, gallery, clients, args)
+            results.append(result)
+            latency = result['latency_seconds']
+            album = latency.get('album') or {}
+            photo = latency.get('photo') or {}
+            print(f"{clients:>8}{result['requests_per_second']:>8.1f}{result['megabytes_per_second']:>8.1f}"
+                  f"{(result['error_rate'] or 0):>9.1%}{album.get('p95', 0) * 1000:>9.0f}ms"
+                  f"{photo.get('p95', 0) * 1000:>9.0f}ms"
+                  f"{(result['server_rss_mb'] or {}).get('peak', 0):>7.0f}MB")
+        
+        report = {
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'settings': {key: value for key, value in vars(args).items() if key != 'json'},
+            'levels': results
+        }
+    finally:
+        stop.set()
+        if server:
+            server.join(timeout=5)
+            if server.is_alive():
+                server.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    if args.json and report:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nRapport écrit dans {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -100,6 +100,9 @@ class CameraPluginReal(PluginInterface):
 class PrinterPluginReal(PluginInterface):
     """Plugin imprimante avec le vrai code CUPS"""
     
+    # get_status() lance plusieurs commandes lpstat
+    status_interval = 15.0
+    
     def __init__(self, config: PluginConfig):
         super().__init__(config)
         self.printer_name = config.settings.get('printer_name', 'CP_400')
@@ -14,6 +14,8 @@ import shutil
 import tkinter as tk
 from PIL import Image, ImageTk
 
+from job_scheduler import checkpoint, JobCancelled
+
 
 class GalleryDownloader:
     """Gère le téléchargement de la galerie complète"""
@@ -52,23 +54,31 @@ class GalleryDownloader:
             return None
         
         # Créer l'archive ZIP
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for photo in photos:
-                # Ajouter avec le nom de fichier seulement (pas le chemin complet)
-                zipf.write(photo, arcname=photo.name)
+        try:
+            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for photo in photos:
+                    # Lancé par le planificateur : interruptible (et suspendu en bulk)
+                    checkpoint()
+                    # Ajouter avec le nom de fichier seulement (pas le chemin complet)
+                    zipf.write(photo, arcname=photo.name)
+        except JobCancelled:
+            # Archive partielle inutilisable
+            output_path.unlink(missing_ok=True)
+            raise
         
         self.last_zip_path = output_path
         return output_path
     
-    def generate_download_qr(self, qr_plugin):
+    def generate_download_qr(self, qr_plugin, size=400):
         """
         Génère un QR code pour télécharger le ZIP
         
         Args:
             qr_plugin: Instance du plugin QR code
+            size: Taille du QR code en pixels
         
         Returns:
-            Path: Chemin du QR code généré
+            tuple: (image PIL du QR code, URL de téléchargement)
         """
         if not self.last_zip_path or not self.last_zip_path.exists():
             return None
@@ -84,16 +94,14 @@ class GalleryDownloader:
         if not web_zip_path.exists() or web_zip_path != self.last_zip_path:
             shutil.copy2(self.last_zip_path, web_zip_path)
         
-        # Générer l'URL de téléchargement
-        download_url = f"{self.web_server.get_server_url()}/{zip_filename}"
+        # Générer l'URL de téléchargement (lien court)
+        download_url = self.web_server.get_share_url('zip', zip_filename)
         
-        # Générer le QR code
-        qr_output = str(self.temp_dir / "gallery_download_qr.png")
-        success = qr_plugin.generate_qr_code(download_url, qr_output)
+        # Générer le QR code en mémoire (mis en cache par le plugin)
+        qr_image = qr_plugin.render_qr(download_url, size=size)
         
-        # generate_qr_code retourne True/False, pas le chemin
-        if success:
-            return qr_output, download_url
+        if qr_image is not None:
+            return qr_image, download_url
         else:
             return None, None
     
@@ -337,10 +345,10 @@ def show_download_options(app_instance, zip_path, downloader, stats):
             messagebox.showerror("Erreur", "Impossible de générer le QR code", parent=options_win)
             return
         
-        qr_path, download_url = result
+        qr_image, download_url = result
         
-        if not qr_path or not Path(qr_path).exists():
-            messagebox.showerror("Erreur", "QR code introuvable", parent=options_win)
+        if qr_image is None:
+            messagebox.showerror("Erreur", "Impossible de générer le QR code", parent=options_win)
             return
         
         options_win.destroy()
@@ -352,13 +360,6 @@ def show_download_options(app_instance, zip_path, downloader, stats):
         qr_win.attributes('-fullscreen', True)
         
         # Bouton FERMER
-        def cleanup_and_close():
-            try:
-                Path(qr_path).unlink()
-            except:
-                pass
-            qr_win.destroy()
-        
         close_btn = tk.Button(
             qr_win,
             text="✕ FERMER",
@@ -367,7 +368,7 @@ def show_download_options(app_instance, zip_path, downloader, stats):
             fg='white',
             width=12,
             height=2,
-            command=cleanup_and_close
+            command=qr_win.destroy
         )
         close_btn.place(x=850, y=20)
         
@@ -382,9 +383,7 @@ def show_download_options(app_instance, zip_path, downloader, stats):
         
         # QR Code
         try:
-            qr_img = Image.open(qr_path)
-            qr_img = qr_img.resize((400, 400), Image.Resampling.LANCZOS)
-            qr_photo = ImageTk.PhotoImage(qr_img)
+            qr_photo = ImageTk.PhotoImage(qr_image)
             
             qr_label = tk.Label(qr_win, image=qr_photo, bg='white')
             qr_label.image = qr_photo
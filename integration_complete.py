@@ -16,27 +16,23 @@ from datetime import datetime
 from pathlib import Path
 import time
 import json
+from concurrent.futures import wait
 
 from camera_printer_real import register_real_plugins
 from decorator_real import register_real_decorator
 from plugin_manager import PluginManager, WiFiPlugin, KeyboardPlugin
-from wifi_config_ui import WiFiConfigDialog
-from photo_web_server import PhotoWebServer
-from qr_code_plugin import QRCodePlugin, register_qr_plugin
-from nextcloud_plugin import NextCloudPlugin, register_nextcloud_plugin
-from nextcloud_ui import NextCloudConfigUI, integrate_nextcloud_features
+from plugin_metrics import METRICS
+from photo_web_server import PhotoWebServer, get_thumbnail
 from gallery_download import GalleryDownloader
+from session_pipeline import SessionPipeline
+from job_scheduler import SCHEDULER, INTERACTIVE, NEAR_TERM, BULK, checkpoint
 
 # Nouveaux imports pour le compteur avancé
 from print_counter_advanced import PrintCounterAdvanced
 
-# Imports pour détection d'imprimante automatique
-from printer_detection import (
-    PrinterIntegration, 
-    PrinterDetector,
-    setup_printer_detection
-)
-from print_counter_ui import show_print_counter_dialog
+# Les modules lourds (requests, interfaces WiFi/NextCloud, détection
+# d'imprimante) sont importés à la première utilisation pour afficher
+# la première image plus tôt
 
 
 class PrinterDiagnostic:
@@ -78,9 +74,126 @@ class PrinterDiagnostic:
             return {'status': 'erreur', 'message': f'Erreur: {status_msg}', 'color': '#e74c3c', 'solutions': ['Cliquer sur "Reset"', 'Vérifier /var/log/cups/error_log', 'Redémarrer l\'application']}
 
 
+def build_gallery_window(parent, photos, on_download, on_montage, on_photo):
+    """Fenêtre de la galerie (titre, boutons, miniatures 4 par ligne)
+    
+    Partagée par l'application et benchmark_gallery.py ; on_photo reçoit
+    (chemin de la photo, fenêtre de la galerie).
+    """
+    gallery_win = tk.Toplevel(parent)
+    gallery_win.title("Galerie Photos")
+    gallery_win.geometry("900x550")
+    gallery_win.configure(bg='#2c3e50')
+    gallery_win.transient(parent)
+    
+    # Centrer
+    gallery_win.update_idletasks()
+    x = (gallery_win.winfo_screenwidth() // 2) - 450
+    y = (gallery_win.winfo_screenheight() // 2) - 275
+    gallery_win.geometry(f"900x550+{x}+{y}")
+    
+    # Titre
+    title_frame = tk.Frame(gallery_win, bg='#34495e')
+    title_frame.pack(fill=tk.X)
+    
+    tk.Label(
+        title_frame,
+        text=f"GALERIE ({len(photos)} photos)",
+        font=('Arial', 18, 'bold'),
+        bg='#34495e',
+        fg='#ecf0f1'
+    ).pack(side=tk.LEFT, padx=20, pady=15)
+    
+
+    tk.Button(
+        title_frame,
+        text="📦 Télécharger ZIP",
+        font=('Arial', 12, 'bold'),
+        bg='#3498db',
+        fg='white',
+        width=16,
+        command=on_download
+    ).pack(side=tk.RIGHT, padx=10, pady=10)
+    tk.Button(
+        title_frame,
+        text="🎞️ Créer Montage",
+        font=('Arial', 12, 'bold'),
+        bg='#9b59b6',
+        fg='white',
+        width=16,
+        command=lambda: [gallery_win.destroy(), on_montage()]
+    ).pack(side=tk.RIGHT, padx=10, pady=10)
+
+    tk.Button(
+        title_frame,
+        text="Fermer",
+        font=('Arial', 12, 'bold'),
+        bg='#e74c3c',
+        fg='white',
+        width=12,
+        command=gallery_win.destroy
+    ).pack(side=tk.RIGHT, padx=20, pady=10)
+    
+    # Frame avec scroll
+    canvas = tk.Canvas(gallery_win, bg='#2c3e50', highlightthickness=0)
+    scrollbar = tk.Scrollbar(gallery_win, orient="vertical", command=canvas.yview, width=25)
+    scrollable_frame = tk.Frame(canvas, bg='#2c3e50')
+    
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+    )
+    
+    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+    canvas.configure(yscrollcommand=scrollbar.set)
+    
+    canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    
+    # Afficher les miniatures (4 par ligne)
+    for idx, photo_path in enumerate(photos):
+        row = idx // 4
+        col = idx % 4
+        
+        frame = tk.Frame(scrollable_frame, bg='#34495e', relief=tk.RAISED, bd=2)
+        frame.grid(row=row, column=col, padx=8, pady=8)
+        
+        try:
+            img = Image.open(photo_path)
+            img.thumbnail((180, 120), Image.Resampling.LANCZOS)
+            photo = ImageTk.PhotoImage(img)
+            
+            btn = tk.Button(
+                frame,
+                image=photo,
+                command=lambda p=photo_path: on_photo(p, gallery_win),
+                cursor="hand2",
+                bg='#34495e'
+            )
+            btn.image = photo
+            btn.pack(padx=3, pady=3)
+            
+            # Nom du fichier
+            filename = photo_path.name[:30] + "..." if len(photo_path.name) > 30 else photo_path.name
+            tk.Label(
+                frame,
+                text=filename,
+                font=('Arial', 8),
+                bg='#34495e',
+                fg='#ecf0f1'
+            ).pack(pady=3)
+        except:
+            pass
+    
+    return gallery_win
+
+
 class photovincAppComplete:
     """Application photovinc complète"""
     
+    # Période de vérification des tâches de fond depuis la boucle Tk (ms)
+    POLL_MS = 30
+    
     def __init__(self, root):
         self.root = root
         self.root.title("photovinc")
@@ -91,7 +204,8 @@ class photovincAppComplete:
         # ✅ NOUVEAU : Compteur avancé avec statistiques
         self.photo_dir = Path.home() / "Photos_photovinc"
         self.photo_dir.mkdir(exist_ok=True)        
-        self.web_server = PhotoWebServer(port=8000)
+        # Mesures des plugins exposées sur /metrics et /metrics.json (depuis la borne uniquement)
+        self.web_server = PhotoWebServer(port=8000, metrics=METRICS)
         
         # Gestionnaire de téléchargement de galerie
         self.gallery_downloader = GalleryDownloader(self.photo_dir, self.web_server)
@@ -109,6 +223,20 @@ class photovincAppComplete:
         self.current_style = "Normal"
         self.is_capturing = False
         self.last_session_photos = []
+        self.qr_display_size = 400
+        
+        # Travaux de fond (photo test, montage, uploads, ZIP, vignettes) hors du thread Tk,
+        # par priorité : le bulk attend la fin des prises de vue
+        self.scheduler = SCHEDULER
+        self.scheduler.start()
+        self.start_zip_cleanup_timer()
+        
+        # Sessions : capture -> import -> style -> vignette/QR -> upload -> impression,
+        # une file et un thread par étape
+        self.current_session = None
+        self.pipeline = SessionPipeline(self.plugin_manager, self.photo_dir)
+        self.pipeline.on_session_ready = lambda session, photos: self.prefetch_session_qr(photos)
+        self.pipeline.start()
         
         # Styles disponibles
         self.styles_list = [
@@ -132,8 +260,8 @@ class photovincAppComplete:
         """Enregistre tous les plugins"""
         register_real_plugins(self.plugin_manager)
         register_real_decorator(self.plugin_manager)
-        register_qr_plugin(self.plugin_manager)
-        register_nextcloud_plugin(self.plugin_manager)
+        self.plugin_manager.register_lazy_plugin("qrcode", "qr_code_plugin", "register_qr_plugin")
+        self.plugin_manager.register_lazy_plugin("nextcloud", "nextcloud_plugin", "register_nextcloud_plugin")
         
         from plugin_manager import PluginConfig
         
@@ -155,7 +283,11 @@ class photovincAppComplete:
         self.show_message("Initialisation...", '#f39c12', 14)
         self.root.update()
         
+        # Historique des durées d'appels (~/.photovinc_metrics.jsonl)
+        METRICS.start_persistence()
+        
         # ✅ CORRECTION: Détection d'imprimante AVANT initialisation des plugins
+        from printer_detection import PrinterIntegration
         self.printer_integration = PrinterIntegration(self.plugin_manager)
         printer_success, printer_msg = self.printer_integration.initialize()
         
@@ -174,6 +306,10 @@ class photovincAppComplete:
         failed = [name for name, success in results.items() if not success]
         if failed:
             print(f"Plugins non initialisés: {', '.join(failed)}")
+        timings = self.plugin_manager.init_timings
+        if timings:
+            slowest = max(timings, key=timings.get)
+            print(f"Plugin le plus lent: {slowest} ({timings[slowest]:.2f}s)")
         
         # Vérifier que le plugin printer utilise la bonne imprimante
         printer_plugin = self.plugin_manager.get_plugin("printer")
@@ -186,6 +322,18 @@ class photovincAppComplete:
         if self.web_server.start():
             print(f"Serveur web démarré: {self.web_server.get_server_url()}")
         
+        # QR codes de partage : liens courts, pré-générés à côté des vignettes
+        qr_plugin = self.plugin_manager.get_plugin("qrcode")
+        if qr_plugin and qr_plugin.is_initialized():
+            qr_plugin.share_tokens = self.web_server.share_tokens
+            qr_plugin.set_cache_dir(self.photo_dir / ".cache" / "qr")
+        
+        # NextCloud (requests) se charge en arrière-plan : reprise des uploads en attente
+        self.plugin_manager.preload_plugins(["nextcloud"])
+        
+        # Vignettes de l'album web préparées entre deux sessions
+        self.scheduler.submit(self.warm_gallery_thumbnails, priority=BULK, name="thumbnails")
+        
         self.show_message("Prêt !", '#2ecc71', 14)
         time.sleep(1)
     
@@ -514,110 +662,10 @@ class photovincAppComplete:
             messagebox.showinfo("Galerie", "Aucune photo dans la galerie")
             return
         
-        gallery_win = tk.Toplevel(self.root)
-        gallery_win.title("Galerie Photos")
-        gallery_win.geometry("900x550")
-        gallery_win.configure(bg='#2c3e50')
-        gallery_win.transient(self.root)
-        
-        # Centrer
-        gallery_win.update_idletasks()
-        x = (gallery_win.winfo_screenwidth() // 2) - 450
-        y = (gallery_win.winfo_screenheight() // 2) - 275
-        gallery_win.geometry(f"900x550+{x}+{y}")
-        
-        # Titre
-        title_frame = tk.Frame(gallery_win, bg='#34495e')
-        title_frame.pack(fill=tk.X)
-        
-        tk.Label(
-            title_frame,
-            text=f"GALERIE ({len(photos)} photos)",
-            font=('Arial', 18, 'bold'),
-            bg='#34495e',
-            fg='#ecf0f1'
-        ).pack(side=tk.LEFT, padx=20, pady=15)
-        
-
-        tk.Button(
-            title_frame,
-            text="📦 Télécharger ZIP",
-            font=('Arial', 12, 'bold'),
-            bg='#3498db',
-            fg='white',
-            width=16,
-            command=self.download_gallery
-        ).pack(side=tk.RIGHT, padx=10, pady=10)
-        tk.Button(
-            title_frame,
-            text="🎞️ Créer Montage",
-            font=('Arial', 12, 'bold'),
-            bg='#9b59b6',
-            fg='white',
-            width=16,
-            command=lambda: [gallery_win.destroy(), self.create_montage_from_selection()]
-        ).pack(side=tk.RIGHT, padx=10, pady=10)
-
-        tk.Button(
-            title_frame,
-            text="Fermer",
-            font=('Arial', 12, 'bold'),
-            bg='#e74c3c',
-            fg='white',
-            width=12,
-            command=gallery_win.destroy
-        ).pack(side=tk.RIGHT, padx=20, pady=10)
-        
-        # Frame avec scroll
-        canvas = tk.Canvas(gallery_win, bg='#2c3e50', highlightthickness=0)
-        scrollbar = tk.Scrollbar(gallery_win, orient="vertical", command=canvas.yview, width=25)
-        scrollable_frame = tk.Frame(canvas, bg='#2c3e50')
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Afficher les miniatures (4 par ligne)
-        for idx, photo_path in enumerate(photos):
-            row = idx // 4
-            col = idx % 4
-            
-            frame = tk.Frame(scrollable_frame, bg='#34495e', relief=tk.RAISED, bd=2)
-            frame.grid(row=row, column=col, padx=8, pady=8)
-            
-            try:
-                img = Image.open(photo_path)
-                img.thumbnail((180, 120), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                
-                btn = tk.Button(
-                    frame,
-                    image=photo,
-                    command=lambda p=photo_path: self.show_photo_actions(p, gallery_win),
-                    cursor="hand2",
-                    bg='#34495e'
-                )
-                btn.image = photo
-                btn.pack(padx=3, pady=3)
-                
-                # Nom du fichier
-                filename = photo_path.name[:30] + "..." if len(photo_path.name) > 30 else photo_path.name
-                tk.Label(
-                    frame,
-                    text=filename,
-                    font=('Arial', 8),
-                    bg='#34495e',
-                    fg='#ecf0f1'
-                ).pack(pady=3)
-            except:
-                pass
+        build_gallery_window(self.root, photos,
+                             on_download=self.download_gallery,
+                             on_montage=self.create_montage_from_selection,
+                             on_photo=self.show_photo_actions)
     
     def create_montage_from_selection(self):
         """Crée un montage à partir de 4 photos sélectionnées dans la galerie"""
@@ -759,7 +807,6 @@ class photovincAppComplete:
                 return
             
             self.show_message("Création du montage...", '#3498db', 16)
-            self.root.update()
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             montage_path = str(self.photo_dir / f"montage_{self.current_style}_{timestamp}.jpg")
@@ -767,8 +814,13 @@ class photovincAppComplete:
             # Convertir Path en str pour les photos
             photos_str = [str(p) for p in selected_photos]
             
-            if decorator.create_film_strip(photos_str, self.current_style, montage_path):
-                messagebox.showinfo("Succès", f"Montage créé !\n{Path(montage_path).name}")
+            def done(success, error):
+                if not success:
+                    self.show_message("Prêt !", '#ecf0f1', 14)
+                    messagebox.showerror("Erreur", "Échec création du montage")
+                    return
+                
+                self.prefetch_share_qr(montage_path)
                 
                 # Afficher le montage
                 try:
@@ -779,10 +831,10 @@ class photovincAppComplete:
                     self.preview_label.image = photo
                 except:
                     pass
-            else:
-                messagebox.showerror("Erreur", "Échec création du montage")
+                messagebox.showinfo("Succès", f"Montage créé !\n{Path(montage_path).name}")
             
-            self.show_message("Prêt !", '#ecf0f1', 14)
+            self.run_in_background(decorator.create_film_strip, photos_str, self.current_style,
+                                   montage_path, callback=done)
         
         create_btn.config(command=create_montage)
     
@@ -857,28 +909,14 @@ class photovincAppComplete:
             command=actions_win.destroy
         ).pack(pady=5)
     
-    def print_photo_from_gallery(self, photo_path):
+    def print_photo_from_gallery(self, photo_path, session=None):
         """Imprime une photo depuis la galerie - ✅ SUPPORT IPP + USB"""
         printer = self.plugin_manager.get_plugin("printer")
-        if printer and printer.is_initialized():
-            success = False
-            
-            # ✅ SMART: Utiliser IPP si réseau, sinon USB classique
-            if hasattr(self, 'printer_integration') and self.printer_integration.selected_printer:
-                ipp_printer = self.printer_integration.selected_printer.ipp_printer
-                
-                if ipp_printer:
-                    # Imprimante réseau IPP/IPPS
-                    print(f"🌐 Impression IPP (réseau): {photo_path}")
-                    success = ipp_printer.print_image(str(photo_path))
-                else:
-                    # Imprimante USB ou autre (méthode classique)
-                    print(f"🖨️  Impression USB/classique: {photo_path}")
-                    success = printer.print_image(str(photo_path))
-            else:
-                # Pas d'intégration, méthode classique
-                success = printer.print_image(str(photo_path))
-            
+        if not printer or not printer.is_initialized():
+            messagebox.showerror("Erreur", "Imprimante non disponible")
+            return
+        
+        def done(success, error):
             if success:
                 # ✅ INCRÉMENTER LE COMPTEUR D'IMPRESSIONS
                 self.print_counter.increment_print()
@@ -888,9 +926,20 @@ class photovincAppComplete:
                 
                 messagebox.showinfo("Succès", "Photo envoyée à l'imprimante")
             else:
-                messagebox.showerror("Erreur", "Échec d'impression")
-        else:
-            messagebox.showerror("Erreur", "Imprimante non disponible")
+                messagebox.showerror("Erreur", f"Échec d'impression{f': {error}' if error else ''}")
+        
+        target, method = self._print_target(printer)
+        print(f"🖨️  Impression {method}: {photo_path}")
+        self.watch_future(self.pipeline.print(target, photo_path, session), done)
+    
+    def _print_target(self, printer):
+        """Imprimante à utiliser et méthode : ✅ SMART IPP si réseau, sinon USB classique"""
+        if self.printer_integration and self.printer_integration.selected_printer:
+            ipp_printer = self.printer_integration.selected_printer.ipp_printer
+            if ipp_printer:
+                return ipp_printer, "IPP (réseau)"
+            return printer, "USB/classique"
+        return printer, "classique"
     
     def delete_photo(self, photo_path, actions_win, gallery_win):
         """Supprime une photo"""
@@ -967,9 +1016,33 @@ class photovincAppComplete:
             command=qr_select_win.destroy
         ).pack(pady=10)
     
+    def prefetch_share_qr(self, photo_path):
+        """Pré-génère en arrière-plan le QR code de partage d'une photo"""
+        qr_plugin = self.plugin_manager.get_plugin("qrcode")
+        if qr_plugin and qr_plugin.is_initialized():
+            qr_plugin.server_url = self.web_server.get_server_url()
+            qr_plugin.prefetch_qr(qr_plugin.get_photo_url(photo_path), size=self.qr_display_size)
+    
     def generate_qr_for_photo(self, photo_path):
         """Génère et affiche un QR code pour une photo"""
+        self.show_share_qr(photo_path=photo_path)
+    
+    def show_session_qr(self, photos=None):
+        """Affiche le QR code unique de l'album de la session"""
+        self.show_share_qr(session_photos=photos or self.last_session_photos)
+    
+    def prefetch_session_qr(self, photos):
+        """Pré-génère en arrière-plan le QR code de l'album de la session"""
         qr_plugin = self.plugin_manager.get_plugin("qrcode")
+        if qr_plugin and qr_plugin.is_initialized() and photos:
+            url = self.web_server.get_share_url('session', photos)
+            qr_plugin.prefetch_qr(url, size=self.qr_display_size)
+    
+    def show_share_qr(self, photo_path=None, session_photos=None):
+        """Affiche en plein écran le QR code d'une photo ou d'un album de session"""
+        qr_plugin = self.plugin_manager.get_plugin("qrcode", wait=False)
+        if qr_plugin is None and self.plugin_still_loading("qrcode", "QR Code"):
+            return
         
         if not qr_plugin or not qr_plugin.is_initialized():
             messagebox.showerror("Erreur", "Plugin QR Code non disponible\nInstallez: pip install qrcode[pil]")
@@ -978,11 +1051,14 @@ class photovincAppComplete:
         # Mettre à jour l'URL du serveur
         qr_plugin.server_url = self.web_server.get_server_url()
         
-        # Générer le QR code
-        qr_output = str(Path(photo_path).parent / "temp_qr.png")
-        qr_path = qr_plugin.generate_qr_for_photo(str(photo_path), qr_output)
+        # QR code pré-généré à la capture (sinon rendu en mémoire à la taille d'affichage)
+        if session_photos:
+            url = self.web_server.get_share_url('session', session_photos)
+        else:
+            url = qr_plugin.get_photo_url(photo_path)
+        qr_img = qr_plugin.render_qr(url, size=self.qr_display_size)
         
-        if not qr_path or not os.path.exists(qr_path):
+        if qr_img is None:
             messagebox.showerror("Erreur", "Impossible de générer le QR code")
             return
         
@@ -1001,7 +1077,7 @@ class photovincAppComplete:
             fg='white',
             width=12,
             height=2,
-            command=lambda: [os.remove(qr_path), qr_win.destroy()]
+            command=qr_win.destroy
         )
         close_btn.place(x=850, y=20)
         
@@ -1016,8 +1092,6 @@ class photovincAppComplete:
         
         # Afficher le QR code
         try:
-            qr_img = Image.open(qr_path)
-            qr_img = qr_img.resize((400, 400), Image.Resampling.LANCZOS)
             qr_photo = ImageTk.PhotoImage(qr_img)
             
             qr_label = tk.Label(qr_win, image=qr_photo, bg='white')
@@ -1033,7 +1107,6 @@ class photovincAppComplete:
             ).pack(pady=20)
         
         # URL à afficher
-        url = qr_plugin.get_photo_url(photo_path)
         tk.Label(
             qr_win,
             text=f"URL: {url}",
@@ -1045,7 +1118,8 @@ class photovincAppComplete:
         # Instructions
         instructions = tk.Label(
             qr_win,
-            text="Ouvrez l'appareil photo de votre smartphone\net pointez-le vers ce QR code",
+            text=("Ouvrez l'appareil photo de votre smartphone\net pointez-le vers ce QR code"
+                  + ("\n\nToutes les photos de la session sur une seule page" if session_photos else "")),
             font=('Arial', 14),
             bg='white',
             fg='#34495e',
@@ -1137,12 +1211,23 @@ class photovincAppComplete:
     
     def show_wifi_config(self):
         """Affiche la configuration WiFi"""
+        from wifi_config_ui import WiFiConfigDialog
         wifi_dialog = WiFiConfigDialog(self.root)
         wifi_dialog.show_config_dialog()
     
+    def plugin_still_loading(self, plugin_type, label, parent=None):
+        """Prévient l'invité si un plugin différé n'est pas encore prêt (thread Tk)"""
+        if not self.plugin_manager.is_loading(plugin_type):
+            return False
+        messagebox.showinfo(label, f"{label} est en cours de chargement,\nréessayez dans un instant",
+                            parent=parent or self.root)
+        return True
+    
     def show_nextcloud_menu(self):
         """Affiche le menu NextCloud"""
-        nextcloud = self.plugin_manager.get_plugin("nextcloud")
+        nextcloud = self.plugin_manager.get_plugin("nextcloud", wait=False)
+        if nextcloud is None and self.plugin_still_loading("nextcloud", "NextCloud"):
+            return
         
         if not nextcloud:
             messagebox.showerror("Erreur", "Plugin NextCloud non disponible\nInstallez: pip install requests")
@@ -1232,6 +1317,18 @@ class photovincAppComplete:
                 command=lambda: [menu_win.destroy(), self.upload_to_nextcloud()]
             ).pack(pady=8)
         
+        if status['connected']:
+            tk.Button(
+                btn_frame,
+                text="Synchroniser la galerie",
+                font=('Arial', 12, 'bold'),
+                bg='#16a085',
+                fg='white',
+                width=20,
+                height=2,
+                command=lambda: [menu_win.destroy(), self.sync_gallery_to_nextcloud()]
+            ).pack(pady=8)
+        
         tk.Button(
             btn_frame,
             text="Fermer",
@@ -1241,18 +1338,52 @@ class photovincAppComplete:
             width=20,
             command=menu_win.destroy
         ).pack(pady=8)
+    
+    def sync_gallery_to_nextcloud(self):
+        """Envoie vers NextCloud les photos nouvelles ou modifiées de la galerie"""
+        nextcloud = self.plugin_manager.get_plugin("nextcloud", wait=False)
+        if nextcloud is None and self.plugin_still_loading("nextcloud", "NextCloud"):
+            return
+        
+        if not nextcloud or not nextcloud.connected:
+            messagebox.showwarning("Non connecté", "NextCloud n'est pas connecté")
+            return
+        
+        self.show_message("Synchronisation NextCloud...", '#3498db', 16)
+        
+        # PROPFIND et mise en file hors du thread Tk
+        def done(result, error):
+            if not self.is_capturing:
+                self.show_message("Prêt !", '#ecf0f1', 14)
+            if error:
+                messagebox.showerror("Erreur", f"Synchronisation impossible: {error}")
+                return
+            messagebox.showinfo(
+                "Synchronisation",
+                f"{result['total']} photo(s) dans la galerie\n"
+                f"{result['up_to_date']} déjà sur NextCloud\n"
+                f"{result['queued']} en cours d'envoi"
+            )
+        
+        self.run_in_background(nextcloud.sync_gallery, self.photo_dir, callback=done,
+                               priority=NEAR_TERM)
 
     def show_nextcloud_config(self):
         """Affiche la configuration NextCloud"""
-        nextcloud = self.plugin_manager.get_plugin("nextcloud")
+        nextcloud = self.plugin_manager.get_plugin("nextcloud", wait=False)
+        if nextcloud is None and self.plugin_still_loading("nextcloud", "NextCloud"):
+            return
         if nextcloud:
+            from nextcloud_ui import NextCloudConfigUI
             NextCloudConfigUI(self.root, nextcloud)
         else:
             messagebox.showerror("Erreur", "Plugin NextCloud non disponible")
     
     def upload_to_nextcloud(self):
         """Upload les photos vers NextCloud"""
-        nextcloud = self.plugin_manager.get_plugin("nextcloud")
+        nextcloud = self.plugin_manager.get_plugin("nextcloud", wait=False)
+        if nextcloud is None and self.plugin_still_loading("nextcloud", "NextCloud"):
+            return
         
         if not nextcloud or not nextcloud.connected:
             messagebox.showwarning("Non connecté", "NextCloud n'est pas connecté")
@@ -1293,37 +1424,41 @@ class photovincAppComplete:
         )
         progress_label.pack(pady=10)
         
-        progress_win.update()
-        
-        # Upload des photos
-        success_count = 0
-        total = len(self.last_session_photos)
-        
-        for idx, photo in enumerate(self.last_session_photos, 1):
-            progress_label.config(text=f"{idx} / {total}")
-            progress_win.update()
-            
-            if nextcloud.upload_file(photo):
-                success_count += 1
+        # Upload des photos : un travail near_term par photo, hors du thread Tk
+        photos = list(self.last_session_photos)
+        total = len(photos)
+        results = []
+        progress_label.config(text=f"0 / {total}")
+        
+        def show_result(success_count):
+            if success_count == total:
+                messagebox.showinfo(
+                    "Succès",
+                    f"Toutes les photos ont été uploadées !\n{success_count}/{total}"
+                )
+            elif success_count > 0:
+                messagebox.showwarning(
+                    "Partiel",
+                    f"{success_count}/{total} photos uploadées"
+                )
+            else:
+                messagebox.showerror(
+                    "Échec",
+                    "Aucune photo n'a pu être uploadée"
+                )
         
-        progress_win.destroy()
+        def uploaded(success, error):
+            results.append(bool(success))
+            if len(results) < total:
+                if progress_win.winfo_exists():
+                    progress_label.config(text=f"{len(results)} / {total}")
+                return
+            if progress_win.winfo_exists():
+                progress_win.destroy()
+            show_result(sum(results))
         
-        # Résultat
-        if success_count == total:
-            messagebox.showinfo(
-                "Succès",
-                f"Toutes les photos ont été uploadées !\n{success_count}/{total}"
-            )
-        elif success_count > 0:
-            messagebox.showwarning(
-                "Partiel",
-                f"{success_count}/{total} photos uploadées"
-            )
-        else:
-            messagebox.showerror(
-                "Échec",
-                "Aucune photo n'a pu être uploadée"
-            )
+        for photo in photos:
+            self.run_in_background(nextcloud.upload_file, photo, callback=uploaded, priority=NEAR_TERM)
     
 
     
@@ -1505,6 +1640,7 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
     
     def show_counter_dialog(self, event=None):
         """✅ NOUVEAU : Dialogue compteur avancé avec interface corrigée"""
+        from print_counter_ui import show_print_counter_dialog
         show_print_counter_dialog(self.root, self.print_counter)
         
         # Mettre à jour les affichages après fermeture
@@ -1521,13 +1657,16 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
         if printer and printer.is_initialized():
             if messagebox.askyesno("Reset", "Réinitialiser l'imprimante ?"):
                 self.show_message("Reset...", '#e67e22', 16)
-                self.root.update()
-                if printer.reset_printer():
-                    messagebox.showinfo("Succès", "Imprimante réinitialisée")
-                    self.update_printer_status()
-                else:
-                    messagebox.showerror("Erreur", "Échec reset")
-                self.show_message("Prêt !", '#ecf0f1', 14)
+                
+                def done(success, error):
+                    self.show_message("Prêt !", '#ecf0f1', 14)
+                    if success:
+                        messagebox.showinfo("Succès", "Imprimante réinitialisée")
+                        self.update_printer_status()
+                    else:
+                        messagebox.showerror("Erreur", "Échec reset")
+                
+                self.run_in_background(printer.reset_printer, callback=done)
     
     def show_message(self, text, color='#ecf0f1', size=14, timeout=None):
         """Affiche un message"""
@@ -1543,6 +1682,71 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             self.root.after(timeout * 1000, 
                           lambda: self.show_message("Prêt !", '#ecf0f1', 14))
     
+    def warm_gallery_thumbnails(self):
+        """Génère les vignettes manquantes de la galerie (travail bulk, s'efface devant les prises de vue)"""
+        count = 0
+        for photo in sorted(self.photo_dir.glob("*.jpg"), reverse=True):
+            checkpoint()
+            try:
+                get_thumbnail(self.photo_dir, photo.name)
+                count += 1
+            except Exception as e:
+                print(f"Erreur vignette {photo.name}: {e}")
+        return count
+    
+    def run_in_background(self, func, *args, callback=None, priority=INTERACTIVE):
+        """Exécute func(*args) hors du thread Tk, via le planificateur
+        
+        callback(résultat, erreur) est ensuite appelé dans le thread Tk : la
+        fin de la tâche est surveillée par after(), sans jamais bloquer la boucle.
+        """
+        future = self.scheduler.submit(func, *args, priority=priority)
+        self.watch_future(future, callback)
+        return future
+    
+    def watch_future(self, future, callback=None):
+        """Appelle callback(résultat, erreur) dans le thread Tk quand future est terminé"""
+        def check():
+            if not future.done():
+                self.root.after(self.POLL_MS, check)
+                return
+            error = future.exception()
+            if error:
+                print(f"Erreur tâche de fond: {error}")
+            if callback:
+                callback(None if error else future.result(), error)
+        
+        self.root.after(self.POLL_MS, check)
+    
+    def watch_futures(self, futures, callback):
+        """Appelle callback(futures) dans le thread Tk quand tous les futures sont terminés"""
+        def check():
+            _, pending = wait(futures, timeout=0)
+            if pending:
+                self.root.after(self.POLL_MS, check)
+                return
+            callback(futures)
+        
+        self.root.after(self.POLL_MS, check)
+    
+    def start_countdown(self, title, on_done, seconds=3):
+        """Compte à rebours piloté par after() puis on_done() sur « CLIC! »"""
+        def tick(remaining):
+            if remaining > 0:
+                self.show_message(f"{title}\n\n{remaining}...", '#f39c12', 32)
+                self.root.after(1000, tick, remaining - 1)
+            else:
+                self.show_message(f"{title}\n\nCLIC!", '#2ecc71', 28)
+                on_done()
+        
+        tick(seconds)
+    
+    def _begin_capture(self):
+        """Verrouille les boutons de prise de vue (évite les clics pendant une session)"""
+        self.is_capturing = True
+        self.scheduler.hold_bulk('capture')
+        self.start_btn.config(state=tk.DISABLED, bg='#95a5a6')
+    
     def test_photo(self):
         """Test photo avec compte à rebours de 3 secondes"""
         if self.is_capturing:
@@ -1552,29 +1756,35 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
         if not camera or not camera.is_initialized():
             messagebox.showerror("Erreur", "Caméra non disponible")
             return
-    
-        # Compte à rebours de 3 secondes
-        for i in range(3, 0, -1):
-            self.show_message(f"Test photo\n\n{i}...", '#f39c12', 32)
-            self.root.update()
-            time.sleep(1)
-    
-        self.show_message("Test photo\n\nCLIC!", '#2ecc71', 28)
-        self.root.update()
-    
+        
+        self._begin_capture()
         temp_path = "/tmp/test_photo.jpg"
-        success = camera.capture_image(temp_path)
-    
-        if success and os.path.exists(temp_path):
+        
+        def capture_and_load():
+            # Capture, décodage et réduction dans le thread de capture
+            if not camera.capture_image(temp_path) or not os.path.exists(temp_path):
+                return None
             try:
                 img = Image.open(temp_path)
+                img.draft('RGB', (1500, 1000))
+                img = img.convert('RGB')
                 img.thumbnail((750, 500), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.preview_label.config(image=photo, text="")
-                self.preview_label.image = photo
+                return img
+            finally:
                 os.remove(temp_path)
-            except Exception as e:
-                self.show_message("Erreur affichage", '#e74c3c', 14)
+        
+        def done(img, error):
+            self.is_capturing = False
+            self.scheduler.release_bulk('capture')
+            self.start_btn.config(state=tk.NORMAL, bg='#27ae60')
+            if img is None:
+                self.show_message("Erreur affichage" if error else "Échec capture", '#e74c3c', 14)
+                return
+            photo = ImageTk.PhotoImage(img)
+            self.preview_label.config(image=photo, text="")
+            self.preview_label.image = photo
+        
+        self.start_countdown("Test photo", lambda: self.run_in_background(capture_and_load, callback=done))
         
     def take_four_photos(self):
         """Prend jusqu'à 4 photos avec validation après chaque prise"""
@@ -1588,98 +1798,96 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             messagebox.showerror("Erreur", "Caméra non disponible")
             return
         
-        self.is_capturing = True
-        self.start_btn.config(state=tk.DISABLED, bg='#95a5a6')
+        self._begin_capture()
+        self.current_session = self.pipeline.new_session(self.current_style, decorator)
+        self._capture_next_photo(self.current_session, camera)
+    
+    def _capture_next_photo(self, session, camera):
+        """Compte à rebours puis capture de la photo suivante par le pipeline"""
+        photo_num = session.expected + 1
+        if photo_num > 4:
+            self._process_session(session)
+            return
         
-        captured_photos = []
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        temp_file = f"/tmp/photo_{session.id}_{photo_num}.jpg"
         
-        photo_num = 1
-        while photo_num <= 4:
-            # Compte à rebours
-            for i in range(3, 0, -1):
-                self.show_message(f"Photo {photo_num}/4\n\n{i}...", '#f39c12', 32)
-                self.root.update()
-                time.sleep(1)
-            
-            self.show_message(f"Photo {photo_num}/4\n\nCLIC!", '#2ecc71', 28)
-            self.root.update()
-            
-            temp_file = f"/tmp/photo_{timestamp}_{photo_num}.jpg"
-            success = camera.capture_image(temp_file)
-            
-            if success and os.path.exists(temp_file):
-                # Afficher la photo en plein écran avec validation
-                keep_photo = self.show_photo_validation(temp_file, photo_num, len(captured_photos))
-                
-                if keep_photo is None:
-                    # L'utilisateur a annulé la session
-                    for temp in captured_photos:
-                        try:
-                            os.remove(temp)
-                        except:
-                            pass
-                    self.show_message("Session annulée", '#e67e22', 14)
-                    self.reset_session()
-                    return
-                elif keep_photo:
-                    # Photo conservée
-                    captured_photos.append(temp_file)
-                    photo_num += 1
-                else:
-                    # Photo supprimée, on la refait
-                    try:
-                        os.remove(temp_file)
-                    except:
-                        pass
-                    # On ne change pas photo_num pour refaire la même
-            else:
-                messagebox.showerror("Erreur", f"Échec capture photo {photo_num}")
-                break
+        def capture():
+            self.watch_future(
+                self.pipeline.capture(session, camera, temp_file),
+                lambda success, error: self._on_photo_captured(session, camera, photo_num, temp_file, success)
+            )
         
-        # ✅ CORRECTION : Sauvegarder les photos même si < 4
-        if len(captured_photos) >= 1:
-            self.show_message("Traitement...", '#3498db', 16)
-            self.root.update()
-            
-            self.last_session_photos = []
-            
-            # ✅ ENREGISTRER LA SESSION DANS LE COMPTEUR
-            self.print_counter.increment_session(len(captured_photos), self.current_style)
-            self.update_counter_display()
-            
-            # Appliquer le style et sauvegarder
-            for i, photo_path in enumerate(captured_photos):
-                output_path = str(self.photo_dir / f"photo_{self.current_style}_{timestamp}_{i+1}.jpg")
-                if decorator and decorator.is_initialized():
-                    if decorator.apply_style(photo_path, self.current_style, output_path):
-                        self.last_session_photos.append(output_path)
-                else:
-                    # Copier sans style
-                    import shutil
-                    shutil.copy(photo_path, output_path)
-                    self.last_session_photos.append(output_path)
-            
-            # Supprimer les fichiers temporaires
-            for temp_file in captured_photos:
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
-            
-            # Upload auto vers NextCloud si configuré
-            self.auto_upload_to_nextcloud()
-            
-            # Afficher le message approprié
-            if len(captured_photos) == 4:
-                self.show_print_selection()
-            else:
-                msg = f"{len(captured_photos)} photo(s) sauvegardée(s) !"
-                self.show_message(msg, '#2ecc71', 16, timeout=3)
-                self.root.after(3000, self.show_print_selection)
+        self.start_countdown(f"Photo {photo_num}/4", capture)
+    
+    def _on_photo_captured(self, session, camera, photo_num, temp_file, success):
+        """Validation de la photo capturée (thread Tk)"""
+        if not success or not os.path.exists(temp_file):
+            messagebox.showerror("Erreur", f"Échec capture photo {photo_num}")
+            self._process_session(session)
+            return
+        
+        # Afficher la photo en plein écran avec validation
+        keep_photo = self.show_photo_validation(temp_file, photo_num, session.expected)
+        
+        if keep_photo is None:
+            # L'utilisateur a annulé la session : le pipeline supprime ce qui a été produit
+            try:
+                os.remove(temp_file)
+            except:
+                pass
+            self.pipeline.cancel(session)
+            self.current_session = None
+            self.show_message("Session annulée", '#e67e22', 14)
+            self.reset_session()
+            return
+        elif keep_photo:
+            # Photo conservée : import, style et vignette pendant la photo suivante
+            self.pipeline.ingest(session, temp_file)
         else:
+            # Photo supprimée, on la refait
+            try:
+                os.remove(temp_file)
+            except:
+                pass
+        
+        self._capture_next_photo(session, camera)
+    
+    def _process_session(self, session):
+        """Fin des prises de vue : attend la fin du style des photos gardées"""
+        # ✅ CORRECTION : Sauvegarder les photos même si < 4
+        if not session.expected:
+            self.pipeline.cancel(session)
+            self.current_session = None
             self.show_message("Aucune photo capturée", '#e74c3c', 14)
             self.reset_session()
+            return
+        
+        self.show_message("Traitement...", '#3498db', 16)
+        
+        # ✅ ENREGISTRER LA SESSION DANS LE COMPTEUR
+        self.print_counter.increment_session(session.expected, session.style)
+        self.update_counter_display()
+        
+        self.pipeline.close(session)
+        self.watch_future(session.ready,
+                          lambda saved, error: self._on_session_processed(session, saved, error))
+    
+    def _on_session_processed(self, session, saved, error):
+        """Photos stylisées, vignettes et QR prêts (thread Tk) ; l'upload suit seul"""
+        if error or not saved:
+            messagebox.showerror("Erreur", f"Traitement des photos impossible{f': {error}' if error else ''}")
+            self.reset_session()
+            return
+        
+        self.last_session_photos = saved
+        
+        # Afficher le message approprié
+        if session.expected == 4:
+            self.show_print_selection()
+        else:
+            msg = f"{session.expected} photo(s) sauvegardée(s) !"
+            self.show_message(msg, '#2ecc71', 16, timeout=3)
+            self.root.after(3000, self.show_print_selection)
     
     def show_photo_validation(self, photo_path, photo_num, photos_captured=0):
         """Affiche la photo en plein écran avec boutons Enregistrer/Supprimer/Annuler"""
@@ -1933,14 +2141,14 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             photo = selected_photo.get()
             if photo:
                 selection_win.destroy()
-                self.print_photo_from_gallery(photo)
+                self.print_photo_from_gallery(photo, session=self.current_session)
                 self.reset_session()
         
         def qr_selected():
-            photo = selected_photo.get()
-            if photo:
+            # Un seul QR code pour toutes les photos de la session
+            if self.last_session_photos:
                 selection_win.destroy()
-                self.generate_qr_for_photo(photo)
+                self.show_session_qr()
                 self.reset_session()
         
         def print_all():
@@ -1948,43 +2156,31 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
                 selection_win.destroy()
                 printer = self.plugin_manager.get_plugin("printer")
                 if printer and printer.is_initialized():
-                    success_count = 0
-                    
-                    # ✅ SMART: Détecter le type d'imprimante
-                    use_ipp = False
-                    ipp_printer = None
-                    print_method = "classique"
+                    target, print_method = self._print_target(printer)
+                    print(f"🖨️  Impression {print_method} batch de {len(self.last_session_photos)} photos")
                     
-                    if hasattr(self, 'printer_integration') and self.printer_integration.selected_printer:
-                        ipp_printer = self.printer_integration.selected_printer.ipp_printer
-                        use_ipp = ipp_printer is not None
-                        
-                        if use_ipp:
-                            print_method = "IPP (réseau)"
-                            print(f"🌐 Impression IPP batch de {len(self.last_session_photos)} photos")
-                        else:
-                            print_method = "USB/classique"
-                            print(f"🖨️  Impression USB batch de {len(self.last_session_photos)} photos")
+                    # 2 s entre deux jobs pour l'imprimante
+                    futures = [self.pipeline.print(target, photo, self.current_session, pause=2)
+                               for photo in self.last_session_photos]
                     
-                    for photo in self.last_session_photos:
-                        if use_ipp:
-                            # Imprimante réseau IPP
-                            success = ipp_printer.print_image(str(photo))
-                        else:
-                            # Imprimante USB ou autre (méthode classique)
-                            success = printer.print_image(str(photo))
-                        
-                        if success:
+                    def done(futures):
+                        success_count = sum(1 for f in futures
+                                            if not f.cancelled() and not f.exception() and f.result())
+                        for _ in range(success_count):
                             self.print_counter.increment_print()
-                            success_count += 1
-                        time.sleep(2)
-                    
-                    self.update_counter_display()
-                    messagebox.showinfo("Succès", f"{success_count} photos imprimées !\nMéthode: {print_method}")
+                        self.update_counter_display()
+                        if not self.is_capturing:
+                            self.show_message("Prêt !", '#ecf0f1', 14)
+                        messagebox.showinfo("Succès", f"{success_count} photos imprimées !\nMéthode: {print_method}")
                     
+                    self.watch_futures(futures, done)
                 else:
                     messagebox.showerror("Erreur", "Imprimante non disponible")
+                
+                # L'impression continue en arrière-plan : une nouvelle session peut commencer
                 self.reset_session()
+                if printer and printer.is_initialized():
+                    self.show_message("Impression...", '#3498db', 16)
         
         tk.Button(btn_container, text="🖨️ IMPRIMER", font=('Arial', 18, 'bold'), bg='#27ae60', fg='white', width=18, height=2, command=print_selected).pack(side=tk.LEFT, padx=10)
         tk.Button(btn_container, text="📱 QR CODE", font=('Arial', 18, 'bold'), bg='#9b59b6', fg='white', width=18, height=2, command=qr_selected).pack(side=tk.LEFT, padx=10)
@@ -1997,25 +2193,15 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
     
     def reset_session(self):
         """Reset session"""
+        # La trace de la session est émise quand ses derniers travaux sont finis
+        if self.current_session:
+            self.pipeline.release(self.current_session)
+            self.current_session = None
         self.is_capturing = False
+        self.scheduler.release_bulk('capture')
         self.start_btn.config(state=tk.NORMAL, bg='#27ae60')
         self.show_message("Prêt !", '#ecf0f1', 14)
     
-    def auto_upload_to_nextcloud(self):
-        """Upload automatique vers NextCloud si activé"""
-        try:
-            nextcloud = self.plugin_manager.get_plugin("nextcloud")
-            if nextcloud and nextcloud.connected and nextcloud.auto_upload:
-                if self.last_session_photos:
-                    for photo in self.last_session_photos:
-                        nextcloud.upload_file(photo)
-                    print(f"Auto-upload NextCloud: {len(self.last_session_photos)} photos")
-        except Exception as e:
-            print(f"Erreur auto-upload NextCloud: {e}")
-    
-
-
-
     def show_zip_cleanup_settings(self):
         """Affiche les paramètres de nettoyage des ZIP"""
         settings_win = tk.Toplevel(self.root)
@@ -2141,18 +2327,11 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             )
 
     def start_zip_cleanup_timer(self):
-        """Démarre le nettoyage périodique des ZIP expirés"""
-        def cleanup_task():
-            try:
-                self.gallery_downloader.cleanup_expired_zips()
-            except Exception as e:
-                print(f"Erreur nettoyage ZIP: {e}")
-            
-            # Répéter toutes les 10 minutes (600000 ms)
-            self.root.after(600000, cleanup_task)
-        
-        # Premier nettoyage après 10 minutes
-        self.root.after(600000, cleanup_task)
+        """Démarre le nettoyage périodique des ZIP expirés (travail bulk toutes les 10 minutes)"""
+        self.zip_cleanup_job = self.scheduler.every(
+            600, self.gallery_downloader.cleanup_expired_zips,
+            priority=BULK, name="zip-cleanup"
+        )
 
     def download_gallery(self):
         """Télécharge toutes les photos en ZIP avec option QR code"""
@@ -2203,18 +2382,19 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             fg='#2ecc71'
         ).pack(pady=8)
         
-        progress_win.update()
-        
-        # Créer l'archive
-        zip_path = self.gallery_downloader.create_zip_archive()
-        
-        progress_win.destroy()
+        # Créer l'archive en near_term : l'invité attend devant la fenêtre de
+        # progression, elle ne doit pas passer après les vignettes ni la prise de vue
+        def done(zip_path, error):
+            progress_win.destroy()
+            
+            if zip_path and zip_path.exists():
+                # ✅ NOUVEAU : Afficher les options avec QR code
+                self.show_zip_download_options(zip_path, stats)
+            else:
+                messagebox.showerror("Erreur", "Impossible de créer l'archive")
         
-        if zip_path and zip_path.exists():
-            # ✅ NOUVEAU : Afficher les options avec QR code
-            self.show_zip_download_options(zip_path, stats)
-        else:
-            messagebox.showerror("Erreur", "Impossible de créer l'archive")
+        self.run_in_background(self.gallery_downloader.create_zip_archive, callback=done,
+                               priority=NEAR_TERM)
 
 
     def show_zip_download_options(self, zip_path, stats):
@@ -2285,7 +2465,9 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
         
         def show_qr():
             """Affiche le QR code pour téléchargement mobile"""
-            qr_plugin = self.plugin_manager.get_plugin("qrcode")
+            qr_plugin = self.plugin_manager.get_plugin("qrcode", wait=False)
+            if qr_plugin is None and self.plugin_still_loading("qrcode", "QR Code", parent=options_win):
+                return
             
             if not qr_plugin or not qr_plugin.is_initialized():
                 messagebox.showerror("Erreur", "Plugin QR Code non disponible\nInstallez: pip install qrcode[pil]", parent=options_win)
@@ -2297,18 +2479,11 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
                 messagebox.showerror("Erreur", "Impossible de générer le QR code", parent=options_win)
                 return
             
-            # result est un tuple (qr_path, download_url)
-            qr_path, download_url = result
+            # result est un tuple (image du QR code, download_url)
+            qr_image, download_url = result
             
-            # Vérifier que qr_path est une chaîne valide
-            if not qr_path or not isinstance(qr_path, (str, Path)):
-                messagebox.showerror("Erreur", "QR code invalide", parent=options_win)
-                return
-            
-            # Convertir en Path et vérifier l'existence
-            qr_path_obj = Path(str(qr_path))
-            if not qr_path_obj.exists():
-                messagebox.showerror("Erreur", "QR code introuvable", parent=options_win)
+            if qr_image is None:
+                messagebox.showerror("Erreur", "Impossible de générer le QR code", parent=options_win)
                 return
             
             options_win.destroy()
@@ -2320,13 +2495,6 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             qr_win.attributes('-fullscreen', True)
             
             # Bouton FERMER
-            def cleanup_and_close():
-                try:
-                    Path(qr_path).unlink()
-                except:
-                    pass
-                qr_win.destroy()
-            
             close_btn = tk.Button(
                 qr_win,
                 text="✕ FERMER",
@@ -2335,7 +2503,7 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
                 fg='white',
                 width=12,
                 height=2,
-                command=cleanup_and_close
+                command=qr_win.destroy
             )
             close_btn.place(x=850, y=20)
             
@@ -2350,9 +2518,7 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
             
             # QR Code
             try:
-                qr_img = Image.open(qr_path)
-                qr_img = qr_img.resize((400, 400), Image.Resampling.LANCZOS)
-                qr_photo = ImageTk.PhotoImage(qr_img)
+                qr_photo = ImageTk.PhotoImage(qr_image)
                 
                 qr_label = tk.Label(qr_win, image=qr_photo, bg='white')
                 qr_label.image = qr_photo
@@ -2435,13 +2601,17 @@ Max: {profile.get('max_width', 'N/A')}x{profile.get('max_height', 'N/A')}mm
         ).pack(pady=8)
         
         # Nettoyer les anciennes archives
-        self.gallery_downloader.clean_old_exports(keep_last=3)
+        self.scheduler.submit(self.gallery_downloader.clean_old_exports, keep_last=3,
+                              priority=BULK, name="clean-exports")
 
     def quit_app(self):
         """Quitte"""
         if messagebox.askyesno("Quitter", "Voulez-vous vraiment quitter ?"):
             self.web_server.stop()
+            self.scheduler.stop(timeout=1)
+            self.pipeline.stop()
             self.plugin_manager.shutdown_all()
+            METRICS.stop_persistence()
             self.root.quit()
 
 
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Planificateur des travaux de fond de photovinc
+Trois classes de priorité, chacune avec son groupe de threads borné :
+interactive (l'invité attend), near_term (utile bientôt) et bulk (vignettes,
+exports, nettoyages). Les travaux bulk sont mis de côté pendant une prise
+de vue et s'interrompent à leurs points de contrôle.
+"""
+
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Callable
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+NEAR_TERM = 'near_term'
+BULK = 'bulk'
+PRIORITIES = (INTERACTIVE, NEAR_TERM, BULK)
+
+# Threads par classe : le bulk reste sur un seul cœur du Raspberry Pi
+DEFAULT_WORKERS = {INTERACTIVE: 2, NEAR_TERM: 2, BULK: 1}
+
+_current = threading.local()
+
+
+class JobCancelled(Exception):
+    """Levée par checkpoint() dans un travail annulé"""
+
+
+class Job:
+    """Un travail soumis au planificateur"""
+    
+    def __init__(self, func: Callable, args, kwargs, priority: str, name: str,
+                 run_at: float, interval: Optional[float] = None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.name = name
+        self.run_at = run_at
+        self.interval = interval
+        self.runs = 0
+        self.cancelled = False
+        # Un seul résultat pour un travail ponctuel ; un travail périodique n'en a pas
+        self.future: Optional[Future] = None if interval else Future()
+    
+    def cancel(self):
+        """Annule le travail : retiré s'il attend, interrompu au prochain checkpoint() sinon"""
+        self.cancelled = True
+        if self.future:
+            self.future.cancel()
+
+
+class JobScheduler:
+    """Files de travaux par priorité, servies par des threads bornés"""
+    
+    def __init__(self, workers: Optional[Dict[str, int]] = None):
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self._queues: Dict[str, List] = {priority: [] for priority in PRIORITIES}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._running = False
+        # Raisons pour lesquelles le bulk attend (ex. « capture »)
+        self._holds = set()
+        self._stats = {priority: {'done': 0, 'failed': 0, 'cancelled': 0, 'running': 0,
+                                  'busy_seconds': 0.0} for priority in PRIORITIES}
+    
+    # --- Cycle de vie ---
+    
+    def start(self):
+        """Démarre les groupes de threads"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for priority in PRIORITIES:
+            for i in range(self.workers[priority]):
+                thread = threading.Thread(target=self._worker, args=(priority,),
+                                          name=f"jobs-{priority}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Planificateur démarré (" + ", ".join(
+            f"{p}: {self.workers[p]}" for p in PRIORITIES) + " thread(s))")
+    
+    def stop(self, timeout: float = 5):
+        """Arrête les threads ; les travaux en attente sont annulés"""
+        with self._cond:
+            self._running = False
+            pending = [job for queue in self._queues.values() for _, _, job in queue]
+            for queue in self._queues.values():
+                queue.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.cancel()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+    
+    def is_running(self) -> bool:
+        return self._running
+    
+    # --- Soumission ---
+    
+    def submit(self, func: Callable, *args, priority: str = NEAR_TERM,
+               name: Optional[str] = None, delay: float = 0, **kwargs) -> Future:
+        """Exécute func(*args, **kwargs) dans la classe de priorité donnée
+        
+        Le Future renvoyé donne le résultat (ou l'exception) du travail.
+        """
+        job = self._enqueue(func, args, kwargs, priority, name, delay)
+        return job.future
+    
+    def every(self, interval: float, func: Callable, *args, priority: str = BULK,
+              name: Optional[str] = None, delay: Optional[float] = None, **kwargs) -> Job:
+        """Exécute func toutes les interval secondes (première fois après delay, par défaut interval)"""
+        return self._enqueue(func, args, kwargs, priority, name,
+                             interval if delay is None else delay, interval)
+    
+    def _enqueue(self, func, args, kwargs, priority, name, delay, interval=None) -> Job:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Priorité inconnue: {priority}")
+        job = Job(func, args, kwargs, priority, name or getattr(func, '__name__', 'job'),
+                  time.monotonic() + delay, interval)
+        if not self._running:
+            self.start()
+        self._push(job)
+        return job
+    
+    def _push(self, job: Job):
+        with self._cond:
+            heapq.heappush(self._queues[job.priority], (job.run_at, next(self._counter), job))
+            self._cond.notify_all()
+    
+    # --- Report du bulk ---
+    
+    def hold_bulk(self, reason: str):
+        """Met le bulk en attente (idempotent pour une même raison)"""
+        with self._cond:
+            if reason not in self._holds:
+                self._holds.add(reason)
+                logger.debug(f"Travaux bulk suspendus ({reason})")
+    
+    def release_bulk(self, reason: str):
+        """Lève une mise en attente du bulk"""
+        with self._cond:
+            if reason in self._holds:
+                self._holds.discard(reason)
+                logger.debug(f"Travaux bulk repris ({reason})")
+                self._cond.notify_all()
+    
+    @contextmanager
+    def foreground(self, reason: str = 'foreground'):
+        """Bloc prioritaire : aucun travail bulk ne tourne pendant son exécution"""
+        self.hold_bulk(reason)
+        try:
+            yield
+        finally:
+            self.release_bulk(reason)
+    
+    def bulk_held(self) -> bool:
+        return bool(self._holds)
+    
+    def checkpoint(self):
+        """Point d'interruption d'un travail long
+        
+        Dans un travail bulk, attend la fin de la prise de vue en cours ; dans
+        tout travail annulé, lève JobCancelled. Sans effet hors du planificateur.
+        """
+        job = getattr(_current, 'job', None)
+        if job is None or getattr(_current, 'scheduler', None) is not self:
+            return
+        if job.cancelled:
+            raise JobCancelled(job.name)
+        if job.priority != BULK:
+            return
+        with self._cond:
+            while self._holds and self._running and not job.cancelled:
+                # Réveil périodique : une annulation ne notifie pas la condition
+                self._cond.wait(1)
+        if job.cancelled:
+            raise JobCancelled(job.name)
+    
+    # --- Exécution ---
+    
+    def _next_job(self, priority: str) -> Optional[Job]:
+        """Attend le prochain travail exécutable de la classe (None à l'arrêt)"""
+        queue = self._queues[priority]
+        with self._cond:
+            while self._running:
+                while queue and queue[0][2].cancelled:
+                    heapq.heappop(queue)
+                    self._stats[priority]['cancelled'] += 1
+                
+                timeout = None
+                if queue and not (priority == BULK and self._holds):
+                    delay = queue[0][0] - time.monotonic()
+                    if delay <= 0:
+                        job = heapq.heappop(queue)[2]
+                        self._stats[priority]['running'] += 1
+                        return job
+                    timeout = delay
+                self._cond.wait(timeout)
+        return None
+    
+    def _worker(self, priority: str):
+        while True:
+            job = self._next_job(priority)
+            if job is None:
+                break
+            
+            _current.job, _current.scheduler = job, self
+            start = time.monotonic()
+            outcome = 'done'
+            try:
+                if job.future is None or job.future.set_running_or_notify_cancel():
+                    result = job.func(*job.args, **job.kwargs)
+                    if job.future:
+                        job.future.set_result(result)
+                else:
+                    outcome = 'cancelled'
+            except JobCancelled:
+                outcome = 'cancelled'
+                logger.info(f"Travail {job.name} interrompu")
+                if job.future:
+                    job.future.set_exception(JobCancelled(job.name))
+            except Exception as e:
+                outcome = 'failed'
+                logger.error(f"Travail {job.name} en échec: {e}")
+                if job.future:
+                    job.future.set_exception(e)
+            finally:
+                _current.job = _current.scheduler = None
+            
+            duration = time.monotonic() - start
+            with self._cond:
+                stats = self._stats[priority]
+                stats['running'] -= 1
+                stats[outcome] += 1
+                stats['busy_seconds'] += duration
+            
+            job.runs += 1
+            if job.interval and not job.cancelled and self._running:
+                # Périodique : la prochaine exécution part de la fin de celle-ci
+                job.run_at = time.monotonic() + job.interval
+                self._push(job)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Travaux en file, en cours et terminés par classe de priorité"""
+        with self._cond:
+            return {
+                'bulk_held': sorted(self._holds),
+                'classes': {priority: {**self._stats[priority],
+                                       'busy_seconds': round(self._stats[priority]['busy_seconds'], 3),
+                                       'queued': len(self._queues[priority]),
+                                       'workers': self.workers[priority]}
+                            for priority in PRIORITIES}
+            }
+
+
+# Planificateur partagé : tout sous-système peut y soumettre ses travaux
+SCHEDULER = JobScheduler()
+
+
+def checkpoint():
+    """Point d'interruption pour le travail en cours (sans effet hors du planificateur)"""
+    scheduler = getattr(_current, 'scheduler', None)
+    if scheduler is not None:
+        scheduler.checkpoint()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
+    scheduler = JobScheduler()
+    
+    def export(count):
+        for i in range(count):
+            checkpoint()
+            time.sleep(0.1)
+        return count
+    
+    bulk = scheduler.submit(export, 20, priority=BULK, name="export")
+    time.sleep(0.3)
+    with scheduler.foreground('capture'):
+        # Le bulk s'arrête à son prochain checkpoint pendant la prise de vue
+        start = time.monotonic()
+        photo = scheduler.submit(time.sleep, 0.5, priority=INTERACTIVE, name="capture")
+        photo.result()
+        print(f"Capture en {time.monotonic() - start:.2f}s, bulk suspendu: {scheduler.bulk_held()}")
+    print(f"Export terminé: {bulk.result()} éléments")
+    print(scheduler.stats())
+    scheduler.stop()
@@ -6,20 +6,397 @@ Upload automatique des photos vers un serveur NextCloud/OwnCloud
 """
 
 from plugin_manager import PluginInterface, PluginConfig
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 import logging
 import requests
 from pathlib import Path
 from datetime import datetime
 import os
 import json
+import random
+import threading
+import time
+import uuid
+import hashlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote, urlparse
 
 logger = logging.getLogger(__name__)
 
 
+# Écritures groupées du journal et de l'état distant : au plus tous les
+# SAVE_EVERY changements ou SAVE_INTERVAL secondes (plus à l'arrêt)
+SAVE_EVERY = 50
+SAVE_INTERVAL = 2.0
+
+
+def _atomic_write_json(path: Path, data: Any):
+    """Écrit un fichier JSON de façon atomique (fichier temporaire + fsync + rename)"""
+    tmp_file = path.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def iter_multistatus(chunks) -> Iterator[Dict[str, Any]]:
+    """Parse incrémentalement une réponse 207 Multi-Status
+    
+    Les entrées sont produites au fil de la lecture : la mémoire reste
+    constante même pour un dossier de plusieurs milliers de photos.
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    
+    def drain():
+        for _, elem in parser.read_events():
+            if elem.tag == '{DAV:}response':
+                entry = _multistatus_entry(elem)
+                elem.clear()
+                if entry is not None:
+                    yield entry
+    
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from drain()
+    parser.close()
+    yield from drain()
+
+
+def _multistatus_entry(item) -> Optional[Dict[str, Any]]:
+    """Convertit un élément <d:response> en dictionnaire"""
+    href = unquote(urlparse(item.findtext('{DAV:}href', '')).path)
+    prop = item.find('.//{DAV:}prop')
+    if prop is None:
+        return None
+    
+    mtime = None
+    modified = prop.findtext('{DAV:}getlastmodified')
+    if modified:
+        try:
+            mtime = parsedate_to_datetime(modified).timestamp()
+        except (TypeError, ValueError):
+            pass
+    
+    return {
+        'href': href,
+        'name': href.rstrip('/').rsplit('/', 1)[-1],
+        'is_dir': prop.find('{DAV:}resourcetype/{DAV:}collection') is not None,
+        'size': int(prop.findtext('{DAV:}getcontentlength') or 0),
+        'etag': (prop.findtext('{DAV:}getetag') or '').strip('"'),
+        'mtime': mtime
+    }
+
+
+def parse_multistatus(content: bytes) -> List[Dict[str, Any]]:
+    """Parse une réponse WebDAV 207 Multi-Status en liste d'entrées"""
+    return list(iter_multistatus([content]))
+
+
+class RemoteStateCache:
+    """État distant connu (taille, etag, date), conservé entre deux exécutions"""
+    
+    def __init__(self, state_file: Path):
+        self.state_file = Path(state_file)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.folder_etags: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self._load()
+    
+    def _load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                data = json.load(f)
+            self.files = data.get('files', {})
+            self.folder_etags = data.get('folder_etags', {})
+        except Exception as e:
+            logger.error(f"Erreur chargement état NextCloud: {e}")
+    
+    def save(self):
+        with self._lock:
+            try:
+                _atomic_write_json(self.state_file, {
+                    'files': self.files,
+                    'folder_etags': self.folder_etags
+                })
+                self._unsaved = 0
+                self._last_save = time.monotonic()
+            except Exception as e:
+                logger.error(f"Erreur sauvegarde état NextCloud: {e}")
+    
+    def flush(self):
+        """Écrit les changements groupés encore en mémoire"""
+        with self._lock:
+            if self._unsaved:
+                self.save()
+        
+    def get(self, remote_path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.files.get(remote_path)
+    
+    def update_folder(self, folder: str, etag: str, entries: List[Dict[str, Any]]):
+        """Remplace l'état d'un dossier par un listing PROPFIND"""
+        with self._lock:
+            prefix = folder.rstrip('/') + '/'
+            previous = {path: info for path, info in self.files.items()
+                        if path.startswith(prefix) and '/' not in path[len(prefix):]}
+            for path in previous:
+                del self.files[path]
+            
+            for entry in entries:
+                path = prefix + entry['name']
+                info = {'size': entry['size'], 'etag': entry['etag'], 'mtime': entry['mtime']}
+                # Conserver la date locale d'upload si le fichier n'a pas changé
+                old = previous.get(path)
+                if old and old['size'] == entry['size'] and 'local_mtime' in old:
+                    info['local_mtime'] = old['local_mtime']
+                self.files[path] = info
+            
+            if etag:
+                self.folder_etags[folder] = etag
+            else:
+                self.folder_etags.pop(folder, None)
+    
+    def forget_folder(self, folder: str):
+        with self._lock:
+            prefix = folder.rstrip('/') + '/'
+            self.files = {p: i for p, i in self.files.items() if not p.startswith(prefix)}
+            self.folder_etags.pop(folder, None)
+    
+    def remember_upload(self, remote_path: str, size: int, local_mtime: float):
+        """Enregistre un upload réussi"""
+        with self._lock:
+            self.files[remote_path] = {
+                'size': size,
+                'etag': '',
+                'mtime': time.time(),
+                'local_mtime': local_mtime
+            }
+            # Le contenu du dossier a changé : son etag n'est plus valable
+            self.folder_etags.pop(remote_path.rsplit('/', 1)[0], None)
+            # Écriture groupée : perdre les derniers uploads ne fait que les revérifier
+            self._unsaved += 1
+            if self._unsaved >= SAVE_EVERY or time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                self.save()
+
+
+class UploadJournal:
+    """Journal persistant des uploads NextCloud (survit aux coupures de courant)"""
+    
+    PENDING = 'pending'
+    UPLOADING = 'uploading'
+    FAILED = 'failed'
+    
+    def __init__(self, journal_file: Path, base_delay: float = 5.0, max_delay: float = 900.0):
+        self.journal_file = Path(journal_file)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Entrées par id (ordre d'ajout) et index (local, distant) pour les doublons
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._by_path: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self.stats = {
+            "uploaded_files": 0,
+            "uploaded_bytes": 0,
+            "upload_seconds": 0.0,
+            "failed_attempts": 0,
+            "last_success": None,
+            "last_error": None
+        }
+        self._lock = threading.RLock()
+        self._load()
+    
+    def _load(self):
+        """Charge le journal depuis le disque"""
+        if not self.journal_file.exists():
+            return
+        
+        try:
+            with open(self.journal_file, 'r') as f:
+                data = json.load(f)
+            for entry in data.get('entries', []):
+                self.entries[entry['id']] = entry
+                self._by_path[(entry['local_path'], entry['remote_path'])] = entry
+            self.stats.update(data.get('stats', {}))
+            
+            # Un upload interrompu (coupure) redevient en attente
+            for entry in self.entries.values():
+                if entry['state'] == self.UPLOADING:
+                    entry['state'] = self.PENDING
+            
+            if self.entries:
+                logger.info(f"Journal NextCloud: {len(self.entries)} upload(s) à reprendre")
+        except Exception as e:
+            logger.error(f"Erreur chargement journal NextCloud: {e}")
+    
+    def _save(self):
+        """Écrit le journal sur disque"""
+        try:
+            _atomic_write_json(self.journal_file, {'entries': list(self.entries.values()),
+                                                   'stats': self.stats})
+            self._unsaved = 0
+            self._last_save = time.monotonic()
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde journal NextCloud: {e}")
+    
+    def _changed(self):
+        """Changement d'état sans risque de perte : écrit par lots (SAVE_EVERY / SAVE_INTERVAL)
+        
+        Après une coupure, une entrée envoyée mais pas encore écrite comme
+        terminée est revérifiée sur le serveur (_remote_matches), pas renvoyée.
+        """
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY or time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self._save()
+    
+    def flush(self):
+        """Écrit les changements groupés encore en mémoire"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+    
+    def _add_entry(self, local_path: str, remote_path: str) -> Tuple[Dict[str, Any], bool]:
+        entry = self._by_path.get((local_path, remote_path))
+        if entry is not None:
+            if entry['state'] != self.FAILED:
+                return entry, False
+            entry['state'] = self.PENDING
+            entry['next_attempt'] = 0
+            return entry, True
+        
+        entry = {
+            'id': uuid.uuid4().hex,
+            'local_path': local_path,
+            'remote_path': remote_path,
+            'state': self.PENDING,
+            'attempts': 0,
+            'next_attempt': 0,
+            'last_error': None,
+            'created': datetime.now().isoformat()
+        }
+        self.entries[entry['id']] = entry
+        self._by_path[(local_path, remote_path)] = entry
+        return entry, True
+    
+    def add(self, local_path: str, remote_path: str) -> Dict[str, Any]:
+        """Ajoute un fichier au journal (sans doublon), écrit aussitôt sur disque"""
+        with self._lock:
+            entry, changed = self._add_entry(local_path, remote_path)
+            if changed:
+                self._save()
+            return entry
+    
+    def add_many(self, items: List[Tuple[str, str]]) -> int:
+        """Ajoute des paires (local, distant) en une seule écriture ; retourne le nombre ajouté"""
+        with self._lock:
+            added = sum(1 for local_path, remote_path in items
+                        if self._add_entry(local_path, remote_path)[1])
+            if added:
+                self._save()
+            return added
+    
+    def due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Retourne les entrées prêtes à être (ré)envoyées"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [e for e in self.entries.values()
+                    if e['state'] == self.PENDING and e['next_attempt'] <= now]
+    
+    def all_pending(self) -> List[Dict[str, Any]]:
+        """Retourne toutes les entrées en attente, sans tenir compte du backoff"""
+        with self._lock:
+            return [e for e in self.entries.values() if e['state'] == self.PENDING]
+    
+    def next_due_in(self) -> Optional[float]:
+        """Délai (s) avant la prochaine tentative, None si rien en attente"""
+        with self._lock:
+            pending = [e['next_attempt'] for e in self.entries.values() if e['state'] == self.PENDING]
+        if not pending:
+            return None
+        return max(0.0, min(pending) - time.time())
+    
+    def mark_uploading(self, entry: Dict[str, Any]):
+        with self._lock:
+            entry['state'] = self.UPLOADING
+            entry['attempts'] += 1
+            self._changed()
+    
+    def mark_done(self, entry: Dict[str, Any], size: int, seconds: float):
+        """Retire l'entrée du journal et met à jour les statistiques"""
+        with self._lock:
+            if self.entries.pop(entry['id'], None) is not None:
+                self._by_path.pop((entry['local_path'], entry['remote_path']), None)
+            self.stats['uploaded_files'] += 1
+            self.stats['uploaded_bytes'] += size
+            self.stats['upload_seconds'] += seconds
+            self.stats['last_success'] = datetime.now().isoformat()
+            self._changed()
+    
+    def mark_retry(self, entry: Dict[str, Any], error: str):
+        """Replanifie l'entrée avec un backoff exponentiel (avec gigue)"""
+        with self._lock:
+            delay = min(self.max_delay, self.base_delay * (2 ** max(0, entry['attempts'] - 1)))
+            delay *= random.uniform(0.8, 1.2)
+            entry['state'] = self.PENDING
+            entry['next_attempt'] = time.time() + delay
+            entry['last_error'] = error
+            self.stats['failed_attempts'] += 1
+            self.stats['last_error'] = error
+            self._changed()
+    
+    def mark_failed(self, entry: Dict[str, Any], error: str):
+        """Abandonne définitivement une entrée (ex: fichier local supprimé)"""
+        with self._lock:
+            entry['state'] = self.FAILED
+            entry['last_error'] = error
+            self.stats['last_error'] = error
+            self._save()
+    
+    def reset_backoff(self):
+        """Rend toutes les entrées en attente immédiatement éligibles"""
+        with self._lock:
+            for entry in self.entries.values():
+                if entry['state'] == self.PENDING:
+                    entry['next_attempt'] = 0
+            self._changed()
+    
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for e in self.entries.values() if e['state'] != self.FAILED)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistiques de débit et état du journal"""
+        with self._lock:
+            seconds = self.stats['upload_seconds']
+            throughput = self.stats['uploaded_bytes'] / seconds if seconds > 0 else 0
+            return {
+                "pending": self.pending_count(),
+                "failed": sum(1 for e in self.entries.values() if e['state'] == self.FAILED),
+                "uploaded_files": self.stats['uploaded_files'],
+                "uploaded_mb": round(self.stats['uploaded_bytes'] / (1024**2), 2),
+                "throughput_kbps": round(throughput / 1024, 1),
+                "failed_attempts": self.stats['failed_attempts'],
+                "last_success": self.stats['last_success'],
+                "last_error": self.stats['last_error']
+            }
+
+
 class NextCloudPlugin(PluginInterface):
     """Plugin de synchronisation avec NextCloud/OwnCloud"""
     
+    # Le test de connexion a besoin du réseau
+    dependencies = ["wifi"]
+    init_timeout = 20.0
+    status_interval = 60.0
+    
     def __init__(self, config: PluginConfig):
         super().__init__(config)
         
@@ -30,12 +407,45 @@ class NextCloudPlugin(PluginInterface):
         self.remote_folder = config.settings.get('remote_folder', '/photovinc')
         self.auto_upload = config.settings.get('auto_upload', True)
         self.create_dated_folders = config.settings.get('create_dated_folders', True)
+        self.reconnect_interval = config.settings.get('reconnect_interval', 30)
+        self.space_info_ttl = config.settings.get('space_info_ttl', 300)
+        
+        # Upload par morceaux (protocole chunking v2) au-delà du seuil
+        self.chunk_threshold = int(config.settings.get('chunk_threshold_mb', 10) * 1024**2)
+        self.chunk_size = int(config.settings.get('chunk_size_mb', 10) * 1024**2)
+        self.chunk_workers = config.settings.get('chunk_workers', 3)
         
         # État
         self.connected = False
-        self.upload_queue = []
         self.session = None
         self.credentials_file = Path.home() / ".photovinc_nextcloud.json"
+        
+        # Journal d'upload persistant (remplace la file en mémoire)
+        self.upload_journal = UploadJournal(
+            Path(config.settings.get('journal_file',
+                                     Path.home() / ".photovinc_nextcloud_journal.json")),
+            base_delay=config.settings.get('retry_base_delay', 5),
+            max_delay=config.settings.get('retry_max_delay', 900)
+        )
+        self._journal_thread = None
+        self._journal_wake = threading.Event()
+        self._journal_stop = threading.Event()
+        
+        # État distant mis en cache pour la synchronisation différentielle
+        self.remote_state = RemoteStateCache(
+            Path(config.settings.get('state_file',
+                                     Path.home() / ".photovinc_nextcloud_state.json"))
+        )
+        
+        # Cache des dossiers distants connus (un seul MKCOL par dossier et par processus)
+        self._known_folders = set()
+        self._folder_lock = threading.Lock()
+        
+        # Quota mis en cache : get_status ne doit jamais attendre le réseau
+        self._space_info = None
+        self._space_info_time = 0.0
+        self._space_refreshing = False
+        self._space_lock = threading.Lock()
     
     def initialize(self) -> bool:
         """Initialise la connexion NextCloud"""
@@ -60,6 +470,9 @@ class NextCloudPlugin(PluginInterface):
                 'Content-Type': 'application/x-www-form-urlencoded'
             })
             
+            # Le journal se vide en arrière-plan dès que le serveur répond
+            self._start_journal_worker()
+            
             # Tester la connexion
             if self._test_connection():
                 self.connected = True
@@ -67,7 +480,9 @@ class NextCloudPlugin(PluginInterface):
                 logger.info("Connexion NextCloud réussie")
                 
                 # Créer le dossier distant si nécessaire
+                self._seed_folder_cache()
                 self._ensure_remote_folder()
+                self._cached_space_info()
                 return True
             else:
                 logger.error("Échec connexion NextCloud")
@@ -81,11 +496,19 @@ class NextCloudPlugin(PluginInterface):
         """Arrête le plugin"""
         logger.info("Arrêt NextCloudPlugin")
         
-        # Upload des fichiers en attente
-        if self.upload_queue:
-            logger.info(f"Upload de {len(self.upload_queue)} fichiers en attente")
+        stopped = self._stop_journal_worker()
+        
+        # Upload des fichiers en attente (le reste est conservé sur disque) ;
+        # jamais en même temps qu'un worker encore vivant après le délai d'arrêt
+        if not stopped:
+            logger.warning("Worker du journal encore actif : envoi final annulé")
+        elif self.connected and self.upload_journal.pending_count():
+            logger.info(f"Upload de {self.upload_journal.pending_count()} fichiers en attente")
             self._flush_queue()
         
+        self.upload_journal.flush()
+        self.remote_state.flush()
+        
         if self.session:
             self.session.close()
         
@@ -100,9 +523,10 @@ class NextCloudPlugin(PluginInterface):
             "server_url": self.server_url,
             "username": self.username,
             "remote_folder": self.remote_folder,
-            "queue_size": len(self.upload_queue),
+            "queue_size": self.upload_journal.pending_count(),
+            "upload_journal": self.upload_journal.get_stats(),
             "auto_upload": self.auto_upload,
-            "space_info": self._get_space_info()
+            "space_info": self._cached_space_info()
         }
     
     def get_capabilities(self) -> List[str]:
@@ -113,7 +537,8 @@ class NextCloudPlugin(PluginInterface):
             "list_files",
             "create_folder",
             "delete_file",
-            "get_share_link"
+            "get_share_link",
+            "sync_gallery"
         ]
     
     def _load_credentials(self):
@@ -150,7 +575,11 @@ class NextCloudPlugin(PluginInterface):
             # Utiliser l'API WebDAV pour tester
             url = f"{self.server_url}/remote.php/dav/files/{self.username}/"
             response = self.session.request('PROPFIND', url, timeout=10)
-            return response.status_code in [200, 207]  # 207 = Multi-Status (succès WebDAV)
+            ok = response.status_code in [200, 207]  # 207 = Multi-Status (succès WebDAV)
+            if ok:
+                # Serveur joignable : réveiller le journal pour le vider
+                self._journal_wake.set()
+            return ok
         except Exception as e:
             logger.error(f"Erreur test connexion: {e}")
             return False
@@ -163,8 +592,73 @@ class NextCloudPlugin(PluginInterface):
         except Exception as e:
             logger.warning(f"Impossible de créer le dossier: {e}")
     
+    def _propfind(self, url: str, depth: str = '1') -> Optional[List[Dict[str, Any]]]:
+        """Requête PROPFIND ; None si la ressource n'existe pas"""
+        response = self.session.request('PROPFIND', url, headers={'Depth': depth},
+                                        timeout=10, stream=True)
+        try:
+            if response.status_code != 207:
+                return None
+            return list(iter_multistatus(response.iter_content(chunk_size=64 * 1024)))
+        finally:
+            response.close()
+    
+    def _relative_path(self, href: str) -> str:
+        """Convertit un href WebDAV en chemin relatif à l'utilisateur ('/a/b.jpg')"""
+        dav_prefix = urlparse(self._get_webdav_url('')).path
+        if href.startswith(dav_prefix):
+            href = href[len(dav_prefix):]
+        return '/' + href.strip('/')
+    
+    def _seed_folder_cache(self):
+        """Remplit le cache des dossiers existants via un PROPFIND (Depth: 1)"""
+        try:
+            entries = self._propfind(self._get_webdav_url(self.remote_folder))
+            if entries is None:
+                return
+            
+            folders = {self._relative_path(e['href']) for e in entries if e['is_dir']}
+            
+            with self._folder_lock:
+                self._known_folders.update(folders)
+            logger.info(f"Cache dossiers NextCloud: {len(folders)} dossier(s) connu(s)")
+        except Exception as e:
+            logger.warning(f"Impossible de lister les dossiers distants: {e}")
+    
+    def _cached_space_info(self) -> Dict[str, Any]:
+        """Retourne le quota en cache ; rafraîchit en arrière-plan s'il a expiré"""
+        if not self.connected:
+            return {"used": "N/A", "available": "N/A", "total": "N/A"}
+        
+        with self._space_lock:
+            expired = time.monotonic() - self._space_info_time > self.space_info_ttl
+            if (self._space_info is None or expired) and not self._space_refreshing:
+                self._space_refreshing = True
+                threading.Thread(target=self._refresh_space_info, daemon=True,
+                                 name="nextcloud-quota").start()
+            
+            if self._space_info is None:
+                return {"used": "...", "available": "...", "total": "..."}
+            return dict(self._space_info)
+    
+    def _refresh_space_info(self):
+        """Thread de rafraîchissement du quota"""
+        try:
+            info = self._get_space_info()
+            with self._space_lock:
+                self._space_info = info
+                self._space_info_time = time.monotonic()
+        finally:
+            with self._space_lock:
+                self._space_refreshing = False
+    
+    def _invalidate_space_info(self):
+        """Le quota a changé (upload, suppression) : il sera relu au prochain get_status"""
+        with self._space_lock:
+            self._space_info_time = 0.0
+    
     def _get_space_info(self) -> Dict[str, Any]:
-        """Obtient les informations d'espace disque"""
+        """Obtient les informations d'espace disque (requête bloquante)"""
         if not self.connected:
             return {"used": "N/A", "available": "N/A", "total": "N/A"}
         
@@ -196,20 +690,156 @@ class NextCloudPlugin(PluginInterface):
         remote_path = remote_path.lstrip('/')
         return f"{self.server_url}/remote.php/dav/files/{self.username}/{remote_path}"
     
+    @staticmethod
+    def _normalize_folder(folder_path: str) -> str:
+        """Forme canonique d'un dossier distant ('/a/b')"""
+        return '/' + folder_path.strip('/')
+    
     def create_folder(self, folder_path: str) -> bool:
         """Crée un dossier sur NextCloud"""
         if not self.connected:
             return False
         
-        try:
-            url = self._get_webdav_url(folder_path)
-            response = self.session.request('MKCOL', url, timeout=10)
+        folder = self._normalize_folder(folder_path)
+        with self._folder_lock:
+            if folder in self._known_folders:
+                return True
             
-            # 201 = créé, 405 = existe déjà
-            return response.status_code in [201, 405]
-        except Exception as e:
-            logger.error(f"Erreur création dossier: {e}")
-            return False
+            try:
+                url = self._get_webdav_url(folder)
+                response = self.session.request('MKCOL', url, timeout=10)
+                
+                # 201 = créé, 405 = existe déjà
+                if response.status_code in [201, 405]:
+                    self._known_folders.add(folder)
+                    return True
+                return False
+            except Exception as e:
+                logger.error(f"Erreur création dossier: {e}")
+                return False
+    
+    def _forget_folder(self, folder_path: str):
+        """Invalide un dossier (et ses sous-dossiers) du cache"""
+        folder = self._normalize_folder(folder_path)
+        with self._folder_lock:
+            self._known_folders = {f for f in self._known_folders
+                                   if f != folder and not f.startswith(folder + '/')}
+    
+    def _ensure_folders(self, folders):
+        """Crée en une passe les dossiers manquants (parents d'abord)"""
+        for folder in sorted({self._normalize_folder(f) for f in folders if f}, key=len):
+            self.create_folder(folder)
+    
+    def _resolve_remote_path(self, local_file: Path, remote_path: Optional[str] = None) -> str:
+        """Détermine le chemin distant d'un fichier local"""
+        if remote_path is not None:
+            return remote_path
+        
+        if self.create_dated_folders:
+            # Sous-dossier par date de prise de vue : chemin stable pour la synchro
+            try:
+                taken = datetime.fromtimestamp(local_file.stat().st_mtime)
+            except OSError:
+                taken = datetime.now()
+            date_folder = taken.strftime("%Y-%m-%d")
+            return f"{self.remote_folder}/{date_folder}/{local_file.name}"
+        return f"{self.remote_folder}/{local_file.name}"
+    
+    @staticmethod
+    def _parent_folder(remote_path: str) -> str:
+        """Dossier parent d'un chemin distant ('' si à la racine)"""
+        path = remote_path.strip('/')
+        return path.rsplit('/', 1)[0] if '/' in path else ''
+    
+    def _put_file(self, local_file: Path, remote_path: str) -> requests.Response:
+        """Envoie un fichier par WebDAV (lève une exception si réseau KO)"""
+        parent = self._parent_folder(remote_path)
+        if parent:
+            self.create_folder(parent)
+        
+        response = self._send_file(local_file, remote_path)
+        
+        # 404/409 = dossier parent absent : le cache est faux, on recrée puis on réessaie
+        if response.status_code in [404, 409] and parent:
+            logger.warning(f"Dossier distant absent, recréation: {parent}")
+            self._forget_folder(parent)
+            self.create_folder(parent)
+            response = self._send_file(local_file, remote_path)
+        
+        return response
+    
+    def _send_file(self, local_file: Path, remote_path: str) -> requests.Response:
+        """PUT simple, ou upload par morceaux pour les gros fichiers"""
+        if local_file.stat().st_size > self.chunk_threshold:
+            return self._send_file_chunked(local_file, remote_path)
+        
+        url = self._get_webdav_url(remote_path)
+        with open(local_file, 'rb') as f:
+            return self.session.put(url, data=f, timeout=60)
+    
+    def _chunk_upload_url(self, local_file: Path, remote_path: str) -> str:
+        """URL du dossier de transfert (stable pour un même fichier : permet la reprise)"""
+        stat = local_file.stat()
+        key = f"{remote_path}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')
+        transfer_id = f"photovinc-{hashlib.sha1(key).hexdigest()[:24]}"
+        return f"{self.server_url}/remote.php/dav/uploads/{self.username}/{transfer_id}"
+    
+    def _send_file_chunked(self, local_file: Path, remote_path: str) -> requests.Response:
+        """Upload NextCloud chunking v2 : MKCOL, PUT des morceaux en parallèle, MOVE final"""
+        size = local_file.stat().st_size
+        upload_url = self._chunk_upload_url(local_file, remote_path)
+        headers = {
+            'Destination': self._get_webdav_url(remote_path),
+            'OC-Total-Length': str(size)
+        }
+        
+        chunk_count = (size + self.chunk_size - 1) // self.chunk_size
+        expected = {f"{i + 1:05d}": min(self.chunk_size, size - i * self.chunk_size)
+                    for i in range(chunk_count)}
+        
+        # Reprise : ne renvoyer que les morceaux absents ou incomplets
+        uploaded = self._propfind(upload_url)
+        if uploaded is None:
+            response = self.session.request('MKCOL', upload_url, headers=headers, timeout=10)
+            if response.status_code not in [201, 405]:
+                return response
+            uploaded = []
+        
+        received = {e['name']: e['size'] for e in uploaded if not e['is_dir']}
+        missing = [name for name, length in expected.items() if received.get(name) != length]
+        if len(missing) < chunk_count:
+            logger.info(f"Reprise upload {local_file.name}: "
+                        f"{chunk_count - len(missing)}/{chunk_count} morceaux déjà reçus")
+        
+        def put_chunk(name):
+            offset = (int(name) - 1) * self.chunk_size
+            with open(local_file, 'rb') as f:
+                f.seek(offset)
+                data = f.read(expected[name])
+            return self.session.put(f"{upload_url}/{name}", data=data,
+                                    headers=headers, timeout=60)
+        
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as pool:
+            for response in pool.map(put_chunk, missing):
+                if response.status_code not in [200, 201, 204]:
+                    logger.error(f"Échec morceau {response.url}: {response.status_code}")
+                    return response
+        
+        # Assemblage côté serveur
+        return self.session.request('MOVE', f"{upload_url}/.file",
+                                    headers={**headers, 'Overwrite': 'T'}, timeout=120)
+    
+    def _remote_matches(self, local_file: Path, remote_path: str) -> bool:
+        """Vérifie si le fichier distant est déjà identique (même taille)"""
+        try:
+            url = self._get_webdav_url(remote_path)
+            response = self.session.head(url, timeout=10)
+            if response.status_code == 200:
+                remote_size = int(response.headers.get('Content-Length', -1))
+                return remote_size == local_file.stat().st_size
+        except Exception:
+            pass
+        return False
     
     def upload_file(self, local_path: str, remote_path: Optional[str] = None) -> bool:
         """Upload un fichier vers NextCloud"""
@@ -224,23 +854,15 @@ class NextCloudPlugin(PluginInterface):
                 return False
             
             # Déterminer le chemin distant
-            if remote_path is None:
-                if self.create_dated_folders:
-                    # Créer un sous-dossier par date
-                    date_folder = datetime.now().strftime("%Y-%m-%d")
-                    folder = f"{self.remote_folder}/{date_folder}"
-                    self.create_folder(folder)
-                    remote_path = f"{folder}/{local_file.name}"
-                else:
-                    remote_path = f"{self.remote_folder}/{local_file.name}"
+            remote_path = self._resolve_remote_path(local_file, remote_path)
             
             # Upload via WebDAV
-            url = self._get_webdav_url(remote_path)
-            
-            with open(local_path, 'rb') as f:
-                response = self.session.put(url, data=f, timeout=60)
+            response = self._put_file(local_file, remote_path)
             
             if response.status_code in [200, 201, 204]:
+                stat = local_file.stat()
+                self.remote_state.remember_upload(remote_path, stat.st_size, stat.st_mtime)
+                self._invalidate_space_info()
                 logger.info(f"Upload réussi: {local_file.name} -> {remote_path}")
                 return True
             else:
@@ -252,19 +874,122 @@ class NextCloudPlugin(PluginInterface):
             return False
     
     def upload_photo(self, photo_path: str, remote_name: Optional[str] = None) -> bool:
-        """Upload une photo (alias pour upload_file)"""
+        """Ajoute une photo au journal d'upload (envoyée dès que possible)"""
+        if not self.session:
+            logger.error("NextCloud non configuré")
+            return False
+        
+        # Le chemin distant est figé à l'ajout : un nouvel essai écrase le même fichier
+        remote_path = self._resolve_remote_path(Path(photo_path), remote_name)
+        self.upload_journal.add(str(photo_path), remote_path)
+        
         if self.auto_upload:
-            return self.upload_file(photo_path, remote_name)
-        else:
-            # Ajouter à la file d'attente
-            self.upload_queue.append((photo_path, remote_name))
-            return True
+            self._journal_wake.set()
+        return True
+    
+    def _start_journal_worker(self):
+        """Démarre le thread qui vide le journal en arrière-plan"""
+        if self._journal_thread and self._journal_thread.is_alive():
+            return
+        
+        self._journal_stop.clear()
+        self._journal_thread = threading.Thread(
+            target=self._journal_loop,
+            name="nextcloud-journal",
+            daemon=True
+        )
+        self._journal_thread.start()
+    
+    def _stop_journal_worker(self) -> bool:
+        """Arrête le thread du journal ; False s'il tourne encore après le délai"""
+        self._journal_stop.set()
+        self._journal_wake.set()
+        thread = self._journal_thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5)
+            if thread.is_alive():
+                return False
+        self._journal_thread = None
+        return True
+    
+    def _journal_loop(self):
+        """Boucle d'arrière-plan : reconnexion puis envoi des entrées échues"""
+        while not self._journal_stop.is_set():
+            wait = self.reconnect_interval
+            
+            try:
+                if self.upload_journal.pending_count() and self.auto_upload:
+                    if not self.connected and self._test_connection():
+                        logger.info("NextCloud de nouveau joignable, reprise des uploads")
+                        self.connected = True
+                        # Hors ligne au démarrage : le plugin devient utilisable
+                        self._initialized = True
+                        self.upload_journal.reset_backoff()
+                    
+                    if self.connected:
+                        self._drain_journal(stop_event=self._journal_stop)
+                        self.upload_journal.flush()
+                        self.remote_state.flush()
+                        next_due = self.upload_journal.next_due_in()
+                        if self.connected and next_due is not None:
+                            wait = next_due
+            except Exception as e:
+                # Le worker ne doit jamais mourir : sinon plus rien ne part avant redémarrage
+                logger.error(f"Erreur worker journal NextCloud: {e}")
+            
+            self._journal_wake.wait(wait)
+            self._journal_wake.clear()
+    
+    def _drain_journal(self, entries: Optional[List[Dict[str, Any]]] = None,
+                       stop_event: Optional[threading.Event] = None):
+        """Envoie les entrées du journal, s'arrête à la première coupure réseau"""
+        if entries is None:
+            entries = self.upload_journal.due()
+        
+        # Dossiers datés créés une seule fois pour tout le lot (changement de jour)
+        self._ensure_folders(self._parent_folder(e['remote_path']) for e in entries)
+        
+        for entry in entries:
+            if stop_event is not None and stop_event.is_set():
+                break
+            
+            local_file = Path(entry['local_path'])
+            if not local_file.exists():
+                self.upload_journal.mark_failed(entry, "Fichier local introuvable")
+                continue
+            
+            try:
+                # Reprise : inutile de renvoyer un fichier déjà complet sur le serveur
+                if entry['attempts'] > 0 and self._remote_matches(local_file, entry['remote_path']):
+                    self.upload_journal.mark_done(entry, 0, 0.0)
+                    continue
+                
+                self.upload_journal.mark_uploading(entry)
+                start = time.monotonic()
+                response = self._put_file(local_file, entry['remote_path'])
+                
+                if response.status_code in [200, 201, 204]:
+                    stat = local_file.stat()
+                    self.upload_journal.mark_done(entry, stat.st_size, time.monotonic() - start)
+                    self.remote_state.remember_upload(entry['remote_path'], stat.st_size, stat.st_mtime)
+                    self._invalidate_space_info()
+                    logger.info(f"Upload réussi: {local_file.name} -> {entry['remote_path']}")
+                else:
+                    self.upload_journal.mark_retry(entry, f"HTTP {response.status_code}")
+                    logger.error(f"Échec upload: {response.status_code}")
+            except requests.RequestException as e:
+                self.upload_journal.mark_retry(entry, f"Réseau: {e}")
+                self.connected = False
+                logger.warning(f"NextCloud injoignable, upload différé: {local_file.name}")
+                break
+            except Exception as e:
+                # Fichier illisible, réponse WebDAV invalide... : l'entrée sera retentée
+                self.upload_journal.mark_retry(entry, str(e))
+                logger.error(f"Erreur upload {local_file.name}: {e}")
     
     def _flush_queue(self):
         """Upload tous les fichiers en attente"""
-        for photo_path, remote_name in self.upload_queue:
-            self.upload_file(photo_path, remote_name)
-        self.upload_queue.clear()
+        self._drain_journal(self.upload_journal.all_pending())
     
     def download_file(self, remote_path: str, local_path: str) -> bool:
         """Télécharge un fichier depuis NextCloud"""
@@ -299,24 +1024,102 @@ class NextCloudPlugin(PluginInterface):
         try:
             url = self._get_webdav_url(folder_path)
             
-            # Requête PROPFIND pour lister
-            headers = {'Depth': '1'}
-            response = self.session.request('PROPFIND', url, headers=headers, timeout=10)
-            
-            if response.status_code == 207:
-                # Parser la réponse XML (simplifié)
-                files = []
-                # Note: Pour un parsing XML complet, utilisez xml.etree.ElementTree
-                logger.info(f"Fichiers listés dans {folder_path}")
-                return files
-            else:
-                logger.error(f"Échec listage: {response.status_code}")
+            # Requête PROPFIND pour lister (réponse parsée au fil de l'eau)
+            entries = self._propfind(url)
+            if entries is None:
+                logger.error(f"Échec listage: {folder_path}")
                 return []
+            
+            folder = self._normalize_folder(folder_path)
+            files = []
+            for entry in entries:
+                path = self._relative_path(entry['href'])
+                if path == folder:
+                    continue
+                files.append({
+                    'name': entry['name'],
+                    'path': path,
+                    'is_dir': entry['is_dir'],
+                    'size': entry['size'],
+                    'etag': entry['etag'],
+                    'modified': datetime.fromtimestamp(entry['mtime']) if entry['mtime'] else None
+                })
+            
+            logger.info(f"{len(files)} fichier(s) listé(s) dans {folder_path}")
+            return files
                 
         except Exception as e:
             logger.error(f"Erreur listage: {e}")
             return []
     
+    def _refresh_remote_state(self, folders):
+        """Met à jour le cache d'état distant ; les dossiers à l'etag inchangé sont ignorés"""
+        root = self._normalize_folder(self.remote_folder)
+        root_entries = self._propfind(self._get_webdav_url(root))
+        if root_entries is None:
+            for folder in folders:
+                self.remote_state.forget_folder(self._normalize_folder(folder))
+            return
+        
+        subfolders = {self._relative_path(e['href']): e for e in root_entries if e['is_dir']}
+        with self._folder_lock:
+            self._known_folders.update(subfolders)
+        
+        for folder in {self._normalize_folder(f) for f in folders}:
+            if folder == root:
+                entries = root_entries
+                etag = subfolders.get(root, {}).get('etag', '')
+            elif folder not in subfolders:
+                self.remote_state.forget_folder(folder)
+                continue
+            else:
+                etag = subfolders[folder]['etag']
+                if etag and self.remote_state.folder_etags.get(folder) == etag:
+                    continue
+                entries = self._propfind(self._get_webdav_url(folder))
+                if entries is None:
+                    self.remote_state.forget_folder(folder)
+                    continue
+            
+            files = [e for e in entries if not e['is_dir']]
+            self.remote_state.update_folder(folder, etag, files)
+        
+        self.remote_state.save()
+    
+    def sync_gallery(self, photo_dir, pattern: str = "*.jpg") -> Dict[str, int]:
+        """Synchronisation différentielle : seules les photos nouvelles ou modifiées partent"""
+        photos = sorted(Path(photo_dir).glob(pattern))
+        targets = {photo: self._resolve_remote_path(photo) for photo in photos}
+        
+        if self.connected:
+            try:
+                self._refresh_remote_state({self._parent_folder(t) for t in targets.values()})
+            except Exception as e:
+                logger.warning(f"État distant non rafraîchi, utilisation du cache: {e}")
+        
+        changed = []
+        for photo, remote_path in targets.items():
+            stat = photo.stat()
+            known = self.remote_state.get(remote_path)
+            if (known and known['size'] == stat.st_size
+                    and known.get('local_mtime', stat.st_mtime) >= stat.st_mtime):
+                continue
+            changed.append((str(photo), remote_path))
+        
+        # Une seule écriture du journal pour tout le lot
+        self.upload_journal.add_many(changed)
+        queued = len(changed)
+        
+        if queued:
+            self._journal_wake.set()
+        
+        logger.info(f"Synchro NextCloud: {queued} photo(s) à envoyer sur {len(photos)}")
+        return {
+            'total': len(photos),
+            'queued': queued,
+            'up_to_date': len(photos) - queued
+        }
+    
     def delete_file(self, remote_path: str) -> bool:
         """Supprime un fichier sur NextCloud"""
         if not self.connected:
@@ -327,6 +1130,8 @@ class NextCloudPlugin(PluginInterface):
             response = self.session.delete(url, timeout=10)
             
             if response.status_code == 204:
+                self._forget_folder(remote_path)
+                self._invalidate_space_info()
                 logger.info(f"Fichier supprimé: {remote_path}")
                 return True
             else:
@@ -409,7 +1214,12 @@ def register_nextcloud_plugin(manager):
                 "password": "",
                 "remote_folder": "/photovinc",
                 "auto_upload": True,
-                "create_dated_folders": True
+                "create_dated_folders": True,
+                "retry_base_delay": 5,
+                "retry_max_delay": 900,
+                "chunk_threshold_mb": 10,
+                "chunk_size_mb": 10,
+                "space_info_ttl": 300
             }
         )
         manager.save_config()
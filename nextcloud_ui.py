@@ -512,6 +512,7 @@ class NextCloudFileManagerUI:
         
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind('<Double-1>', self.open_selected)
         
         # Charger la liste
         self.refresh_list()
@@ -533,11 +534,40 @@ class NextCloudFileManagerUI:
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # Charger les fichiers
+        self.path_label.config(text=self.current_path)
+        
+        # Charger les fichiers (dossiers d'abord)
         files = self.nextcloud.list_files(self.current_path)
+        files.sort(key=lambda f: (not f['is_dir'], f['name']))
+        
+        if self.current_path.rstrip('/') != self.nextcloud.remote_folder.rstrip('/'):
+            self.tree.insert('', 'end', text='📁', values=('..', '', ''))
         
-        # Pour l'instant, afficher un message
-        self.tree.insert('', 'end', text='📁', values=('(Liste non disponible)', '', ''))
+        for f in files:
+            size = '' if f['is_dir'] else f"{f['size'] / 1024:.1f} KB"
+            date = f['modified'].strftime("%d/%m/%Y %H:%M") if f['modified'] else ''
+            self.tree.insert('', 'end', text='📁' if f['is_dir'] else '📄',
+                             values=(f['name'], size, date))
+        
+        if not files:
+            self.tree.insert('', 'end', text='', values=('(Dossier vide)', '', ''))
+    
+    def open_selected(self, event=None):
+        """Ouvre le dossier sélectionné (double-clic)"""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        
+        item = self.tree.item(selection[0])
+        if item['text'] != '📁':
+            return
+        
+        name = item['values'][0]
+        if name == '..':
+            self.current_path = self.current_path.rstrip('/').rsplit('/', 1)[0] or '/'
+        else:
+            self.current_path = f"{self.current_path.rstrip('/')}/{name}"
+        self.refresh_list()
     
     def upload_photo(self):
         """Upload une photo"""
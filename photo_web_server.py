@@ -4,21 +4,66 @@ Serveur HTTP pour partager les photos via QR Code
 Se lance automatiquement en arrière-plan
 """
 
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import quote, unquote, urlsplit
+import html
 import threading
 import socket
 from pathlib import Path
 import logging
 import os
+import shutil
+
+from share_tokens import ShareTokenStore, TOKEN_PATTERN
 
 logger = logging.getLogger(__name__)
 
+THUMBNAIL_SIZE = 400
+
+# Adresses de la borne elle-même (pages internes comme /metrics)
+LOCAL_CLIENTS = ('127.0.0.1', '::1')
+
+
+def get_thumbnail(photo_dir, filename, size=THUMBNAIL_SIZE):
+    """Retourne la vignette d'une photo, générée à la demande dans <photo_dir>/.cache/thumbs"""
+    from PIL import Image
+    
+    source = Path(photo_dir) / Path(filename).name
+    if not source.is_file():
+        return None
+    
+    thumb = Path(photo_dir) / ".cache" / "thumbs" / f"{size}_{source.name}"
+    if thumb.exists() and thumb.stat().st_mtime >= source.stat().st_mtime:
+        return thumb
+    
+    thumb.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as img:
+        # Décodage JPEG réduit : bien plus rapide que de décoder l'image entière
+        img.draft('RGB', (size * 2, size * 2))
+        img = img.convert('RGB')
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        tmp = thumb.with_name(f".{thumb.name}.{threading.get_ident()}")
+        img.save(tmp, 'JPEG', quality=80, optimize=True)
+    os.replace(tmp, thumb)
+    return thumb
+
+
+class PhotoHTTPServer(ThreadingHTTPServer):
+    """Un thread par requête : les vignettes d'un album se chargent en parallèle"""
+    
+    # File d'attente de connexions : 5 par défaut, trop peu quand une salle
+    # entière scanne le même QR code (connexions refusées puis réessayées 1 s plus tard)
+    request_queue_size = 128
+    daemon_threads = True
+
 
 class PhotoHTTPHandler(SimpleHTTPRequestHandler):
     """Handler HTTP personnalisé pour servir les photos"""
     
-    def __init__(self, *args, photo_directory=None, **kwargs):
+    def __init__(self, *args, photo_directory=None, share_tokens=None, metrics=None, **kwargs):
         self.photo_dir = photo_directory or str(Path.home() / "Photos_photovinc")
+        self.share_tokens = share_tokens
+        self.metrics = metrics
         super().__init__(*args, directory=self.photo_dir, **kwargs)
     
     def log_message(self, format, *args):
@@ -32,41 +77,183 @@ class PhotoHTTPHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', '*')
         super().end_headers()
     
+    def _send_file(self, filepath, content_type, not_found, attachment=True, max_age=None):
+        """Envoie un fichier (par blocs, sans tout charger en mémoire)"""
+        # Jamais de fichier hors du dossier photos (../, %2F, liens symboliques)
+        if not filepath.resolve().is_relative_to(Path(self.photo_dir).resolve()):
+            self.send_error(404, not_found)
+            return
+        if not filepath.exists() or not filepath.is_file():
+            self.send_error(404, not_found)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(filepath.stat().st_size))
+        if attachment:
+            self.send_header('Content-Disposition', f'attachment; filename="{filepath.name}"')
+        if max_age:
+            self.send_header('Cache-Control', f'public, max-age={max_age}')
+        self.end_headers()
+        
+        try:
+            with open(filepath, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, 256 * 1024)
+        except (BrokenPipeError, ConnectionResetError):
+            # Invité parti en plein téléchargement : rien à signaler
+            logger.debug(f"Téléchargement interrompu par le client: {filepath.name}")
+    
+    def _send_metrics(self, path):
+        """Mesures des appels de plugins : texte Prometheus ou JSON (/metrics.json)"""
+        if path.endswith('.json'):
+            body, content_type = self.metrics.to_json(), 'application/json'
+        else:
+            body, content_type = self.metrics.to_prometheus(), 'text/plain; version=0.0.4'
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _serve_token(self, token):
+        """Résout un jeton de partage court"""
+        entry = self.share_tokens.resolve(token) if self.share_tokens else None
+        if entry is None:
+            self.send_error(404, "Lien inconnu ou expiré")
+            return
+        
+        if entry['kind'] == 'photo':
+            self._send_file(Path(self.photo_dir) / entry['target'], 'image/jpeg', "Photo non trouvée")
+        elif entry['kind'] == 'zip':
+            self._send_file(Path(self.photo_dir) / entry['target'], 'application/zip', "Archive non trouvée")
+        elif entry['kind'] == 'session':
+            self._send_album(entry['target'])
+        else:
+            self.send_error(404, "Lien inconnu ou expiré")
+    
+    def _send_thumbnail(self, filename):
+        """Vignette d'une photo (mise en cache navigateur)"""
+        try:
+            thumb = get_thumbnail(self.photo_dir, filename)
+        except Exception as e:
+            logger.error(f"Erreur vignette {filename}: {e}")
+            thumb = None
+        
+        if thumb is None:
+            self.send_error(404, "Photo non trouvée")
+            return
+        self._send_file(thumb, 'image/jpeg', "Photo non trouvée", attachment=False, max_age=86400)
+    
+    def _send_album(self, filenames):
+        """Page d'album d'une session : vignettes chargées à la demande, liens vers les originaux"""
+        photos = [name for name in filenames if (Path(self.photo_dir) / name).is_file()]
+        if not photos:
+            self.send_error(404, "Photos non trouvées")
+            return
+        
+        items = []
+        for name in photos:
+            url_name = quote(name)
+            label = "Montage" if "montage" in name else f"Photo {len(items) + 1}"
+            items.append(
+                f'<a class="photo" href="/photo/{url_name}">'
+                f'<img src="/thumb/{url_name}" loading="lazy" alt="{html.escape(name)}">'
+                f'<span>⬇ {label}</span></a>'
+            )
+        
+        page = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>photovinc - Vos photos</title>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            margin: 0;
+            padding: 15px;
+            background: #2c3e50;
+            color: #ecf0f1;
+            text-align: center;
+        }}
+        .album {{
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
+            gap: 12px;
+        }}
+        .photo {{
+            background: #34495e;
+            border-radius: 10px;
+            padding: 8px;
+            color: #ecf0f1;
+            text-decoration: none;
+        }}
+        .photo img {{
+            width: 100%;
+            aspect-ratio: 4 / 3;
+            object-fit: contain;
+            background: #2c3e50;
+        }}
+        .photo span {{
+            display: block;
+            margin-top: 6px;
+            font-weight: bold;
+        }}
+    </style>
+</head>
+<body>
+    <h1>📸 Vos photos</h1>
+    <p>Touchez une photo pour la télécharger</p>
+    <div class="album">
+        {''.join(items)}
+    </div>
+</body>
+</html>
+"""
+        body = page.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def do_GET(self):
         """Gère les requêtes GET"""
-        # Gestion des fichiers ZIP (téléchargement galerie)
-        if self.path.endswith('.zip'):
-            filename = self.path.lstrip('/')
-            filepath = Path(self.photo_dir) / filename
-            
-            if filepath.exists() and filepath.is_file():
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/zip')
-                self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-                self.end_headers()
-                
-                with open(filepath, 'rb') as f:
-                    self.wfile.write(f.read())
-                return
+        # Routage sur le chemin seul (?utm=... ajouté par certains lecteurs de QR)
+        path = urlsplit(self.path).path
+        
+        # Mesures des plugins
+        if self.metrics and path in ('/metrics', '/metrics.json'):
+            # Réservé à la borne : les téléphones des invités n'y ont pas accès
+            if self.client_address[0] in LOCAL_CLIENTS:
+                self._send_metrics(path)
             else:
-                self.send_error(404, "Archive non trouvée")
-                return
+                self.send_error(404, "Page non trouvée")
+            return
+        
+        # Liens de partage courts (QR codes)
+        token_match = TOKEN_PATTERN.match(path)
+        if token_match:
+            self._serve_token(token_match.group(1))
+            return
+        
+        # Gestion des fichiers ZIP (téléchargement galerie)
+        if path.endswith('.zip'):
+            filename = unquote(path.lstrip('/'))
+            self._send_file(Path(self.photo_dir) / filename, 'application/zip', "Archive non trouvée")
+            return
+        
+        # Vignettes (album de session)
+        if path.startswith('/thumb/'):
+            self._send_thumbnail(unquote(path[7:]))
+            return
         
         # Gestion des photos individuelles
-        if self.path.startswith('/photo/'):
-            filename = self.path[7:]
-            filepath = Path(self.photo_dir) / filename
-            
-            if filepath.exists() and filepath.is_file():
-                self.send_response(200)
-                self.send_header('Content-Type', 'image/jpeg')
-                self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
-                self.end_headers()
-                
-                with open(filepath, 'rb') as f:
-                    self.wfile.write(f.read())
-            else:
-                self.send_error(404, "Photo non trouvée")
+        if path.startswith('/photo/'):
+            filename = Path(unquote(path[7:])).name
+            self._send_file(Path(self.photo_dir) / filename, 'image/jpeg', "Photo non trouvée")
         else:
             self.send_response(200)
             self.send_header('Content-Type', 'text/html; charset=utf-8')
@@ -136,13 +323,19 @@ class PhotoHTTPHandler(SimpleHTTPRequestHandler):
 class PhotoWebServer:
     """Serveur web pour partager les photos"""
     
-    def __init__(self, port=8000, photo_directory=None):
+    def __init__(self, port=8000, photo_directory=None, share_tokens_file=None, metrics=None,
+                 host='0.0.0.0'):
         self.port = port
+        self.host = host
+        self.metrics = metrics
         self.photo_dir = photo_directory or str(Path.home() / "Photos_photovinc")
         self.server = None
         self.thread = None
         self.running = False
         Path(self.photo_dir).mkdir(exist_ok=True)
+        
+        # Table persistante des liens de partage courts
+        self.share_tokens = ShareTokenStore(share_tokens_file)
     
     def get_local_ip(self):
         """Obtient l'adresse IP locale"""
@@ -163,19 +356,27 @@ class PhotoWebServer:
         ip = self.get_local_ip()
         return f"http://{ip}:{self.port}"
     
+    def get_share_url(self, kind, target):
+        """Retourne l'URL de partage courte d'une photo, d'une session ou d'un ZIP"""
+        return self.share_tokens.short_url(self.get_server_url(), kind, target)
+    
     def start(self):
         """Démarre le serveur en arrière-plan"""
         if self.running:
             logger.warning("Serveur déjà démarré")
             return False
 
+        # Oublier les liens dont les fichiers ont disparu (ZIP expirés...)
+        self.share_tokens.prune(self.photo_dir)
+        
         max_attempts = 5
         for attempt in range(max_attempts):
             try:
                 def handler(*args, **kwargs):
-                    PhotoHTTPHandler(*args, photo_directory=self.photo_dir, **kwargs)
+                    PhotoHTTPHandler(*args, photo_directory=self.photo_dir,
+                                     share_tokens=self.share_tokens, metrics=self.metrics, **kwargs)
                 
-                self.server = HTTPServer(('0.0.0.0', self.port), handler)
+                self.server = PhotoHTTPServer((self.host, self.port), handler)
                 
                 self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
                 self.thread.start()
@@ -224,7 +425,8 @@ class PhotoWebServer:
             'url': self.get_server_url() if self.running else None,
             'port': self.port,
             'photo_dir': self.photo_dir,
-            'local_ip': self.get_local_ip()
+            'local_ip': self.get_local_ip(),
+            'share_tokens': len(self.share_tokens.tokens)
         }
 
 
@@ -15,9 +15,13 @@ import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 import subprocess
-import requests
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageEnhance, ImageFilter, ImageDraw
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,8 @@ logger = logging.getLogger(__name__)
 class CloudStoragePlugin(PluginInterface):
     """Plugin de sauvegarde cloud automatique"""
     
+    dependencies = ["wifi"]
+    
     def __init__(self, config: PluginConfig):
         super().__init__(config)
         self.provider = config.settings.get('provider', 'local')  # local, gdrive, dropbox
@@ -144,12 +150,129 @@ class CloudStoragePlugin(PluginInterface):
         self.upload_queue.clear()
 
 
+# Recettes des filtres : suite d'opérations équivalentes à ImageEnhance
+FILTER_RECIPES = {
+    "clarendon": [("contrast", 1.3), ("color", 1.2)],    # Augmente contraste et saturation
+    "gingham": [("brightness", 1.1), ("color", 0.9)],    # Effet vintage chaud
+    "juno": [("color", 1.4), ("contrast", 1.1)],         # Tons chauds augmentés
+    "lark": [("brightness", 1.2), ("color", 1.3)],       # Luminosité élevée, saturation
+    "ludwig": [("contrast", 1.4)],                       # Contraste fort, tons froids
+    "valencia": [("color", 1.2), ("brightness", 1.05)],  # Tons chauds, fade
+    "xpro2": [("contrast", 1.5), ("color", 1.3)],        # Contraste extrême
+    "noir": [("color", 0.0)],                            # Noir et blanc
+    "warm": [("color", 1.3)],                            # Teinte chaude
+    "cool": [("color", 0.7)],                            # Teinte froide
+    "brighten": [("brightness", 1.3)],
+    "contrast": [("contrast", 1.4)],
+    "saturate": [("color", 1.5)],
+}
+
+# Poids de la conversion RGB -> L (ITU-R 601-2), comme Pillow
+_LUMA = (0.299, 0.587, 0.114)
+
+
+def _contrast_mean(img: Image.Image, recipe) -> int:
+    """Luminance moyenne vue par la première opération de contraste
+    
+    Calculée sur l'histogramme d'un sous-échantillon (1 pixel sur 16) ; les LUT
+    précédentes sont appliquées à l'histogramme, la saturation ne change pas
+    la luminance.
+    """
+    if img.width * img.height > 1_000_000:
+        img = img.resize((img.width // 4, img.height // 4), Image.Resampling.NEAREST)
+    hist = img.histogram()
+    channels = [hist[c * 256:(c + 1) * 256] for c in range(3)]
+    
+    for op, factor in recipe:
+        if op == 'contrast':
+            break
+        if op == 'brightness':
+            lut = _brightness_lut(factor)
+            remapped = []
+            for counts in channels:
+                new_counts = [0] * 256
+                for value, count in enumerate(counts):
+                    new_counts[lut[value]] += count
+                remapped.append(new_counts)
+            channels = remapped
+    
+    total = sum(channels[0]) or 1
+    mean = sum(_LUMA[c] * sum(v * n for v, n in enumerate(channels[c])) / total for c in range(3))
+    return int(mean + 0.5)
+
+
+def _clip(value: float) -> int:
+    return 0 if value < 0 else 255 if value > 255 else int(value)
+
+
+def _brightness_lut(factor: float) -> List[int]:
+    return [_clip(v * factor) for v in range(256)]
+
+
+def _contrast_lut(factor: float, mean: int) -> List[int]:
+    return [_clip(mean + factor * (v - mean)) for v in range(256)]
+
+
+def _color_matrix(factor: float) -> List[List[float]]:
+    """Saturation : mélange entre la luminance et la couleur d'origine"""
+    return [[(1 - factor) * _LUMA[col] + (factor if row == col else 0) for col in range(3)]
+            for row in range(3)]
+
+
+@lru_cache(maxsize=256)
+def compile_filter(filter_name: str, mean: Optional[int] = None):
+    """Compile un filtre en passes Image.point (LUT) / matrice de couleur
+    
+    Les LUT consécutives sont composées, les matrices consécutives multipliées :
+    chaque filtre tient en une passe, deux au plus quand LUT et matrice alternent.
+    """
+    program = []
+    for op, factor in FILTER_RECIPES[filter_name]:
+        if op == 'color':
+            matrix = _color_matrix(factor)
+            if program and program[-1][0] == 'matrix':
+                previous = program[-1][1]
+                matrix = [[sum(matrix[r][k] * previous[k][c] for k in range(3)) for c in range(3)]
+                          for r in range(3)]
+                program[-1] = ('matrix', matrix)
+            else:
+                program.append(('matrix', matrix))
+        else:
+            lut = _brightness_lut(factor) if op == 'brightness' else _contrast_lut(factor, mean)
+            if program and program[-1][0] == 'lut':
+                previous = program[-1][1]
+                lut = [lut[previous[v]] for v in range(256)]
+                program[-1] = ('lut', lut)
+            else:
+                program.append(('lut', lut))
+    
+    compiled = []
+    for kind, data in program:
+        if kind == 'lut':
+            compiled.append(('lut', tuple(data * 3)))
+        elif all(row == list(_LUMA) for row in data):
+            # Noir et blanc pur : la conversion en niveaux de gris est plus rapide
+            compiled.append(('gray', None))
+        else:
+            compiled.append(('matrix', tuple(v for row in data for v in row + [0])))
+    return tuple(compiled)
+
+
 class FilterPlugin(PluginInterface):
     """Plugin de filtres photo avancés (style Instagram)"""
     
     def __init__(self, config: PluginConfig):
         super().__init__(config)
         self.available_filters = []
+        
+        # Aperçu de tous les filtres : vignettes rendues en parallèle
+        self.preview_size = tuple(config.settings.get('preview_size', (240, 180)))
+        self.preview_workers = config.settings.get('preview_workers', min(4, os.cpu_count() or 1))
+        self.preview_budget_ms = config.settings.get('preview_budget_ms', 500)
+        self.preview_cache_size = config.settings.get('preview_cache_size', 8)
+        self._preview_pool = None
+        self._preview_cache = OrderedDict()
+        self._preview_lock = threading.Lock()
     
     def initialize(self) -> bool:
         logger.info("Initialisation FilterPlugin")
@@ -158,22 +281,112 @@ class FilterPlugin(PluginInterface):
             "valencia", "xpro2", "noir", "warm", "cool",
             "brighten", "contrast", "saturate"
         ]
+        self._preview_pool = ThreadPoolExecutor(max_workers=self.preview_workers,
+                                                thread_name_prefix="filter-preview")
         self._initialized = True
         return True
     
     def shutdown(self):
         logger.info("Arrêt FilterPlugin")
+        if self._preview_pool:
+            self._preview_pool.shutdown(wait=False, cancel_futures=True)
+            self._preview_pool = None
+        with self._preview_lock:
+            self._preview_cache.clear()
         self._initialized = False
     
     def get_status(self) -> Dict[str, Any]:
         return {
             "initialized": self._initialized,
             "available_filters": len(self.available_filters),
-            "filters": self.available_filters
+            "filters": self.available_filters,
+            "preview_workers": self.preview_workers,
+            "cached_previews": len(self._preview_cache)
         }
     
     def get_capabilities(self) -> List[str]:
-        return ["apply_filter", "preview_filter", "combine_filters"]
+        return ["apply_filter", "preview_filter", "preview_grid", "combine_filters"]
+    
+    def preview_filters(self, image_path: str, filters: Optional[List[str]] = None) -> Dict[str, Image.Image]:
+        """Vignettes de l'image pour chaque filtre (original compris)
+        
+        L'image est réduite une seule fois, puis chaque filtre est rendu sur la
+        vignette dans le pool de workers. Le résultat est mis en cache par image
+        source ; les filtres non terminés dans le budget de latence sont
+        remplacés par la vignette d'origine (et le résultat n'est pas mis en cache).
+        """
+        if not self._initialized:
+            return {}
+        
+        filters = filters or self.available_filters
+        try:
+            stat = os.stat(image_path)
+        except OSError as e:
+            logger.error(f"Erreur aperçu filtres: {e}")
+            return {}
+        
+        key = (str(image_path), stat.st_mtime_ns, self.preview_size, tuple(filters))
+        with self._preview_lock:
+            cached = self._preview_cache.get(key)
+            if cached is not None:
+                self._preview_cache.move_to_end(key)
+                return dict(cached)
+        
+        start = time.monotonic()
+        with Image.open(image_path) as img:
+            # Décodage JPEG réduit directement à la bonne échelle
+            img.draft('RGB', (self.preview_size[0] * 2, self.preview_size[1] * 2))
+            small = img.convert('RGB')
+        small.thumbnail(self.preview_size, Image.Resampling.LANCZOS)
+        
+        futures = {name: self._preview_pool.submit(self._apply_filter_logic, small, name)
+                   for name in filters}
+        remaining = self.preview_budget_ms / 1000 - (time.monotonic() - start)
+        wait(futures.values(), timeout=max(0, remaining))
+        
+        previews = {"original": small}
+        complete = True
+        for name, future in futures.items():
+            if future.done() and not future.exception():
+                previews[name] = future.result()
+            else:
+                future.cancel()
+                previews[name] = small
+                complete = False
+        
+        elapsed_ms = (time.monotonic() - start) * 1000
+        if complete:
+            with self._preview_lock:
+                self._preview_cache[key] = previews
+                while len(self._preview_cache) > self.preview_cache_size:
+                    self._preview_cache.popitem(last=False)
+        else:
+            logger.warning(f"Aperçu filtres incomplet après {elapsed_ms:.0f} ms")
+        
+        logger.info(f"Aperçu de {len(filters)} filtres en {elapsed_ms:.0f} ms")
+        return dict(previews)
+    
+    def preview_grid(self, image_path: str, columns: int = 4,
+                     filters: Optional[List[str]] = None) -> Optional[Image.Image]:
+        """Planche de vignettes légendées (une par filtre) pour choisir un filtre"""
+        previews = self.preview_filters(image_path, filters)
+        if not previews:
+            return None
+        
+        tile_w, tile_h = self.preview_size
+        label_h = 24
+        rows = (len(previews) + columns - 1) // columns
+        grid = Image.new('RGB', (columns * tile_w, rows * (tile_h + label_h)), '#2c3e50')
+        draw = ImageDraw.Draw(grid)
+        
+        for index, (name, thumb) in enumerate(previews.items()):
+            x = (index % columns) * tile_w
+            y = (index // columns) * (tile_h + label_h)
+            grid.paste(thumb, (x + (tile_w - thumb.width) // 2, y + (tile_h - thumb.height) // 2))
+            draw.text((x + tile_w // 2, y + tile_h + label_h // 2), name,
+                      fill='#ecf0f1', anchor='mm')
+        
+        return grid
     
     def apply_filter(self, image_path: str, filter_name: str, output_path: str) -> bool:
         """Applique un filtre à une image"""
@@ -190,82 +403,28 @@ class FilterPlugin(PluginInterface):
             return False
     
     def _apply_filter_logic(self, img: Image.Image, filter_name: str) -> Image.Image:
-        """Logique d'application des filtres"""
-        
-        if filter_name == "clarendon":
-            # Augmente contraste et saturation
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.3)
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(1.2)
-        
-        elif filter_name == "gingham":
-            # Effet vintage chaud
-            enhancer = ImageEnhance.Brightness(img)
-            img = enhancer.enhance(1.1)
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(0.9)
-        
-        elif filter_name == "juno":
-            # Tons chauds augmentés
-            enhancer = ImageEnhance.Color(img)
-            img = enhancer.enhance(1.4)
-            enhancer = ImageEnhance.Contrast(img)
-            return enhancer.enhance(1.1)
-        
-        elif filter_name == "lark":
-            # Luminosité élevée, saturation
-            enhancer = ImageEnhance.Brightness(img)
-            img = enhancer.enhance(1.2)
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(1.3)
-        
-        elif filter_name == "ludwig":
-            # Contraste fort, tons froids
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.4)
+        """Logique d'application des filtres (programme compilé, au plus 2 passes)"""
+        recipe = FILTER_RECIPES.get(filter_name)
+        if recipe is None:
             return img
         
-        elif filter_name == "valencia":
-            # Tons chauds, fade
-            enhancer = ImageEnhance.Color(img)
-            img = enhancer.enhance(1.2)
-            enhancer = ImageEnhance.Brightness(img)
-            return enhancer.enhance(1.05)
-        
-        elif filter_name == "xpro2":
-            # Contraste extrême, vignetage
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.5)
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(1.3)
-        
-        elif filter_name == "noir":
-            # Noir et blanc
-            return img.convert('L').convert('RGB')
-        
-        elif filter_name == "warm":
-            # Teinte chaude
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(1.3)
-        
-        elif filter_name == "cool":
-            # Teinte froide
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(0.7)
-        
-        elif filter_name == "brighten":
-            enhancer = ImageEnhance.Brightness(img)
-            return enhancer.enhance(1.3)
-        
-        elif filter_name == "contrast":
-            enhancer = ImageEnhance.Contrast(img)
-            return enhancer.enhance(1.4)
-        
-        elif filter_name == "saturate":
-            enhancer = ImageEnhance.Color(img)
-            return enhancer.enhance(1.5)
+        alpha = img.getchannel('A') if img.mode == 'RGBA' else None
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        # Le contraste dépend de la luminance moyenne : calculée une seule fois
+        mean = _contrast_mean(img, recipe) if any(op == 'contrast' for op, _ in recipe) else None
         
+        for kind, data in compile_filter(filter_name, mean):
+            if kind == 'lut':
+                img = img.point(data)
+            elif kind == 'gray':
+                img = img.convert('L').convert('RGB')
+            else:
+                img = img.convert('RGB', data)
+        
+        if alpha is not None:
+            img.putalpha(alpha)
         return img
 
 
@@ -461,13 +620,100 @@ class SocialSharePlugin(PluginInterface):
         return None
 
 
+DEFAULT_CASCADE = '/usr/share/opencv4/haarcascades/haarcascade_frontalface_default.xml'
+
+# Classifier chargé une fois par processus du pool de détection
+_worker_cascade = None
+_worker_detection_width = None
+
+
+def _load_rgb(image_path: str):
+    """Décode l'image une seule fois en tableau RGB partagé par OpenCV et PIL"""
+    import numpy as np
+    
+    with Image.open(image_path) as img:
+        return np.asarray(img.convert('RGB'))
+
+
+def _detect_faces_array(cascade, rgb, detection_width: int) -> List[Dict[str, int]]:
+    """Détecte les visages sur une copie réduite et ramène les coordonnées à l'échelle"""
+    import cv2
+    
+    height, width = rgb.shape[:2]
+    scale = min(1.0, detection_width / width)
+    
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (round(width * scale), round(height * scale)),
+                          interpolation=cv2.INTER_AREA)
+    
+    # Même minSize qu'avant la réduction (30 px de l'image d'origine) ; la
+    # fenêtre Haar de 24 px limite de toute façon aux visages de 24/scale px
+    min_side = max(1, round(30 * scale))
+    faces = cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(min_side, min_side)
+    )
+    
+    return [{"x": int(x / scale), "y": int(y / scale), "w": int(w / scale), "h": int(h / scale)}
+            for (x, y, w, h) in faces]
+
+
+def _enhance_array(rgb, output_path: str):
+    """Améliorations appliquées quand des visages sont présents"""
+    img = Image.fromarray(rgb)
+    
+    # Augmenter légèrement la luminosité et le contraste
+    enhancer = ImageEnhance.Brightness(img)
+    img = enhancer.enhance(1.1)
+    
+    enhancer = ImageEnhance.Contrast(img)
+    img = enhancer.enhance(1.05)
+    
+    # Léger flou pour adoucir la peau
+    img = img.filter(ImageFilter.SMOOTH)
+    
+    img.save(output_path, quality=95)
+
+
+def _init_face_worker(cascade_path: str, detection_width: int):
+    """Initialisation d'un processus du pool : charge le classifier une fois"""
+    global _worker_cascade, _worker_detection_width
+    import cv2
+    
+    _worker_cascade = cv2.CascadeClassifier(cascade_path)
+    _worker_detection_width = detection_width
+
+
+def _face_worker(image_path: str, output_path: Optional[str]):
+    """Tâche du pool : détection (et amélioration) d'une photo"""
+    import shutil
+    
+    rgb = _load_rgb(image_path)
+    faces = _detect_faces_array(_worker_cascade, rgb, _worker_detection_width)
+    
+    if output_path:
+        if faces:
+            _enhance_array(rgb, output_path)
+        elif Path(output_path) != Path(image_path):
+            shutil.copy2(image_path, output_path)
+    return faces
+
+
 class FaceDetectionPlugin(PluginInterface):
     """Plugin de détection et amélioration des visages"""
     
     def __init__(self, config: PluginConfig):
         super().__init__(config)
         self.auto_enhance = config.settings.get('auto_enhance', True)
+        self.cascade_path = config.settings.get('cascade_path', DEFAULT_CASCADE)
+        # Largeur de l'image de détection (les visages d'un photobooth sont grands)
+        self.detection_width = config.settings.get('detection_width', 640)
+        self.batch_workers = config.settings.get('batch_workers', min(4, os.cpu_count() or 1))
         self.face_cascade = None
+        self._batch_pool = None
     
     def initialize(self) -> bool:
         logger.info("Initialisation FaceDetectionPlugin")
@@ -476,12 +722,11 @@ class FaceDetectionPlugin(PluginInterface):
             import cv2
             
             # Charger le classifier Haar Cascade
-            cascade_path = '/usr/share/opencv4/haarcascades/haarcascade_frontalface_default.xml'
-            if not os.path.exists(cascade_path):
+            if not os.path.exists(self.cascade_path):
                 logger.warning("Haar Cascade non trouvé")
                 return False
             
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
+            self.face_cascade = cv2.CascadeClassifier(self.cascade_path)
             self._initialized = True
             return True
         except ImportError:
@@ -493,17 +738,23 @@ class FaceDetectionPlugin(PluginInterface):
     
     def shutdown(self):
         logger.info("Arrêt FaceDetectionPlugin")
+        if self._batch_pool:
+            self._batch_pool.shutdown(wait=False, cancel_futures=True)
+            self._batch_pool = None
         self._initialized = False
     
     def get_status(self) -> Dict[str, Any]:
         return {
             "initialized": self._initialized,
             "auto_enhance": self.auto_enhance,
-            "cascade_loaded": self.face_cascade is not None
+            "cascade_loaded": self.face_cascade is not None,
+            "detection_width": self.detection_width,
+            "batch_workers": self.batch_workers
         }
     
     def get_capabilities(self) -> List[str]:
-        return ["detect_faces", "count_faces", "enhance_faces", "add_effects"]
+        return ["detect_faces", "count_faces", "enhance_faces", "add_effects",
+                "detect_faces_batch", "enhance_session"]
     
     def detect_faces(self, image_path: str) -> List[Dict[str, int]]:
         """Détecte les visages dans une image"""
@@ -511,24 +762,8 @@ class FaceDetectionPlugin(PluginInterface):
             return []
         
         try:
-            import cv2
-            import numpy as np
-            
-            # Charger l'image
-            img = cv2.imread(image_path)
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Détecter les visages
-            faces = self.face_cascade.detectMultiScale(
-                gray, 
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
-            
-            # Convertir en liste de dictionnaires
-            return [{"x": int(x), "y": int(y), "w": int(w), "h": int(h)} 
-                   for (x, y, w, h) in faces]
+            rgb = _load_rgb(image_path)
+            return _detect_faces_array(self.face_cascade, rgb, self.detection_width)
         except Exception as e:
             logger.error(f"Erreur détection visages: {e}")
             return []
@@ -544,8 +779,9 @@ class FaceDetectionPlugin(PluginInterface):
             return False
         
         try:
-            # Détection
-            faces = self.detect_faces(image_path)
+            # Un seul décodage pour la détection et l'amélioration
+            rgb = _load_rgb(image_path)
+            faces = _detect_faces_array(self.face_cascade, rgb, self.detection_width)
             
             if not faces:
                 # Pas de visages, copier simplement
@@ -553,24 +789,60 @@ class FaceDetectionPlugin(PluginInterface):
                 shutil.copy2(image_path, output_path)
                 return True
             
-            # Appliquer des améliorations
-            img = Image.open(image_path)
-            
-            # Augmenter légèrement la luminosité et le contraste
-            enhancer = ImageEnhance.Brightness(img)
-            img = enhancer.enhance(1.1)
-            
-            enhancer = ImageEnhance.Contrast(img)
-            img = enhancer.enhance(1.05)
-            
-            # Léger flou pour adoucir la peau
-            img = img.filter(ImageFilter.SMOOTH)
-            
-            img.save(output_path, quality=95)
+            _enhance_array(rgb, output_path)
             return True
         except Exception as e:
             logger.error(f"Erreur amélioration: {e}")
             return False
+    
+    def _run_batch(self, tasks: List[tuple]) -> Dict[str, Optional[List[Dict[str, int]]]]:
+        """Exécute les tâches (photo, sortie) dans le pool de processus"""
+        if not self._initialized:
+            return {}
+        
+        if self._batch_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            import multiprocessing
+            # forkserver : pas de fork d'un processus qui fait tourner Tk et des threads
+            self._batch_pool = ProcessPoolExecutor(
+                max_workers=self.batch_workers,
+                mp_context=multiprocessing.get_context('forkserver'),
+                initializer=_init_face_worker,
+                initargs=(self.cascade_path, self.detection_width)
+            )
+        
+        futures = {path: self._batch_pool.submit(_face_worker, path, output)
+                   for path, output in tasks}
+        
+        results = {}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                logger.error(f"Erreur visages {Path(path).name}: {e}")
+                results[path] = None
+        return results
+    
+    def detect_faces_batch(self, image_paths: List[str]) -> Dict[str, Optional[List[Dict[str, int]]]]:
+        """Détecte les visages de toute une session en parallèle (None en cas d'erreur)"""
+        return self._run_batch([(str(path), None) for path in image_paths])
+    
+    def enhance_session(self, image_paths: List[str],
+                        output_dir: Optional[str] = None) -> Dict[str, Optional[List[Dict[str, int]]]]:
+        """Améliore toutes les photos d'une session en parallèle
+        
+        Les originaux ne sont jamais modifiés : sans output_dir, la version
+        améliorée est écrite à côté (photo_..._enhanced.jpg).
+        """
+        tasks = []
+        for path in image_paths:
+            path = Path(path)
+            if output_dir:
+                output = Path(output_dir) / path.name
+            else:
+                output = path.with_name(f"{path.stem}_enhanced{path.suffix}")
+            tasks.append((str(path), str(output)))
+        return self._run_batch(tasks)
 
 
 # Enregistrement des nouveaux plugins dans le manager
@@ -580,7 +852,8 @@ def register_advanced_plugins(manager):
     manager.register_plugin("filters", FilterPlugin)
     manager.register_plugin("analytics", AnalyticsPlugin)
     manager.register_plugin("social", SocialSharePlugin)
-    manager.register_plugin("faces", FaceDetectionPlugin)
+    # OpenCV n'est chargé qu'à la première utilisation de la détection
+    manager.register_lazy_plugin("faces", __name__, "FaceDetectionPlugin")
     
     # Ajouter les configs par défaut si nécessaire
     if "cloud" not in manager.plugin_configs:
@@ -596,7 +869,7 @@ def register_advanced_plugins(manager):
             name="filters",
             enabled=True,
             priority=11,
-            settings={}
+            settings={"preview_size": [240, 180], "preview_budget_ms": 500}
         )
     
     if "analytics" not in manager.plugin_configs:
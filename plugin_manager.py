@@ -5,11 +5,17 @@ Architecture modulaire pour gérer les différents composants
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
 import json
 from pathlib import Path
 from dataclasses import dataclass, asdict
+import importlib
 import logging
+import threading
+import time
+
+from plugin_metrics import instrument_class
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -32,11 +38,24 @@ class PluginConfig:
 class PluginInterface(ABC):
     """Interface de base pour tous les plugins"""
     
+    # Plugins à initialiser avant celui-ci (noms d'enregistrement),
+    # surchargeable par le réglage "dependencies"
+    dependencies: List[str] = []
+    # Durée maximale d'initialisation en secondes (réglage "init_timeout")
+    init_timeout: float = 30.0
+    # Période de rafraîchissement du statut en secondes (réglage "status_interval")
+    status_interval: float = 10.0
+    
     def __init__(self, config: PluginConfig):
         self.config = config
         self.name = config.name
         self._initialized = False
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Durée, nombre d'appels et échecs de chaque méthode publique (plugin_metrics)
+        instrument_class(cls)
+    
     @abstractmethod
     def initialize(self) -> bool:
         """Initialise le plugin"""
@@ -60,6 +79,15 @@ class PluginInterface(ABC):
     def is_initialized(self) -> bool:
         return self._initialized
     
+    def get_dependencies(self) -> List[str]:
+        return list(self.config.settings.get('dependencies', self.dependencies))
+    
+    def get_init_timeout(self) -> float:
+        return float(self.config.settings.get('init_timeout', self.init_timeout))
+    
+    def get_status_interval(self) -> float:
+        return float(self.config.settings.get('status_interval', self.status_interval))
+    
     def update_config(self, settings: Dict[str, Any]):
         """Met à jour la configuration"""
         self.config.settings.update(settings)
@@ -328,6 +356,136 @@ class KeyboardPlugin(PluginInterface):
         return self.keyboard_process is not None
 
 
+class PluginStatusSupervisor:
+    """Rafraîchit le statut des plugins en arrière-plan
+    
+    Chaque plugin est interrogé à sa propre période (get_status_interval)
+    dans un pool de threads : une commande CUPS ou un appel HTTP lent ne
+    bloque ni l'interface ni les autres plugins. Les résultats sont servis
+    depuis un cache horodaté et les écouteurs ne sont prévenus que lorsqu'un
+    statut change. Les écouteurs sont appelés depuis un thread du pool.
+    """
+    
+    def __init__(self, manager: 'PluginManager', max_workers: int = 4):
+        self.manager = manager
+        self.max_workers = max_workers
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._next_refresh: Dict[str, float] = {}
+        self._in_flight = set()
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+        self._executor = None
+    
+    def start(self):
+        """Démarre la surveillance (sans effet si elle tourne déjà)"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="plugin-status")
+        self._thread = threading.Thread(target=self._loop, name="plugin-status", daemon=True)
+        self._thread.start()
+        logger.info("Surveillance du statut des plugins démarrée")
+    
+    def stop(self):
+        """Arrête la surveillance"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
+        logger.info("Surveillance du statut des plugins arrêtée")
+    
+    def is_running(self) -> bool:
+        return self._running
+    
+    def add_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """callback(nom, entrée) est appelé à chaque changement de statut"""
+        with self._lock:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+    
+    def get(self, plugin_type: str) -> Optional[Dict[str, Any]]:
+        """Dernier statut connu : {"status", "updated" (horodatage), "duration", "error"}"""
+        with self._lock:
+            entry = self._cache.get(plugin_type)
+            return dict(entry) if entry else None
+    
+    def get_all(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._cache.items()}
+    
+    def refresh(self, plugin_type: Optional[str] = None):
+        """Demande un rafraîchissement immédiat (d'un plugin ou de tous)"""
+        with self._lock:
+            if plugin_type is None:
+                self._next_refresh.clear()
+            else:
+                self._next_refresh.pop(plugin_type, None)
+        self._wakeup.set()
+    
+    def _loop(self):
+        while self._running:
+            now = time.monotonic()
+            next_due = now + 60
+            with self._lock:
+                # Seuls les plugins déjà chargés sont surveillés (pas de chargement différé)
+                plugins = list(self.manager.plugins.items())
+                for name, plugin in plugins:
+                    due = self._next_refresh.get(name, 0)
+                    if due <= now and name not in self._in_flight:
+                        self._in_flight.add(name)
+                        self._next_refresh[name] = now + plugin.get_status_interval()
+                        self._executor.submit(self._refresh_plugin, name, plugin)
+                        due = self._next_refresh[name]
+                    next_due = min(next_due, due)
+                for name in set(self._cache) - {name for name, _ in plugins}:
+                    del self._cache[name]
+            
+            self._wakeup.wait(timeout=max(0.05, next_due - time.monotonic()))
+            self._wakeup.clear()
+    
+    def _refresh_plugin(self, name: str, plugin: PluginInterface):
+        start = time.monotonic()
+        status, error = None, None
+        try:
+            status = plugin.get_status()
+        except Exception as e:
+            error = str(e)
+        entry = {
+            "status": status,
+            "updated": time.time(),
+            "duration": time.monotonic() - start,
+            "error": error
+        }
+        
+        with self._lock:
+            self._in_flight.discard(name)
+            previous = self._cache.get(name)
+            self._cache[name] = entry
+            changed = previous is None or (previous["status"], previous["error"]) != (status, error)
+            listeners = list(self._listeners) if changed else []
+        
+        if changed and error:
+            logger.error(f"Erreur statut {name}: {error}")
+        for callback in listeners:
+            try:
+                callback(name, dict(entry))
+            except Exception as e:
+                logger.error(f"Erreur notification statut {name}: {e}")
+
+
 class PluginManager:
     """Gestionnaire central des plugins"""
     
@@ -335,6 +493,16 @@ class PluginManager:
         self.plugins: Dict[str, PluginInterface] = {}
         self.config_file = config_file or Path.home() / ".photovinc_plugins.json"
         self.plugin_configs: Dict[str, PluginConfig] = {}
+        self.init_timings: Dict[str, float] = {}
+        # Plugins chargés à la demande : type -> (module, classe ou fonction d'enregistrement)
+        self.lazy_plugins: Dict[str, Tuple[str, str]] = {}
+        # Chargements différés en cours : résolus avec le plugin une fois initialisé
+        self._loading: Dict[str, Future] = {}
+        # Plugins différés en cours de chargement par le thread courant (cycles)
+        self._loading_here = threading.local()
+        self._started = False
+        self._lock = threading.RLock()
+        self.status_supervisor: Optional[PluginStatusSupervisor] = None
         
     def load_config(self):
         """Charge la configuration des plugins"""
@@ -384,33 +552,243 @@ class PluginManager:
                 self.plugins[plugin_type] = plugin
                 logger.info(f"Plugin {plugin_type} enregistré")
     
-    def initialize_all(self) -> Dict[str, bool]:
-        """Initialise tous les plugins"""
-        results = {}
-        # Trier par priorité
-        sorted_plugins = sorted(
-            self.plugins.items(), 
-            key=lambda x: self.plugin_configs[x[0]].priority
-        )
+    def register_lazy_plugin(self, plugin_type: str, module_name: str, attribute: str):
+        """Enregistre un plugin sans importer son module
         
-        for name, plugin in sorted_plugins:
-            logger.info(f"Initialisation de {name}...")
-            results[name] = plugin.initialize()
+        attribute est soit la classe du plugin, soit une fonction
+        register_*(manager) du module. L'import (et celui des dépendances
+        lourdes du module) n'a lieu qu'au premier get_plugin().
+        """
+        config = self.plugin_configs.get(plugin_type)
+        if config is not None and not config.enabled:
+            return
+        with self._lock:
+            if plugin_type not in self.plugins:
+                self.lazy_plugins[plugin_type] = (module_name, attribute)
+                logger.info(f"Plugin {plugin_type} enregistré (chargement à la demande)")
+    
+    def _load_lazy_plugin(self, plugin_type: str) -> Optional[PluginInterface]:
+        """Importe, enregistre et si besoin initialise un plugin différé
         
-        return results
+        Le verrou n'est tenu que pour réserver le chargement : import et
+        initialisation (parfois réseau) se font hors verrou, et les autres
+        appelants attendent le Future de ce plugin seulement.
+        """
+        with self._lock:
+            loading = self._loading.get(plugin_type)
+            if loading is None:
+                if plugin_type in self.plugins:
+                    return self.plugins[plugin_type]
+                spec = self.lazy_plugins.get(plugin_type)
+                if spec is None:
+                    return None
+                loading = self._loading[plugin_type] = Future()
+            else:
+                spec = None
+        if spec is None:
+            # Chargement déjà lancé par un autre thread
+            return loading.result()
+        
+        module_name, attribute = spec
+        start = time.monotonic()
+        plugin = None
+        try:
+            target = getattr(importlib.import_module(module_name), attribute)
+            if isinstance(target, type):
+                self.register_plugin(plugin_type, target)
+            else:
+                target(self)
+            
+            plugin = self.plugins.get(plugin_type)
+            if plugin is not None and self._started:
+                failed = self._load_dependencies(plugin_type, plugin)
+                if failed:
+                    logger.error(f"{plugin_type} non initialisé: échec de {', '.join(failed)}")
+                else:
+                    success, self.init_timings[plugin_type] = self._timed_initialize(plugin_type, plugin)
+                    if not success:
+                        logger.warning(f"Plugin {plugin_type} chargé mais non initialisé")
+            logger.info(f"Plugin {plugin_type} chargé à la demande en "
+                        f"{time.monotonic() - start:.2f}s")
+        except Exception as e:
+            logger.error(f"Chargement du plugin {plugin_type} impossible: {e}")
+            plugin = None
+        finally:
+            with self._lock:
+                self.lazy_plugins.pop(plugin_type, None)
+                del self._loading[plugin_type]
+            loading.set_result(plugin)
+        return plugin
+    
+    def _load_dependencies(self, plugin_type: str, plugin: PluginInterface) -> List[str]:
+        """Charge les dépendances d'un plugin différé ; renvoie celles en échec
+        
+        Mêmes règles qu'initialize_all : une dépendance non enregistrée est
+        ignorée, une dépendance non initialisée empêche l'initialisation.
+        """
+        chain = getattr(self._loading_here, 'chain', None)
+        if chain is None:
+            chain = self._loading_here.chain = set()
+        chain.add(plugin_type)
+        failed = []
+        try:
+            for dependency in plugin.get_dependencies():
+                if dependency in chain:
+                    logger.error(f"Dépendances circulaires: {plugin_type} -> {dependency}")
+                    failed.append(dependency)
+                    continue
+                required = self.get_plugin(dependency)
+                if required is None:
+                    logger.warning(f"{plugin_type}: dépendance {dependency} non enregistrée, ignorée")
+                elif not required.is_initialized():
+                    failed.append(dependency)
+        finally:
+            chain.discard(plugin_type)
+        return failed
+    
+    def is_loading(self, plugin_type: str) -> bool:
+        """Vrai tant qu'un plugin différé n'est pas chargé (ou en cours de chargement)"""
+        return plugin_type in self._loading or plugin_type in self.lazy_plugins
+    
+    def preload_plugins(self, plugin_types: Optional[List[str]] = None) -> threading.Thread:
+        """Charge les plugins différés dans un thread, une fois l'interface affichée"""
+        with self._lock:
+            names = list(plugin_types if plugin_types is not None else self.lazy_plugins)
+        
+        def load():
+            for name in names:
+                self.get_plugin(name)
+        
+        thread = threading.Thread(target=load, name="plugin-preload", daemon=True)
+        thread.start()
+        return thread
+    
+    def initialize_all(self, max_workers: Optional[int] = None) -> Dict[str, bool]:
+        """Initialise tous les plugins chargés
+        
+        Les plugins sont initialisés en parallèle dès que leurs dépendances
+        sont prêtes : le démarrage dure autant que la plus longue chaîne de
+        dépendances au lieu de la somme des initialisations. Un plugin qui
+        dépasse son délai ou dont une dépendance a échoué est marqué en échec.
+        Les durées sont conservées dans self.init_timings. Les plugins
+        différés seront initialisés à leur premier get_plugin().
+        """
+        results: Dict[str, bool] = {}
+        self.init_timings = {}
+        pending = dict(self.plugins)
+        if not pending:
+            return results
+        
+        dependencies = {}
+        for name, plugin in pending.items():
+            dependencies[name] = []
+            for dependency in plugin.get_dependencies():
+                if dependency in pending:
+                    dependencies[name].append(dependency)
+                else:
+                    logger.warning(f"{name}: dépendance {dependency} non enregistrée, ignorée")
+        
+        priority = lambda name: self.plugin_configs[name].priority
+        started = time.monotonic()
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(pending),
+                                      thread_name_prefix="plugin-init")
+        try:
+            while pending or running:
+                # Une dépendance en échec condamne les plugins qui en dépendent
+                for name in list(pending):
+                    failed = [d for d in dependencies[name] if results.get(d) is False]
+                    if failed:
+                        logger.error(f"{name} non initialisé: échec de {', '.join(failed)}")
+                        results[name] = False
+                        del pending[name]
+                
+                ready = sorted((name for name in pending
+                                if all(results.get(d) for d in dependencies[name])), key=priority)
+                for name in ready:
+                    plugin = pending.pop(name)
+                    logger.info(f"Initialisation de {name}...")
+                    future = executor.submit(self._timed_initialize, name, plugin)
+                    running[future] = (name, time.monotonic(), plugin.get_init_timeout())
+                
+                if not running:
+                    if pending:
+                        logger.error(f"Dépendances circulaires: {', '.join(sorted(pending))}")
+                        results.update({name: False for name in pending})
+                    break
+                
+                deadline = min(start + timeout for _, start, timeout in running.values())
+                done, _ = wait(running, timeout=max(0, deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, _, _ = running.pop(future)
+                    results[name], self.init_timings[name] = future.result()
+                
+                now = time.monotonic()
+                for future, (name, start, timeout) in list(running.items()):
+                    if now - start >= timeout:
+                        # Le thread ne peut pas être interrompu : on ne l'attend plus
+                        del running[future]
+                        results[name] = False
+                        self.init_timings[name] = now - start
+                        logger.error(f"Initialisation de {name} abandonnée après {timeout:g}s")
+        finally:
+            executor.shutdown(wait=False)
+        
+        elapsed = time.monotonic() - started
+        timings = ', '.join(f"{name} {duration:.2f}s" for name, duration in
+                            sorted(self.init_timings.items(), key=lambda x: -x[1]))
+        logger.info(f"Plugins initialisés en {elapsed:.2f}s "
+                    f"(somme {sum(self.init_timings.values()):.2f}s): {timings}")
+        self._started = True
+        
+        return {name: results[name] for name in sorted(results, key=priority)}
+    
+    def _timed_initialize(self, name: str, plugin: PluginInterface) -> Tuple[bool, float]:
+        """Initialise un plugin dans un thread du pool et mesure la durée"""
+        start = time.monotonic()
+        try:
+            success = bool(plugin.initialize())
+        except Exception as e:
+            logger.error(f"Erreur initialisation {name}: {e}")
+            success = False
+        return success, time.monotonic() - start
     
     def shutdown_all(self):
         """Arrête tous les plugins"""
+        if self.status_supervisor:
+            self.status_supervisor.stop()
         for name, plugin in self.plugins.items():
             logger.info(f"Arrêt de {name}...")
             plugin.shutdown()
     
-    def get_plugin(self, plugin_type: str) -> Optional[PluginInterface]:
-        """Récupère un plugin spécifique"""
-        return self.plugins.get(plugin_type)
+    def get_plugin(self, plugin_type: str, wait: bool = True) -> Optional[PluginInterface]:
+        """Récupère un plugin spécifique (en chargeant un plugin différé)
+        
+        Avec wait=False (thread Tk), ne bloque jamais : un plugin différé est
+        chargé en arrière-plan et None est renvoyé jusqu'à ce qu'il soit prêt
+        (voir is_loading).
+        """
+        plugin = self.plugins.get(plugin_type)
+        # Enregistré mais pas encore initialisé tant que le chargement est en cours
+        if plugin_type in self._loading or (plugin is None and plugin_type in self.lazy_plugins):
+            if not wait:
+                if plugin_type not in self._loading:
+                    self.preload_plugins([plugin_type])
+                return None
+            plugin = self._load_lazy_plugin(plugin_type)
+        return plugin
+    
+    def start_status_supervisor(self) -> PluginStatusSupervisor:
+        """Démarre (une seule fois) la surveillance du statut en arrière-plan"""
+        with self._lock:
+            if self.status_supervisor is None:
+                self.status_supervisor = PluginStatusSupervisor(self)
+        self.status_supervisor.start()
+        return self.status_supervisor
     
     def get_all_status(self) -> Dict[str, Dict[str, Any]]:
-        """Récupère le statut de tous les plugins"""
+        """Récupère le statut de tous les plugins (appel synchrone, voir start_status_supervisor)"""
         return {name: plugin.get_status() 
                 for name, plugin in self.plugins.items()}
     
@@ -424,6 +802,7 @@ class PluginManager:
         """Désactive un plugin"""
         if plugin_type in self.plugin_configs:
             self.plugin_configs[plugin_type].enabled = False
+            self.lazy_plugins.pop(plugin_type, None)
             if plugin_type in self.plugins:
                 self.plugins[plugin_type].shutdown()
                 del self.plugins[plugin_type]
@@ -454,6 +833,7 @@ if __name__ == "__main__":
     # Initialiser tous les plugins
     init_results = manager.initialize_all()
     print("Résultats d'initialisation:", init_results)
+    print("Durées d'initialisation:", {name: f"{t:.3f}s" for name, t in manager.init_timings.items()})
     
     # Obtenir le statut
     status = manager.get_all_status()
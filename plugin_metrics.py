@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Mesure des appels de méthodes des plugins photovinc
+Compteurs, histogrammes de latence et erreurs par méthode, exportés en JSON
+ou au format texte Prometheus et conservés dans un fichier tournant
+"""
+
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+from datetime import datetime
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bornes supérieures des classes de l'histogramme (secondes)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Accesseurs triviaux appelés en boucle : pas de mesure
+EXCLUDED_METHODS = {
+    'get_capabilities', 'is_initialized', 'update_config',
+    'get_dependencies', 'get_init_timeout', 'get_status_interval'
+}
+
+
+class MethodStats:
+    """Statistiques d'une méthode d'un plugin"""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, duration: float, error: bool):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if error:
+            self.errors += 1
+        for i, bound in enumerate(self.buckets):
+            if duration <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+    
+    def cumulative(self):
+        """Comptes cumulés par borne (convention Prometheus), +Inf en dernier"""
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimation d'un quantile : borne supérieure de la classe qui le contient"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, cumulated in zip(self.buckets, self.cumulative()):
+            if cumulated >= rank:
+                return bound
+        return self.max
+    
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = self.cumulative()
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else None,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "buckets": {**{str(b): c for b, c in zip(self.buckets, cumulative)},
+                        "+Inf": cumulative[-1]}
+        }
+
+
+class PluginMetrics:
+    """Registre des mesures d'appels, partagé par tous les plugins"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._stats: Dict[tuple, MethodStats] = {}
+        self._lock = threading.Lock()
+        
+        self.metrics_file = None
+        self.max_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def observe(self, plugin: str, method: str, duration: float, error: bool = False):
+        """Enregistre un appel"""
+        key = (plugin, method)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = MethodStats(self.buckets)
+            stats.observe(duration, error)
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started = time.time()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Toutes les mesures, sous forme sérialisable en JSON"""
+        with self._lock:
+            methods = {f"{plugin}.{method}": stats.to_dict()
+                       for (plugin, method), stats in sorted(self._stats.items())}
+        return {
+            "generated": datetime.now().isoformat(timespec='seconds'),
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "methods": methods
+        }
+    
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+    
+    def to_prometheus(self) -> str:
+        """Format texte d'exposition Prometheus"""
+        lines = [
+            "# HELP photovinc_plugin_call_seconds Durée des appels de méthodes de plugins",
+            "# TYPE photovinc_plugin_call_seconds histogram"
+        ]
+        errors = [
+            "# HELP photovinc_plugin_call_errors_total Appels en échec (exception ou False)",
+            "# TYPE photovinc_plugin_call_errors_total counter"
+        ]
+        with self._lock:
+            for (plugin, method), stats in sorted(self._stats.items()):
+                labels = f'plugin="{plugin}",method="{method}"'
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, stats.cumulative()):
+                    lines.append(f'photovinc_plugin_call_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"photovinc_plugin_call_seconds_sum{{{labels}}} {stats.total:.6f}")
+                lines.append(f"photovinc_plugin_call_seconds_count{{{labels}}} {stats.count}")
+                errors.append(f"photovinc_plugin_call_errors_total{{{labels}}} {stats.errors}")
+        return "\n".join(lines + errors) + "\n"
+    
+    # --- Fichier tournant ---
+    
+    def start_persistence(self, metrics_file: Optional[Union[str, Path]] = None,
+                          interval: float = 60, max_bytes: int = 1024 * 1024):
+        """Ajoute périodiquement un instantané (une ligne JSON) au fichier
+        
+        Au-delà de max_bytes, le fichier est renommé en .1 et un nouveau commence.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.metrics_file = Path(metrics_file or Path.home() / ".photovinc_metrics.jsonl")
+        self.max_bytes = max_bytes
+        self._stop.clear()
+        
+        def loop():
+            while not self._stop.wait(interval):
+                self.flush()
+        
+        self._thread = threading.Thread(target=loop, name="plugin-metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Mesures des plugins enregistrées dans {self.metrics_file}")
+    
+    def stop_persistence(self):
+        """Arrête l'enregistrement après un dernier instantané"""
+        if self._thread:
+            self._stop.set()
+            self._thread.join(timeout=2)
+            self._thread = None
+            self.flush()
+    
+    def flush(self):
+        """Écrit un instantané dans le fichier tournant"""
+        if self.metrics_file is None:
+            return
+        try:
+            if self.metrics_file.exists() and self.metrics_file.stat().st_size > self.max_bytes:
+                os.replace(self.metrics_file, self.metrics_file.with_name(self.metrics_file.name + '.1'))
+            with open(self.metrics_file, 'a') as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+        except Exception as e:
+            logger.error(f"Erreur écriture mesures: {e}")
+
+
+# Registre global utilisé par PluginInterface
+METRICS = PluginMetrics()
+
+_active = threading.local()
+
+
+def instrument_method(func, registry: Optional[PluginMetrics] = None):
+    """Enveloppe une méthode de plugin : durée, appel et échec (exception ou False)"""
+    
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        # Un appel imbriqué (super(), méthode redéfinie) n'est compté qu'une fois
+        key = (id(self), func.__name__)
+        active = _active.__dict__.setdefault('calls', set())
+        if key in active:
+            return func(self, *args, **kwargs)
+        
+        active.add(key)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = func(self, *args, **kwargs)
+            failed = result is False
+            return result
+        finally:
+            active.discard(key)
+            (registry or METRICS).observe(getattr(self, 'name', type(self).__name__),
+                                          func.__name__, time.perf_counter() - start, failed)
+    
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument_class(cls, registry: Optional[PluginMetrics] = None):
+    """Mesure toutes les méthodes publiques définies par une classe de plugin"""
+    for name, attr in list(vars(cls).items()):
+        if (name.startswith('_') or name in EXCLUDED_METHODS
+                or not inspect.isfunction(attr) or getattr(attr, '__instrumented__', False)):
+            continue
+        setattr(cls, name, instrument_method(attr, registry))
+    return cls
+
+
+if __name__ == "__main__":
+    import random
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    class Demo:
+        name = "demo"
+        
+        def capture_image(self, output_path):
+            time.sleep(random.uniform(0.01, 0.2))
+            return random.random() > 0.1
+    
+    instrument_class(Demo)
+    demo = Demo()
+    for _ in range(30):
+        demo.capture_image("/tmp/x.jpg")
+    
+    print(METRICS.to_json())
+    print(METRICS.to_prometheus())
@@ -7,9 +7,14 @@ Permet d'activer/désactiver et configurer chaque plugin
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import json
+import queue
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 
+# Période de lecture des changements de statut signalés par le superviseur
+STATUS_POLL_MS = 200
+
 
 class PluginManagerUI:
     """Interface de gestion des plugins"""
@@ -23,8 +28,38 @@ class PluginManagerUI:
         self.root.geometry("900x700")
         self.root.configure(bg='#2c3e50')
         
+        # Statuts lus en arrière-plan : l'interface n'appelle jamais get_status()
+        self.supervisor = plugin_manager.start_status_supervisor()
+        
         self.setup_ui()
         self.refresh_all()
+        
+        # Tkinter n'est pas thread-safe : le superviseur dépose ses changements
+        # dans une file, lue par le thread Tk
+        self._status_changes = queue.Queue()
+        self.supervisor.add_listener(self._on_status_changed)
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+        self._poll_id = self.root.after(STATUS_POLL_MS, self._drain_status_changes)
+    
+    def _on_status_changed(self, plugin_id: str, entry: Dict[str, Any]):
+        """Notification du superviseur (thread de fond) : aucun appel Tk ici"""
+        self._status_changes.put_nowait(plugin_id)
+    
+    def _drain_status_changes(self):
+        changed = set()
+        while True:
+            try:
+                changed.add(self._status_changes.get_nowait())
+            except queue.Empty:
+                break
+        for plugin_id in changed:
+            self.refresh_plugin_status(plugin_id)
+        self._poll_id = self.root.after(STATUS_POLL_MS, self._drain_status_changes)
+    
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.supervisor.remove_listener(self._on_status_changed)
+            self.root.after_cancel(self._poll_id)
     
     def setup_ui(self):
         """Configure l'interface"""
@@ -392,14 +427,21 @@ class PluginManagerUI:
         )
         status_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Obtenir le statut
-        plugin = self.manager.get_plugin(plugin_id)
-        if plugin:
-            status = plugin.get_status()
-            status_json = json.dumps(status, indent=2)
-            status_text.insert(tk.END, status_json)
+        # Dernier statut connu (le superviseur le relit en arrière-plan)
+        plugin = self.manager.plugins.get(plugin_id)
+        entry = self.supervisor.get(plugin_id)
+        if plugin and entry:
+            updated = datetime.fromtimestamp(entry['updated']).strftime('%H:%M:%S')
+            status_text.insert(tk.END, f"Mis à jour à {updated}\n\n")
+            if entry['error']:
+                status_text.insert(tk.END, f"Erreur: {entry['error']}")
+            else:
+                status_text.insert(tk.END, json.dumps(entry['status'], indent=2, default=str))
+        elif plugin:
+            status_text.insert(tk.END, "Lecture du statut en cours, réessayez dans un instant")
         else:
             status_text.insert(tk.END, "Plugin non chargé ou désactivé")
+        self.supervisor.refresh(plugin_id)
         
         tk.Button(
             status_win,
@@ -417,10 +459,11 @@ class PluginManagerUI:
             return
         
         frame = self.plugin_frames[plugin_id]
-        plugin = self.manager.get_plugin(plugin_id)
+        # Pas de get_plugin() : un plugin différé ne doit pas être chargé ici
+        plugin = self.manager.plugins.get(plugin_id)
+        entry = self.supervisor.get(plugin_id)
         
         if plugin and plugin.is_initialized():
-            status = plugin.get_status()
             status_text = f"Statut: ✓ Initialisé"
             status_color = '#2ecc71'
             
@@ -428,6 +471,11 @@ class PluginManagerUI:
             caps = plugin.get_capabilities()
             caps_text = f"Capacités: {', '.join(caps)}"
             
+            frame['enabled_var'].set(True)
+        elif plugin_id in self.manager.lazy_plugins:
+            status_text = "Statut: chargé à la première utilisation"
+            status_color = '#f39c12'
+            caps_text = "Capacités: -"
             frame['enabled_var'].set(True)
         else:
             status_text = "Statut: ✗ Non initialisé"
@@ -435,6 +483,13 @@ class PluginManagerUI:
             caps_text = "Capacités: -"
             frame['enabled_var'].set(False)
         
+        if entry:
+            if entry['error']:
+                status_text += f" - erreur: {entry['error']}"
+                status_color = '#e74c3c'
+            updated = datetime.fromtimestamp(entry['updated']).strftime('%H:%M:%S')
+            status_text += f" (mis à jour à {updated})"
+        
         frame['status_label'].config(text=status_text, fg=status_color)
         frame['caps_label'].config(text=caps_text)
         
@@ -445,14 +500,17 @@ class PluginManagerUI:
             frame['priority_spin'].insert(0, str(priority))
     
     def refresh_all(self):
-        """Actualise tous les plugins"""
-        self.status_label.config(text="Actualisation...", fg='#f39c12')
-        self.root.update()
+        """Actualise tous les plugins
+        
+        Affiche immédiatement les statuts en cache et demande une relecture
+        en arrière-plan ; chaque changement est ensuite notifié.
+        """
+        self.supervisor.refresh()
         
         for plugin_id in self.plugin_frames.keys():
             self.refresh_plugin_status(plugin_id)
         
-        self.status_label.config(text="Actualisation terminée", fg='#2ecc71')
+        self.status_label.config(text="Actualisation demandée", fg='#2ecc71')
         self.root.after(2000, lambda: self.status_label.config(text="Prêt", fg='#ecf0f1'))
     
     def save_all(self):
@@ -480,8 +538,15 @@ class PluginControlPanel:
         
         self.panel = tk.Frame(parent, bg='#2c3e50')
         self.status_labels = {}
+        self.supervisor = plugin_manager.start_status_supervisor()
         
         self.create_compact_panel()
+        
+        # Mise à jour à chaque changement de statut plutôt que toutes les 5 s
+        self._status_changes = queue.Queue()
+        self.supervisor.add_listener(self._on_status_changed)
+        self.panel.bind('<Destroy>', self._on_destroy, add='+')
+        self._poll_id = self.panel.after(STATUS_POLL_MS, self._drain_status_changes)
     
     def create_compact_panel(self):
         """Crée un panneau compact pour l'interface principale"""
@@ -544,20 +609,39 @@ class PluginControlPanel:
             command=self.open_manager
         ).pack(pady=10)
         
-        # Mise à jour automatique
         self.update_status()
     
+    def _on_status_changed(self, plugin_id: str, entry: Dict[str, Any]):
+        """Notification du superviseur (thread de fond) : aucun appel Tk ici"""
+        if plugin_id in self.status_labels:
+            self._status_changes.put_nowait(plugin_id)
+    
+    def _drain_status_changes(self):
+        changed = False
+        while True:
+            try:
+                self._status_changes.get_nowait()
+                changed = True
+            except queue.Empty:
+                break
+        if changed:
+            self.update_status()
+        self._poll_id = self.panel.after(STATUS_POLL_MS, self._drain_status_changes)
+    
+    def _on_destroy(self, event):
+        if event.widget is self.panel:
+            self.supervisor.remove_listener(self._on_status_changed)
+            self.panel.after_cancel(self._poll_id)
+    
     def update_status(self):
-        """Met à jour les indicateurs de statut"""
+        """Met à jour les indicateurs de statut depuis le cache du superviseur"""
         for plugin_id, label in self.status_labels.items():
-            plugin = self.manager.get_plugin(plugin_id)
-            if plugin and plugin.is_initialized():
+            plugin = self.manager.plugins.get(plugin_id)
+            entry = self.supervisor.get(plugin_id)
+            if plugin and plugin.is_initialized() and not (entry and entry['error']):
                 label.config(fg='#2ecc71')  # Vert
             else:
                 label.config(fg='#e74c3c')  # Rouge
-        
-        # Répéter toutes les 5 secondes
-        self.panel.after(5000, self.update_status)
     
     def open_manager(self):
         """Ouvre le gestionnaire complet"""
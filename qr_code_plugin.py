@@ -10,7 +10,12 @@ from typing import Dict, List, Any, Optional
 import logging
 from pathlib import Path
 from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import io
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,21 @@ class QRCodePlugin(PluginInterface):
         self.qr_available = False
         self.server_url = config.settings.get('server_url', 'http://192.168.1.100:8000')
         self.qr_size = config.settings.get('qr_size', 200)
+        
+        # Jetons de partage courts (fournis par le serveur web) : QR codes plus petits
+        self.share_tokens = None
+        
+        # Cache LRU des QR codes rendus : clé (données, taille, niveau de correction, format)
+        self.cache_size = config.settings.get('cache_size', 64)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        # Cache disque (à côté des vignettes) et pré-génération en arrière-plan
+        cache_dir = config.settings.get('cache_dir')
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._prefetch_executor = None
     
     def initialize(self) -> bool:
         """Initialise le plugin QR Code"""
@@ -44,6 +64,10 @@ class QRCodePlugin(PluginInterface):
     def shutdown(self):
         """Arrête le plugin"""
         logger.info("Arrêt QRCodePlugin")
+        if self._prefetch_executor:
+            self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+            self._prefetch_executor = None
+        self.clear_cache()
         self._initialized = False
     
     def get_status(self) -> Dict[str, Any]:
@@ -52,44 +76,165 @@ class QRCodePlugin(PluginInterface):
             "initialized": self._initialized,
             "qr_available": self.qr_available,
             "server_url": self.server_url,
-            "qr_size": self.qr_size
+            "qr_size": self.qr_size,
+            "cache_entries": len(self._cache),
+            "cache_dir": str(self.cache_dir) if self.cache_dir else None,
+            "cache_hits": self._cache_hits,
+            "cache_misses": self._cache_misses
         }
     
     def get_capabilities(self) -> List[str]:
         """Retourne les capacités du plugin"""
-        return ["generate_qr", "generate_qr_for_photo", "get_photo_url"]
+        return ["generate_qr", "generate_qr_for_photo", "get_photo_url", "render_qr", "render_qr_png", "prefetch_qr"]
     
-    def generate_qr_code(self, data: str, output_path: str, size: Optional[int] = None) -> bool:
-        """Génère un QR code"""
+    def _cache_get(self, key):
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is None:
+                self._cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+            return value
+    
+    def _cache_put(self, key, value):
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Vide le cache des QR codes"""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def set_cache_dir(self, cache_dir):
+        """Définit le dossier de cache disque des QR codes"""
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def _disk_path(self, data: str, size: int, error_level: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha1(f"{data}|{size}|{error_level}".encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{digest[:20]}.png"
+    
+    def _load_or_render(self, data: str, size: int, error_level: str):
+        """Lit le QR code depuis le cache disque, sinon le génère et l'y enregistre"""
+        from PIL import Image
+        
+        disk_path = self._disk_path(data, size, error_level)
+        if disk_path and disk_path.exists():
+            try:
+                with Image.open(disk_path) as img:
+                    img.load()
+                    return img.copy()
+            except Exception as e:
+                logger.warning(f"QR code en cache illisible {disk_path.name}: {e}")
+        
+        img = self._render(data, size, error_level)
+        
+        if disk_path:
+            try:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = disk_path.with_name(f".{disk_path.name}.{threading.get_ident()}")
+                img.save(tmp_path, format='PNG', optimize=True)
+                os.replace(tmp_path, disk_path)
+            except Exception as e:
+                logger.warning(f"Impossible d'enregistrer le QR code en cache: {e}")
+        
+        return img
+    
+    def _render(self, data: str, size: int, error_level: str):
+        """Rendu effectif d'un QR code en image PIL (niveaux de gris)"""
+        import qrcode
+        from PIL import Image
+        
+        levels = {
+            'L': qrcode.constants.ERROR_CORRECT_L,
+            'M': qrcode.constants.ERROR_CORRECT_M,
+            'Q': qrcode.constants.ERROR_CORRECT_Q,
+            'H': qrcode.constants.ERROR_CORRECT_H
+        }
+        
+        # Créer le QR code
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=levels.get(error_level.upper(), qrcode.constants.ERROR_CORRECT_L),
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        
+        # Un pixel par module, puis agrandissement sans lissage (bords nets)
+        matrix = qr.get_matrix()
+        modules = len(matrix)
+        img = Image.new('L', (modules, modules), 255)
+        img.putdata([0 if cell else 255 for row in matrix for cell in row])
+        return img.resize((size, size), Image.Resampling.NEAREST)
+    
+    def render_qr(self, data: str, size: Optional[int] = None, error_level: str = 'L'):
+        """Retourne le QR code sous forme d'image PIL (mise en cache)
+        
+        L'image renvoyée est une copie : l'appelant peut la modifier librement.
+        """
         if not self._initialized or not self.qr_available:
             logger.error("Plugin QR Code non initialisé")
+            return None
+        
+        if size is None:
+            size = self.qr_size
+        
+        key = (data, size, error_level, 'image')
+        img = self._cache_get(key)
+        if img is None:
+            try:
+                img = self._load_or_render(data, size, error_level)
+            except Exception as e:
+                logger.error(f"Erreur génération QR code: {e}")
+                return None
+            self._cache_put(key, img)
+        
+        return img.copy()
+    
+    def render_qr_png(self, data: str, size: Optional[int] = None, error_level: str = 'L') -> Optional[bytes]:
+        """Retourne le QR code encodé en PNG (mise en cache)"""
+        if size is None:
+            size = self.qr_size
+        
+        key = (data, size, error_level, 'png')
+        png = self._cache_get(key)
+        if png is None:
+            img = self.render_qr(data, size, error_level)
+            if img is None:
+                return None
+            buffer = io.BytesIO()
+            img.save(buffer, format='PNG', optimize=True)
+            png = buffer.getvalue()
+            self._cache_put(key, png)
+        
+        return png
+    
+    def prefetch_qr(self, data: str, size: Optional[int] = None, error_level: str = 'L'):
+        """Génère un QR code en arrière-plan pour un affichage instantané ensuite"""
+        if not self._initialized or not self.qr_available:
+            return None
+        
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr-prefetch")
+        return self._prefetch_executor.submit(self.render_qr, data, size, error_level)
+    
+    def generate_qr_code(self, data: str, output_path: str, size: Optional[int] = None) -> bool:
+        """Génère un QR code dans un fichier PNG"""
+        png = self.render_qr_png(data, size)
+        if png is None:
             return False
         
         try:
-            import qrcode
-            from PIL import Image
-            
-            # Créer le QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(data)
-            qr.make(fit=True)
-            
-            # Créer l'image
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Redimensionner si nécessaire
-            if size is None:
-                size = self.qr_size
-            
-            img = img.resize((size, size), Image.Resampling.LANCZOS)
-            
-            # Sauvegarder
-            img.save(output_path)
+            with open(output_path, 'wb') as f:
+                f.write(png)
             logger.info(f"QR code généré: {output_path}")
             return True
             
@@ -101,6 +246,11 @@ class QRCodePlugin(PluginInterface):
         """Construit l'URL de partage pour une photo"""
         # Extraire juste le nom du fichier
         filename = os.path.basename(photo_filename)
+        
+        # URL courte si les jetons de partage sont disponibles
+        if self.share_tokens is not None:
+            return self.share_tokens.short_url(self.server_url, 'photo', filename)
+        
         url = f"{self.server_url}/photo/{filename}"
         return url
     
@@ -132,16 +282,14 @@ class QRCodePlugin(PluginInterface):
         try:
             from PIL import Image
             
-            # Générer le QR code temporaire
-            temp_qr = "/tmp/temp_qr.png"
+            # Générer le QR code en mémoire (aucun fichier temporaire partagé)
             url = self.get_photo_url(photo_path)
-            
-            if not self.generate_qr_code(url, temp_qr, size=150):
+            qr = self.render_qr(url, size=150)
+            if qr is None:
                 return False
             
-            # Ouvrir la photo et le QR code
+            # Ouvrir la photo
             photo = Image.open(photo_path)
-            qr = Image.open(temp_qr)
             
             # Calculer la position
             photo_width, photo_height = photo.size
@@ -170,9 +318,6 @@ class QRCodePlugin(PluginInterface):
             # Sauvegarder
             photo.save(output_path, quality=95)
             
-            # Nettoyer
-            os.remove(temp_qr)
-            
             logger.info(f"QR code ajouté à la photo: {output_path}")
             return True
             
@@ -192,7 +337,8 @@ def register_qr_plugin(manager):
             priority=16,
             settings={
                 "server_url": "http://192.168.1.100:8000",
-                "qr_size": 200
+                "qr_size": 200,
+                "cache_size": 64
             }
         )
         manager.save_config()
@@ -227,6 +373,16 @@ if __name__ == "__main__":
         if plugin.generate_qr_code(test_url, "/tmp/test_qr.png"):
             print("✓ QR code généré: /tmp/test_qr.png")
         
+        # Test cache : le second rendu ne coûte rien
+        import time
+        start = time.perf_counter()
+        plugin.render_qr(test_url, size=400)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        plugin.render_qr(test_url, size=400)
+        second = time.perf_counter() - start
+        print(f"✓ Rendu en mémoire: {first * 1000:.1f} ms, depuis le cache: {second * 1000:.2f} ms")
+        
         # Test URL photo
         url = plugin.get_photo_url("/home/user/photo_test.jpg")
         print(f"URL: {url}")
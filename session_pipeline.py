@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Pipeline de traitement des sessions photo
+capture -> import -> style -> vignette/QR -> upload, plus l'impression
+
+Chaque étape a sa file et son propre thread : la photo 2 est capturée
+pendant que la photo 1 est stylisée, et l'upload d'une session continue
+pendant la suivante. Chaque session produit une trace des durées par étape.
+"""
+
+from concurrent.futures import Future
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from photo_web_server import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Étapes dans l'ordre ; l'impression est déclenchée à part (choix de l'invité)
+STAGES = ('capture', 'ingest', 'style', 'thumbnail', 'upload', 'print')
+
+# Étapes alimentées par l'interface : files non bornées, le thread Tk ne bloque jamais
+ENTRY_STAGES = ('capture', 'ingest', 'print')
+
+
+class PhotoSession:
+    """Une session de prise de vue suivie par le pipeline"""
+    
+    def __init__(self, session_id: str, style: str, decorator=None):
+        self.id = session_id
+        self.style = style
+        self.decorator = decorator
+        self.started = time.monotonic()
+        self.outputs: Dict[int, Optional[str]] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.expected = 0
+        self.processed = 0
+        self.pending = 0
+        self.last_done = None
+        self.closed = False
+        self.cancelled = False
+        self.released = False
+        self.traced = False
+        # Résolu avec la liste des photos finales quand toutes sont stylisées
+        self.ready: Future = Future()
+    
+    def photos(self) -> List[str]:
+        return [path for _, path in sorted(self.outputs.items()) if path]
+
+
+@dataclass
+class PipelineItem:
+    """Un travail qui traverse les étapes"""
+    session: Optional[PhotoSession]
+    index: int
+    path: str
+    target: Any = None
+    future: Optional[Future] = None
+    output: Optional[str] = None
+    pause: float = 0
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class SessionPipeline:
+    """Étapes reliées par des files bornées (contre-pression entre étapes), un thread par étape"""
+    
+    def __init__(self, plugin_manager, photo_dir, queue_size: int = 4,
+                 trace_file: Optional[Path] = None):
+        self.plugin_manager = plugin_manager
+        self.photo_dir = Path(photo_dir)
+        self.incoming_dir = self.photo_dir / ".cache" / "incoming"
+        self.queue_size = queue_size
+        self.trace_file = Path(trace_file or Path.home() / ".photovinc_session_traces.jsonl")
+        
+        # Appelé (depuis le thread vignettes) quand les photos d'une session sont prêtes
+        self.on_session_ready: Optional[Callable[[PhotoSession, List[str]], None]] = None
+        
+        self.traces = deque(maxlen=100)
+        self.queues = {name: queue.Queue(maxsize=0 if name in ENTRY_STAGES else queue_size)
+                       for name in STAGES}
+        self.handlers = {
+            'capture': self._capture,
+            'ingest': self._ingest,
+            'style': self._style,
+            'thumbnail': self._thumbnail,
+            'upload': self._upload,
+            'print': self._print
+        }
+        self.threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._last_stamp = None
+        self._same_stamp = 0
+    
+    # --- Cycle de vie ---
+    
+    def start(self):
+        """Démarre un thread par étape"""
+        if self.threads:
+            return
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+        for name in STAGES:
+            thread = threading.Thread(target=self._worker, args=(name,),
+                                      name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Pipeline de session démarré ({len(STAGES)} étapes, files de {self.queue_size})")
+    
+    def stop(self):
+        """Arrête les étapes une fois leurs files vidées"""
+        for name in STAGES:
+            self.queues[name].put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+    
+    # --- Sessions ---
+    
+    def new_session(self, style: str, decorator=None) -> PhotoSession:
+        # Horodatage des noms de fichiers, suffixé si deux sessions tombent dans la même seconde
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        with self._lock:
+            if stamp == self._last_stamp:
+                self._same_stamp += 1
+                session_id = f"{stamp}_{self._same_stamp}"
+            else:
+                self._last_stamp, self._same_stamp = stamp, 0
+                session_id = stamp
+        return PhotoSession(session_id, style, decorator)
+    
+    def capture(self, session: PhotoSession, camera, temp_path: str) -> Future:
+        """Capture en arrière-plan ; le Future donne True si la photo existe"""
+        future = Future()
+        self._submit('capture', PipelineItem(session, 0, temp_path, target=camera, future=future))
+        return future
+    
+    def ingest(self, session: PhotoSession, temp_path: str) -> int:
+        """Ajoute une photo validée : import, style, vignette puis upload"""
+        with self._lock:
+            session.expected += 1
+            index = session.expected
+            session.outputs[index] = None
+        self._submit('ingest', PipelineItem(session, index, temp_path))
+        return index
+    
+    def close(self, session: PhotoSession):
+        """Plus aucune photo à venir : ready sera résolu après la dernière"""
+        with self._lock:
+            session.closed = True
+        self._check_ready(session)
+    
+    def cancel(self, session: PhotoSession):
+        """Abandonne la session : les photos déjà produites sont supprimées"""
+        with self._lock:
+            session.cancelled = True
+            session.closed = True
+            outputs = [path for path in session.outputs.values() if path]
+            session.outputs.clear()
+        for path in outputs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if not session.ready.done():
+            session.ready.set_result([])
+        self.release(session)
+    
+    def release(self, session: PhotoSession):
+        """L'application a fini avec la session : la trace est émise dès que tout est traité"""
+        with self._lock:
+            session.released = True
+        self._maybe_emit_trace(session)
+    
+    def print(self, printer, photo_path: str, session: Optional[PhotoSession] = None,
+              pause: float = 0) -> Future:
+        """Impression en arrière-plan ; pause laisse l'imprimante respirer entre deux jobs"""
+        future = Future()
+        self._submit('print', PipelineItem(session, 0, str(photo_path), target=printer,
+                                           future=future, pause=pause))
+        return future
+    
+    # --- Mécanique des étapes ---
+    
+    def _submit(self, stage: str, item: PipelineItem):
+        if item.session is not None:
+            with self._lock:
+                item.session.pending += 1
+        item.enqueued = time.monotonic()
+        # Appelé depuis le thread Tk : file d'entrée non bornée, jamais d'attente
+        self.queues[stage].put_nowait(item)
+    
+    def _worker(self, stage: str):
+        handler = self.handlers[stage]
+        stage_queue = self.queues[stage]
+        while True:
+            item = stage_queue.get()
+            if item is None:
+                break
+            
+            waited = time.monotonic() - item.enqueued
+            start = time.monotonic()
+            next_stage = None
+            try:
+                next_stage = handler(item)
+            except Exception as e:
+                logger.error(f"Étape {stage} en échec ({item.path}): {e}")
+                if item.future and not item.future.done():
+                    item.future.set_exception(e)
+                if stage in ('ingest', 'style', 'thumbnail'):
+                    self._photo_processed(item, None)
+            run = time.monotonic() - start
+            
+            session = item.session
+            if session is not None:
+                with self._lock:
+                    session.events.append({
+                        'stage': stage, 'photo': item.index,
+                        'wait': round(waited, 4), 'run': round(run, 4)
+                    })
+            
+            if next_stage:
+                # File pleine : l'étape attend la suivante (contre-pression)
+                item.enqueued = time.monotonic()
+                self.queues[next_stage].put(item)
+            elif session is not None:
+                with self._lock:
+                    session.pending -= 1
+                    session.last_done = time.monotonic()
+                self._maybe_emit_trace(session)
+    
+    def _capture(self, item: PipelineItem):
+        success = item.target.capture_image(item.path)
+        item.future.set_result(bool(success) and os.path.exists(item.path))
+        return None
+    
+    def _ingest(self, item: PipelineItem):
+        """Libère /tmp : la capture rejoint le disque de la galerie"""
+        session = item.session
+        if session.cancelled:
+            os.remove(item.path)
+            return None
+        incoming = self.incoming_dir / f"{session.id}_{item.index}{Path(item.path).suffix}"
+        shutil.move(item.path, incoming)
+        item.path = str(incoming)
+        item.output = str(self.photo_dir / f"photo_{session.style}_{session.id}_{item.index}.jpg")
+        return 'style'
+    
+    def _style(self, item: PipelineItem):
+        session = item.session
+        try:
+            if session.cancelled:
+                return None
+            decorator = session.decorator
+            if decorator and decorator.is_initialized():
+                if not decorator.apply_style(item.path, session.style, item.output):
+                    self._photo_processed(item, None)
+                    return None
+            else:
+                # Copier sans style
+                shutil.copy(item.path, item.output)
+            return 'thumbnail'
+        finally:
+            os.remove(item.path)
+    
+    def _thumbnail(self, item: PipelineItem):
+        """Vignette de l'album (le QR de session suit quand toutes sont prêtes)"""
+        if item.session.cancelled:
+            # Stylisée pendant l'annulation : ne pas la laisser dans la galerie
+            os.remove(item.output)
+            return None
+        try:
+            get_thumbnail(self.photo_dir, Path(item.output).name)
+        except Exception as e:
+            # La photo stylisée est bonne : l'album recréera la vignette à la demande
+            logger.warning(f"Vignette impossible pour {item.output}: {e}")
+        self._photo_processed(item, item.output)
+        return 'upload'
+    
+    def _upload(self, item: PipelineItem):
+        """Mise en file dans le journal NextCloud (envoi et reprises en arrière-plan)"""
+        if item.session.cancelled:
+            return None
+        nextcloud = self.plugin_manager.get_plugin("nextcloud")
+        # Même hors ligne au démarrage : le journal enverra la photo au retour du réseau
+        if nextcloud and nextcloud.session is not None and nextcloud.auto_upload:
+            nextcloud.upload_photo(item.output)
+        return None
+    
+    def _print(self, item: PipelineItem):
+        success = item.target.print_image(item.path)
+        item.future.set_result(bool(success))
+        if item.pause:
+            time.sleep(item.pause)
+        return None
+    
+    # --- Suivi des sessions ---
+    
+    def _photo_processed(self, item: PipelineItem, output: Optional[str]):
+        session = item.session
+        with self._lock:
+            orphan = output if session.cancelled else None
+            if item.index in session.outputs and not session.cancelled:
+                session.outputs[item.index] = output
+            session.processed += 1
+        if orphan:
+            # Annulée pendant la vignette : cancel() n'a pas vu cette photo
+            try:
+                os.remove(orphan)
+            except OSError:
+                pass
+        self._check_ready(session)
+    
+    def _check_ready(self, session: PhotoSession):
+        with self._lock:
+            if session.ready.done() or not session.closed or session.processed < session.expected:
+                return
+            photos = session.photos()
+        session.ready.set_result(photos)
+        
+        if self.on_session_ready and photos:
+            try:
+                self.on_session_ready(session, photos)
+            except Exception as e:
+                logger.error(f"Erreur préparation session {session.id}: {e}")
+    
+    def _maybe_emit_trace(self, session: PhotoSession):
+        with self._lock:
+            if session.traced or not session.released or session.pending > 0:
+                return
+            session.traced = True
+            trace = self._build_trace(session)
+            self.traces.append(trace)
+        
+        summary = ', '.join(f"{stage} {s['count']}×{s['run_mean']:.2f}s"
+                            for stage, s in trace['stages'].items())
+        logger.info(f"Session {session.id} ({trace['photos']} photo(s), "
+                    f"{trace['total_seconds']:.1f}s): {summary}")
+        try:
+            with open(self.trace_file, 'a') as f:
+                f.write(json.dumps(trace) + "\n")
+        except Exception as e:
+            logger.error(f"Erreur écriture trace de session: {e}")
+    
+    @staticmethod
+    def _build_trace(session: PhotoSession) -> Dict[str, Any]:
+        stages = {}
+        for stage in STAGES:
+            events = [e for e in session.events if e['stage'] == stage]
+            if not events:
+                continue
+            runs = [e['run'] for e in events]
+            stages[stage] = {
+                'count': len(events),
+                'run_total': round(sum(runs), 4),
+                'run_mean': round(sum(runs) / len(runs), 4),
+                'run_max': round(max(runs), 4),
+                'wait_total': round(sum(e['wait'] for e in events), 4)
+            }
+        return {
+            'session': session.id,
+            'style': session.style,
+            'photos': len(session.photos()),
+            'cancelled': session.cancelled,
+            'total_seconds': round((session.last_done or time.monotonic()) - session.started, 3),
+            'stages': stages,
+            'events': list(session.events)
+        }
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Jetons de partage courts pour photovinc
+Associe des identifiants courts aux photos, sessions et archives ZIP
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+from datetime import datetime
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Alphabet du mode alphanumérique des QR codes : une URL entièrement en
+# majuscules y est codée sur 5,5 bits par caractère au lieu de 8
+TOKEN_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Préfixe réservé aux liens courts : aucune autre route ne commence par /s/
+TOKEN_PREFIX = "/s/"
+TOKEN_PATTERN = re.compile(r'^/[sS]/([0-9A-Za-z]{3,12})/?$')
+
+KINDS = ('photo', 'session', 'zip')
+
+
+class ShareTokenStore:
+    """Table persistante jeton -> photo, session ou archive"""
+    
+    def __init__(self, table_file: Optional[Union[str, Path]] = None, token_length: int = 5):
+        self.table_file = Path(table_file or Path.home() / ".photovinc_share_tokens.json")
+        self.token_length = token_length
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._load()
+    
+    @staticmethod
+    def _target_key(kind: str, target: Union[str, List[str]]) -> str:
+        if isinstance(target, (list, tuple)):
+            target = '|'.join(target)
+        return f"{kind}:{target}"
+    
+    def _load(self):
+        if not self.table_file.exists():
+            return
+        try:
+            with open(self.table_file, 'r') as f:
+                self.tokens = json.load(f).get('tokens', {})
+            self._index = {self._target_key(e['kind'], e['target']): token
+                           for token, e in self.tokens.items()}
+        except Exception as e:
+            logger.error(f"Erreur chargement jetons de partage: {e}")
+    
+    def _save(self):
+        try:
+            tmp_file = self.table_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'tokens': self.tokens}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.table_file)
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde jetons de partage: {e}")
+    
+    def get_or_create(self, kind: str, target: Union[str, List[str]]) -> str:
+        """Retourne le jeton d'une cible, en le créant au besoin
+        
+        Une même cible garde toujours le même jeton : l'URL et donc le QR code
+        restent identiques (et réutilisables depuis le cache).
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Type de partage inconnu: {kind}")
+        
+        if isinstance(target, (list, tuple)):
+            target = [os.path.basename(str(t)) for t in target]
+        else:
+            target = os.path.basename(str(target))
+        
+        key = self._target_key(kind, target)
+        with self._lock:
+            token = self._index.get(key)
+            if token:
+                return token
+            
+            token = self._new_token()
+            self.tokens[token] = {
+                'kind': kind,
+                'target': target,
+                'created': datetime.now().isoformat()
+            }
+            self._index[key] = token
+            self._save()
+            return token
+    
+    def _new_token(self) -> str:
+        while True:
+            token = ''.join(secrets.choice(TOKEN_ALPHABET) for _ in range(self.token_length))
+            if token not in self.tokens:
+                return token
+    
+    def resolve(self, token: str) -> Optional[Dict[str, Any]]:
+        """Retourne la cible d'un jeton (insensible à la casse)"""
+        with self._lock:
+            entry = self.tokens.get(token.upper())
+            return dict(entry) if entry else None
+    
+    def revoke(self, token: str):
+        """Supprime un jeton"""
+        with self._lock:
+            entry = self.tokens.pop(token.upper(), None)
+            if entry:
+                self._index.pop(self._target_key(entry['kind'], entry['target']), None)
+                self._save()
+    
+    def prune(self, photo_dir: Union[str, Path]) -> int:
+        """Supprime les jetons dont les fichiers n'existent plus (ZIP expirés, photos effacées)"""
+        photo_dir = Path(photo_dir)
+        removed = 0
+        with self._lock:
+            for token, entry in list(self.tokens.items()):
+                targets = entry['target'] if isinstance(entry['target'], list) else [entry['target']]
+                if not any((photo_dir / name).exists() for name in targets):
+                    del self.tokens[token]
+                    self._index.pop(self._target_key(entry['kind'], entry['target']), None)
+                    removed += 1
+            if removed:
+                self._save()
+        
+        if removed:
+            logger.info(f"{removed} jeton(s) de partage expiré(s) supprimé(s)")
+        return removed
+    
+    def short_url(self, server_url: str, kind: str, target: Union[str, List[str]]) -> str:
+        """URL de partage la plus courte possible pour une cible"""
+        token = self.get_or_create(kind, target)
+        # Schéma et hôte sont insensibles à la casse, le jeton aussi
+        return f"{server_url.rstrip('/')}{TOKEN_PREFIX}{token}".upper()
+
+
+if __name__ == "__main__":
+    import tempfile
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_tokens_"))
+    store = ShareTokenStore(work_dir / "tokens.json")
+    
+    name = "photo_polaroid_20260105_193213_3.jpg"
+    long_url = f"http://192.168.1.100:8000/photo/{name}"
+    short_url = store.short_url("http://192.168.1.100:8000", "photo", name)
+    print(f"URL longue ({len(long_url)} car.): {long_url}")
+    print(f"URL courte ({len(short_url)} car.): {short_url}")
+    
+    try:
+        import qrcode
+        for url in (long_url, short_url):
+            qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+            qr.add_data(url)
+            qr.make(fit=True)
+            print(f"Version QR {qr.version} ({len(qr.get_matrix())} modules): {url}")
+    except ImportError:
+        print("Module qrcode non installé: pip install qrcode[pil]")
+    
+    reloaded = ShareTokenStore(work_dir / "tokens.json")
+    token = short_url.rsplit('/', 1)[-1]
+    print(f"Jeton relu après redémarrage: {reloaded.resolve(token.lower())}")
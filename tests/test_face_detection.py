@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests de la détection de visages (ignorés sans OpenCV)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+from PIL import Image
+
+import photovinc_advanced_plugins as advanced
+from plugin_manager import PluginConfig
+
+
+class RecordingCascade:
+    """Classifier simulé : renvoie un visage fixe sur l'image réduite"""
+    
+    def __init__(self, faces):
+        self.faces = faces
+        self.calls = []
+    
+    def detectMultiScale(self, gray, **kwargs):
+        self.calls.append((gray.shape, kwargs))
+        return self.faces
+
+
+@unittest.skipIf(cv2 is None, "OpenCV non installé")
+class DetectFacesTest(unittest.TestCase):
+    
+    def test_coordinates_scaled_back_to_original(self):
+        rgb = np.zeros((1200, 1600, 3), dtype='uint8')
+        cascade = RecordingCascade([(100, 50, 80, 80)])
+        
+        faces = advanced._detect_faces_array(cascade, rgb, 400)
+        
+        shape, kwargs = cascade.calls[0]
+        self.assertEqual(shape, (300, 400))
+        # minSize de 30 px de l'image d'origine, ramené à l'échelle de détection
+        self.assertEqual(kwargs['minSize'], (8, 8))
+        self.assertEqual(faces, [{"x": 400, "y": 200, "w": 320, "h": 320}])
+    
+    def test_real_cascade_finds_no_face_in_plain_image(self):
+        cascade_path = Path(cv2.data.haarcascades) / "haarcascade_frontalface_default.xml"
+        rgb = np.full((480, 640, 3), 128, dtype='uint8')
+        
+        faces = advanced._detect_faces_array(cv2.CascadeClassifier(str(cascade_path)), rgb, 320)
+        
+        self.assertEqual(faces, [])
+
+
+@unittest.skipIf(cv2 is None, "OpenCV non installé")
+class EnhanceSessionTest(unittest.TestCase):
+    
+    def test_originals_kept_without_output_dir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            photo = Path(tmp) / "photo_normal_20260101_120000_1.jpg"
+            Image.new('RGB', (320, 240), 'gray').save(photo)
+            original = photo.read_bytes()
+            plugin = advanced.FaceDetectionPlugin(PluginConfig(name="faces", settings={
+                "cascade_path": str(Path(cv2.data.haarcascades) / "haarcascade_frontalface_default.xml"),
+                "batch_workers": 1
+            }))
+            self.assertTrue(plugin.initialize())
+            self.addCleanup(plugin.shutdown)
+            
+            results = plugin.enhance_session([str(photo)])
+            
+            self.assertEqual(results, {str(photo): []})
+            self.assertEqual(photo.read_bytes(), original)
+            self.assertTrue((Path(tmp) / "photo_normal_20260101_120000_1_enhanced.jpg").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
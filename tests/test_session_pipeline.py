@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests du pipeline de session (étapes réelles, appareil et plugins simulés)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import session_pipeline
+from session_pipeline import SessionPipeline
+
+
+class NoPlugins:
+    def get_plugin(self, name):
+        return None
+
+
+class ThumbnailFailureTest(unittest.TestCase):
+    """Une vignette en échec ne doit pas faire perdre la photo stylisée"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.photo_dir = Path(self.tmp.name) / "photos"
+        self.pipeline = SessionPipeline(NoPlugins(), self.photo_dir,
+                                        trace_file=Path(self.tmp.name) / "traces.jsonl")
+        self.pipeline.start()
+        self.addCleanup(self.pipeline.stop)
+    
+    def capture(self, name):
+        path = Path(self.tmp.name) / name
+        path.write_bytes(b"jpeg")
+        return str(path)
+    
+    def test_styled_photo_kept_when_thumbnail_raises(self):
+        session = self.pipeline.new_session("normal")
+        with mock.patch.object(session_pipeline, "get_thumbnail",
+                               side_effect=OSError("image tronquée")), \
+                self.assertLogs(session_pipeline.logger, "WARNING"):
+            self.pipeline.ingest(session, self.capture("capture_1.jpg"))
+            self.pipeline.close(session)
+            photos = session.ready.result(timeout=5)
+        
+        self.assertEqual(len(photos), 1)
+        self.assertTrue(Path(photos[0]).exists())
+        self.assertEqual(Path(photos[0]).parent, self.photo_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
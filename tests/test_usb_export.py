@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests de la détection des clés USB (sysfs et table des montages simulés)
+"""
+
+import importlib.machinery
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_usb_export():
+    # Le module vit dans un fichier au nom non importable directement
+    path = str(APP_DIR / "!!!!!usb_export.py!!!!")
+    loader = importlib.machinery.SourceFileLoader("usb_export", path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader("usb_export", loader))
+    loader.exec_module(module)
+    return module
+
+
+usb_export = load_usb_export()
+
+
+class FakeSysfs:
+    """/sys/block et /sys/class/block minimalistes : disques USB et leurs partitions"""
+    
+    def __init__(self, root):
+        self.root = Path(root)
+        self.block = self.root / "sys" / "block"
+        self.class_block = self.root / "sys" / "class" / "block"
+        self.block.mkdir(parents=True)
+        self.class_block.mkdir(parents=True)
+    
+    def add_disk(self, name, number, removable, usb=True, partitions=()):
+        bus = "usb2/2-1/2-1:1.0/host0" if usb else "platform/mmc0"
+        disk = self.root / "sys" / "devices" / bus / "block" / name
+        disk.mkdir(parents=True)
+        (disk / "removable").write_text("1\n" if removable else "0\n")
+        (disk / "dev").write_text(f"{number}:0\n")
+        os.symlink(disk, self.block / name)
+        os.symlink(disk, self.class_block / name)
+        for index, partition in enumerate(partitions, 1):
+            part = disk / partition
+            part.mkdir()
+            (part / "partition").write_text(f"{index}\n")
+            (part / "dev").write_text(f"{number}:{index}\n")
+            os.symlink(part, self.class_block / partition)
+
+
+class ScanUsbMountsTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sysfs = FakeSysfs(self.tmp.name)
+        self.mounts = Path(self.tmp.name) / "mounts"
+        self.exporter = usb_export.USBExporter(self.tmp.name)
+        self.exporter.SYS_BLOCK = self.sysfs.block
+        self.exporter.SYS_CLASS_BLOCK = self.sysfs.class_block
+        self.exporter.MOUNTS_FILE = str(self.mounts)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def write_mounts(self, *lines):
+        self.mounts.write_text("".join(f"{line} 0 0\n" for line in lines))
+    
+    def test_usb_system_disk_is_never_an_export_target(self):
+        # Pi 4 démarré sur SSD USB (non amovible) + une clé
+        self.sysfs.add_disk("sda", 8, removable=False, partitions=("sda1", "sda2"))
+        self.sysfs.add_disk("sdb", 9, removable=True, partitions=("sdb1",))
+        self.write_mounts("/dev/sda2 / ext4 rw",
+                          "/dev/sda1 /boot/firmware vfat rw",
+                          "/dev/sdb1 /media/pi/CLE\\040PHOTOS vfat rw",
+                          "proc /proc proc rw")
+        self.exporter._root_device_number = lambda: "8:2"
+        
+        mounts = self.exporter._scan_usb_mounts()
+        
+        self.assertEqual(mounts, {Path("/media/pi/CLE PHOTOS"): "/dev/sdb1"})
+    
+    def test_root_disk_found_from_mount_table(self):
+        # Racine sur overlay : st_dev ne correspond à aucun bloc
+        self.sysfs.add_disk("sda", 8, removable=True, partitions=("sda1", "sda2"))
+        self.write_mounts("/dev/sda2 / ext4 rw", "/dev/sda1 /boot/firmware vfat rw")
+        self.exporter._root_device_number = lambda: None
+        
+        self.assertEqual(self.exporter._scan_usb_mounts(), {})
+    
+    def test_only_media_mount_points(self):
+        self.sysfs.add_disk("mmcblk0", 179, removable=False, usb=False, partitions=("mmcblk0p2",))
+        self.sysfs.add_disk("sdb", 8, removable=True, partitions=("sdb1", "sdb2"))
+        self.write_mounts("/dev/mmcblk0p2 / ext4 rw",
+                          "/dev/sdb1 /run/media/pi/CLE vfat rw",
+                          "/dev/sdb2 /srv/data ext4 rw")
+        self.exporter._root_device_number = lambda: "179:2"
+        
+        self.assertEqual(self.exporter._scan_usb_mounts(),
+                         {Path("/run/media/pi/CLE"): "/dev/sdb1"})
+
+
+class CopyResumeTest(unittest.TestCase):
+    """Reprise d'une copie interrompue : seul l'offset synchronisé est réutilisé"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        self.photo = root / "photo.jpg"
+        self.photo.write_bytes(os.urandom(300 * 1024))
+        self.dest = root / "cle" / "photo.jpg"
+        self.dest.parent.mkdir()
+        self.part = self.dest.with_name("photo.jpg.part")
+        self.checkpoint = self.dest.with_name("photo.jpg.part.offset")
+        self.exporter = usb_export.USBExporter(root, buffer_size=16 * 1024)
+        self.exporter.CHECKPOINT_BYTES = 64 * 1024
+    
+    def interrupted_copy(self, offset, tail):
+        # Préfixe synchronisé + fin non garantie (zéros après une coupure sur FAT)
+        self.part.write_bytes(self.photo.read_bytes()[:offset] + tail)
+        stat = self.photo.stat()
+        self.checkpoint.write_text(json.dumps(
+            {'offset': offset, 'size': stat.st_size, 'mtime': stat.st_mtime}))
+    
+    def test_resume_from_checkpoint_discards_unsynced_tail(self):
+        self.interrupted_copy(128 * 1024, b"\0" * 50000)
+        
+        copied = self.exporter._copy_file(self.photo, self.dest)
+        
+        self.assertEqual(copied, 300 * 1024 - 128 * 1024)
+        self.assertEqual(self.dest.read_bytes(), self.photo.read_bytes())
+        self.assertFalse(self.part.exists())
+        self.assertFalse(self.checkpoint.exists())
+    
+    def test_corrupted_prefix_restarts_from_zero(self):
+        self.interrupted_copy(128 * 1024, b"")
+        data = bytearray(self.part.read_bytes())
+        data[-10:] = b"\0" * 10
+        self.part.write_bytes(bytes(data))
+        
+        copied = self.exporter._copy_file(self.photo, self.dest)
+        
+        self.assertEqual(copied, 300 * 1024)
+        self.assertEqual(self.dest.read_bytes(), self.photo.read_bytes())
+    
+    def test_part_without_checkpoint_restarts_from_zero(self):
+        self.part.write_bytes(b"\0" * 1000)
+        
+        self.assertEqual(self.exporter._copy_file(self.photo, self.dest), 300 * 1024)
+        self.assertEqual(self.dest.read_bytes(), self.photo.read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Serveur WebDAV local imitant NextCloud
+Permet de tester les uploads (simples, par morceaux, reprise) sans vrai serveur
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from email.utils import formatdate
+from urllib.parse import quote, unquote, urlparse
+from pathlib import Path
+import hashlib
+import json
+import logging
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WebDAVStandInHandler(BaseHTTPRequestHandler):
+    """Handler WebDAV minimal (files + uploads chunking v2 + quota OCS)"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def __init__(self, *args, standin=None, **kwargs):
+        self.standin = standin
+        super().__init__(*args, **kwargs)
+    
+    def log_message(self, format, *args):
+        """Override pour logger proprement"""
+        logger.debug(f"WebDAV: {format % args}")
+    
+    # --- Utilitaires ---
+    
+    def _reply(self, code, body=b'', content_type='text/plain', headers=None):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+    
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+    
+    def _resolve(self, url_path):
+        """Retourne (espace, chemin local) pour une URL WebDAV"""
+        path = unquote(urlparse(url_path).path)
+        for space in ('files', 'uploads'):
+            prefix = f"/remote.php/dav/{space}/"
+            if path.startswith(prefix):
+                # On ignore le nom d'utilisateur
+                rest = path[len(prefix):].split('/', 1)
+                relative = rest[1] if len(rest) > 1 else ''
+                return space, self.standin.root / space / relative.strip('/')
+        return None, None
+    
+    def _record(self, space):
+        with self.standin.lock:
+            key = f"{self.command} {space}"
+            self.standin.requests[key] = self.standin.requests.get(key, 0) + 1
+    
+    # --- Méthodes HTTP ---
+    
+    def do_PROPFIND(self):
+        self._read_body()
+        space, target = self._resolve(self.path)
+        self._record(space)
+        if target is None or not target.exists():
+            return self._reply(404)
+        
+        items = [target]
+        if target.is_dir() and self.headers.get('Depth', '1') != '0':
+            items += sorted(target.iterdir())
+        
+        base = unquote(urlparse(self.path).path).rstrip('/')
+        parts = ['<?xml version="1.0" encoding="utf-8"?>',
+                 '<d:multistatus xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns">']
+        for item in items:
+            href = base if item == target else f"{base}/{item.name}"
+            stat = item.stat()
+            etag = hashlib.md5(f"{stat.st_size}-{stat.st_mtime_ns}".encode()).hexdigest()
+            if item.is_dir():
+                href += '/'
+                props = (f'<d:resourcetype><d:collection/></d:resourcetype>'
+                         f'<d:getetag>"{etag}"</d:getetag>')
+            else:
+                props = (f'<d:resourcetype/>'
+                         f'<d:getcontentlength>{stat.st_size}</d:getcontentlength>'
+                         f'<d:getetag>"{etag}"</d:getetag>')
+            props += f'<d:getlastmodified>{formatdate(stat.st_mtime, usegmt=True)}</d:getlastmodified>'
+            parts.append(f'<d:response><d:href>{quote(href)}</d:href><d:propstat>'
+                         f'<d:prop>{props}</d:prop><d:status>HTTP/1.1 200 OK</d:status>'
+                         f'</d:propstat></d:response>')
+        parts.append('</d:multistatus>')
+        
+        self._reply(207, ''.join(parts).encode('utf-8'), 'application/xml; charset=utf-8')
+    
+    def do_MKCOL(self):
+        self._read_body()
+        space, target = self._resolve(self.path)
+        self._record(space)
+        if target is None:
+            return self._reply(404)
+        if target.exists():
+            return self._reply(405)
+        if space == 'files' and not target.parent.exists():
+            return self._reply(409)
+        target.mkdir(parents=(space == 'uploads'))
+        self._reply(201)
+    
+    def do_PUT(self):
+        space, target = self._resolve(self.path)
+        self._record(space)
+        body = self._read_body()
+        if target is None or not target.parent.is_dir():
+            return self._reply(409)
+        
+        # Injection de pannes : simule une coupure pendant un upload par morceaux
+        if space == 'uploads':
+            with self.standin.lock:
+                if self.standin.fail_chunks > 0:
+                    self.standin.fail_chunks -= 1
+                    return self._reply(503)
+        
+        existed = target.exists()
+        target.write_bytes(body)
+        self._reply(204 if existed else 201)
+    
+    def do_MOVE(self):
+        self._read_body()
+        space, source = self._resolve(self.path)
+        self._record(space)
+        _, destination = self._resolve(self.headers.get('Destination', ''))
+        if source is None or destination is None:
+            return self._reply(400)
+        if not destination.parent.is_dir():
+            return self._reply(409)
+        
+        existed = destination.exists()
+        if space == 'uploads' and source.name == '.file':
+            # Assemblage des morceaux dans l'ordre de leur nom
+            chunks = sorted(p for p in source.parent.iterdir() if p.is_file())
+            with open(destination, 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk.read_bytes())
+            shutil.rmtree(source.parent)
+            total = self.headers.get('OC-Total-Length')
+            if total and destination.stat().st_size != int(total):
+                return self._reply(400, b'Taille assemblee incorrecte')
+        elif source.exists():
+            shutil.move(str(source), str(destination))
+        else:
+            return self._reply(404)
+        self._reply(204 if existed else 201)
+    
+    def do_GET(self):
+        if urlparse(self.path).path.startswith('/ocs/'):
+            return self._quota()
+        space, target = self._resolve(self.path)
+        self._record(space)
+        if target is None or not target.is_file():
+            return self._reply(404)
+        self._reply(200, target.read_bytes(), 'application/octet-stream')
+    
+    def do_HEAD(self):
+        space, target = self._resolve(self.path)
+        if target is None or not target.is_file():
+            return self._reply(404)
+        self.send_response(200)
+        self.send_header('Content-Length', str(target.stat().st_size))
+        self.end_headers()
+    
+    def do_DELETE(self):
+        space, target = self._resolve(self.path)
+        self._record(space)
+        if target is None or not target.exists():
+            return self._reply(404)
+        if target.is_dir():
+            shutil.rmtree(target)
+        else:
+            target.unlink()
+        self._reply(204)
+    
+    def _quota(self):
+        """Imite /ocs/v1.php/cloud/user"""
+        files = self.standin.root / 'files'
+        used = sum(p.stat().st_size for p in files.rglob('*') if p.is_file())
+        total = 10 * 1024**3
+        data = {'ocs': {'data': {'quota': {'used': used, 'total': total, 'free': total - used}}}}
+        self._reply(200, json.dumps(data).encode('utf-8'), 'application/json')
+
+
+class WebDAVStandIn:
+    """Serveur WebDAV local pour les tests du plugin NextCloud"""
+    
+    def __init__(self, port=0, root=None):
+        self.port = port
+        self._temp_dir = None
+        if root is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="photovinc_webdav_")
+            root = self._temp_dir
+        self.root = Path(root)
+        (self.root / 'files').mkdir(parents=True, exist_ok=True)
+        (self.root / 'uploads').mkdir(parents=True, exist_ok=True)
+        
+        self.server = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.fail_chunks = 0
+    
+    def start(self):
+        """Démarre le serveur en arrière-plan sur localhost"""
+        def handler(*args, **kwargs):
+            WebDAVStandInHandler(*args, standin=self, **kwargs)
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+        self.port = self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"WebDAV local démarré sur {self.get_server_url()}")
+        return True
+    
+    def stop(self):
+        """Arrête le serveur et supprime le dossier temporaire"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+    
+    def get_server_url(self):
+        return f"http://127.0.0.1:{self.port}"
+    
+    def file_path(self, remote_path: str) -> Path:
+        """Chemin local d'un fichier distant (ex: '/photovinc/photo.jpg')"""
+        return self.root / 'files' / remote_path.strip('/')
+
+
+if __name__ == "__main__":
+    # Vérification de l'upload par morceaux avec reprise
+    import os
+    from plugin_manager import PluginConfig
+    from nextcloud_plugin import NextCloudPlugin
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    standin = WebDAVStandIn()
+    standin.start()
+    work_dir = Path(tempfile.mkdtemp(prefix="photovinc_webdav_test_"))
+    
+    config = PluginConfig(
+        name="nextcloud",
+        settings={
+            "server_url": standin.get_server_url(),
+            "username": "photovinc",
+            "password": "test",
+            "remote_folder": "/photovinc",
+            "create_dated_folders": False,
+            "chunk_threshold_mb": 1,
+            "chunk_size_mb": 1,
+            # Journal et état distant du vrai photomaton laissés intacts
+            "journal_file": str(work_dir / "journal.json"),
+            "state_file": str(work_dir / "state.json")
+        }
+    )
+    plugin = NextCloudPlugin(config)
+    
+    big_file = work_dir / "montage_test.jpg"
+    big_file.write_bytes(os.urandom(5 * 1024**2 + 12345))
+    
+    try:
+        if not plugin.initialize():
+            print("✗ Connexion au WebDAV local impossible")
+        else:
+            # 1er essai interrompu : 2 morceaux refusés
+            standin.fail_chunks = 2
+            first = plugin.upload_file(str(big_file))
+            print(f"Premier essai (coupure simulée): {'✓' if first else '✗'}")
+            
+            # 2e essai : reprise des seuls morceaux manquants
+            before = standin.requests.get("PUT uploads", 0)
+            second = plugin.upload_file(str(big_file))
+            resent = standin.requests.get("PUT uploads", 0) - before
+            print(f"Reprise: {'✓' if second else '✗'} ({resent} morceau(x) renvoyé(s))")
+            
+            remote = standin.file_path("/photovinc/montage_test.jpg")
+            identical = remote.exists() and remote.read_bytes() == big_file.read_bytes()
+            print(f"Fichier assemblé identique: {'✓' if identical else '✗'}")
+    finally:
+        plugin.shutdown()
+        standin.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)